@@ -0,0 +1,59 @@
+from fastapi import APIRouter
+from app.services.outbound_writer import connection_stats
+from app.services.hub import hub_stats
+from app.services.wake_arbiter import get_wake_arbiter
+from app.services.live_session import session_stats
+from app.services.session_park import get_session_park
+from app.services.wakeword import gate_stats
+from app.services.load_governor import get_load_governor
+from app.services.intent_index import get_intent_index
+from app.services.tts_cache import get_tts_cache
+from app.services.tts_postprocess import get_tts_postprocessor
+from app.core.logging import logging_stats
+
+router = APIRouter()
+
+@router.get("/stats/connections")
+async def get_connection_stats():
+    """Per-connection outbound send statistics"""
+    return {"connections": connection_stats()}
+
+@router.get("/stats/hubs")
+async def get_hub_stats():
+    """Hub connections: channels and batching"""
+    return {"hubs": hub_stats()}
+
+@router.get("/stats/arbitration")
+async def get_arbitration_stats():
+    """Multi-satellite wake arbitration decisions and latency"""
+    return get_wake_arbiter().snapshot()
+
+@router.get("/stats/sessions")
+async def get_session_stats():
+    """Live session context size and rotations, sessions parked for a reconnect"""
+    return {"sessions": session_stats(), "park": get_session_park().snapshot()}
+
+@router.get("/stats/wakeword")
+async def get_wakeword_stats():
+    """Wake word gate skip rate and CPU saved"""
+    return gate_stats()
+
+@router.get("/stats/logging")
+async def get_logging_stats():
+    """Log queue drops and sampled per-frame events"""
+    return logging_stats()
+
+@router.get("/stats/load")
+async def get_load_stats():
+    """Load governor level, its inputs and recent transitions"""
+    return get_load_governor().snapshot()
+
+@router.get("/stats/intents")
+async def get_intent_stats():
+    """Local fast path hit rate and TTS cache"""
+    return {"index": get_intent_index().snapshot(), "tts_cache": get_tts_cache().snapshot()}
+
+@router.get("/stats/tts")
+async def get_tts_stats():
+    """TTS post-processing: time to audible saved per sentence, bytes saved"""
+    return get_tts_postprocessor().snapshot()
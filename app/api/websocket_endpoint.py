@@ -1,44 +1,190 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.gemini_client import GeminiClient
 from app.services.tts_service import TTSService
+from app.services.outbound_writer import OutboundWriter
+from app.services.wakeword import WakeWordDetector, engine_settings
+from app.services.speaker_id import SpeakerIdentifier, get_speaker_index
+from app.services.wake_arbiter import get_wake_arbiter
+from app.services.session_park import attached_live_session
+from app.services.burst_engine import BurstEngine, SPEECH_END, NO_SPEECH, frame_rms
+from app.services.local_standins import LocalGeminiClient, LocalTTSService
+from app.services.session_recorder import SessionRecorder
+from app.services.load_governor import get_load_governor, LEVEL_SHED_EXTRAS, LEVEL_HALF_RATE
+from app.services.intent_index import get_intent_index
+from app.services.tools_manager import get_tools_manager
+from app.services.tts_cache import get_tts_cache
+from app.services.tts_postprocess import get_tts_postprocessor
+from app.services.hub import HubConnection
+from app.core import protocol
+from app.core.config import get_settings
+from app.core.logging import HotLog, bind_connection
+from app.core.protocol import Codec, MsgType
 import asyncio
+import contextlib
+import json
 import logging
 import os
 import time
+import uuid
 import numpy as np
-from openwakeword.model import Model
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
+low_confidence_log = HotLog(logger, "low_confidence")
+asleep_log = HotLog(logger, "asleep_discard", sample_every=50)  # Every frame while asleep
+
+# Conversation engines: Gemini Live text + Cloud TTS, Live native audio, or burst (one request per utterance)
+ENGINE_LIVE = "live"
+ENGINE_NATIVE = "native"
+ENGINE_BURST = "burst"
+
+END_OF_TURN = object()  # Text queue marker: flush the trailing fragment and close the turn
+FAST_INTENT_FAILURE = "Désolée, je n'ai pas pu le faire."
 
 @router.websocket("/ws/audio")
 async def audio_websocket(websocket: WebSocket):
     await websocket.accept()
-    logger.info("Satellite connected")
+    # Overload: refuse before any per-connection work, with a hint for the reconnect loop
+    governor = get_load_governor()
+    governor.ensure_running()
+    if governor.refusing:
+        governor.refuse()
+        logger.warning("Overloaded: refusing connection (retry in %ss)", governor.retry_after)
+        await websocket.send_text(json.dumps({"type": "overloaded", "retry_after_s": governor.retry_after}))
+        await websocket.close(code=1013, reason=f"Overloaded, retry in {governor.retry_after}s")
+        return
+    connection_id = uuid.uuid4().hex[:8]
+    # Satellites identify themselves with ?satellite=<id> (selects their wake words)
+    satellite_id = websocket.query_params.get("satellite")
+    # A satellite reconnecting after a drop presents its session token (?session=<token>)
+    session_token = websocket.query_params.get("session")
+    log_context = bind_connection(connection_id, satellite_id)
+    logger.info("Satellite connected (%s, satellite: %s)", connection_id, satellite_id or "default")
     
-    gemini_client = GeminiClient()
-    tts_service = TTSService()
+    if settings.USE_LOCAL_STANDINS:
+        gemini_client, tts_service = LocalGeminiClient(), LocalTTSService()
+    else:
+        gemini_client, tts_service = GeminiClient(), TTSService()
+    engine = settings.SATELLITE_ENGINES.get(satellite_id, settings.CONVERSATION_ENGINE)
+    recorder = SessionRecorder(connection_id) if settings.RECORD_SESSIONS else None
     
     try:
-        async with gemini_client.start_session() as session:
-            logger.info("Gemini Session Active")
+        # Burst mode has no long-lived session (live is None)
+        if engine == ENGINE_BURST:
+            session_context = contextlib.nullcontext((None, None, False))
+        else:
+            session_context = attached_live_session(gemini_client, connection_id, session_token, satellite_id,
+                                                    native_audio=engine == ENGINE_NATIVE)
+        async with session_context as (live, session_token, resumed):
+            logger.info("Gemini Session %s (engine: %s)", "Resumed" if resumed else "Active", engine)
             
             # Create a queue for text chunks and an event for interruption
             text_queue = asyncio.Queue()
             interrupt_event = asyncio.Event()
+            connection_closed = asyncio.Event()
+
+            # All writes to the satellite go through the outbound writer
+            writer = OutboundWriter(websocket, connection_id)
+            writer.engine = engine
+            writer.recorder = recorder
 
             # Wake Word State
             is_awake = False
-            last_wake_time = 0
+
+            # Turn ID: bumped on every wake and interruption, audio of older turns is stale
+            turn_id = 0
+
+            def start_new_turn():
+                nonlocal turn_id, fast_utterance_ended
+                turn_id += 1
+                log_context.turn_id = turn_id
+                writer.discard_before(turn_id)
+                if intent_matcher:
+                    intent_matcher.reset()
+                fast_utterance_ended = fast_intent_fired
+
+            # Per turn latency (last speech frame -> first audio queued), comparable across engines
+            last_speech_at = None
+            latency_turn_id = 0
+
+            def send_turn_audio(data, audio_turn_id, codec=Codec.WAV):
+                nonlocal latency_turn_id
+                if audio_turn_id != latency_turn_id:
+                    latency_turn_id = audio_turn_id
+                    if last_speech_at is not None:
+                        latency = time.monotonic() - last_speech_at
+                        writer.record_first_audio(latency)
+                        logger.info("⏱️ Turn %s (%s): first audio %.0f ms after end of speech",
+                                    audio_turn_id, engine, 1000 * latency)
+                writer.send_audio(data, audio_turn_id, codec)
             
-            # Load model locally for the session
-            model_path = os.path.join(os.getcwd(), "models", "Motisma-v1.onnx")
-            wakeword_model = Model(wakeword_models=[model_path], inference_framework="onnx")
+            # Streaming detector for the session (wake word models are loaded once per process)
+            wakeword_detector = WakeWordDetector(satellite_id)
+
+            def record_meta():
+                """Everything a replay needs to rebuild this connection's engines"""
+                if recorder:
+                    recorder.meta(satellite=satellite_id, engine=engine, models=list(wakeword_detector.thresholds),
+                                  wake=engine_settings())
+
+            record_meta()
+
+            def record_state(event, **fields):
+                if recorder:
+                    recorder.state(event, turn_id=turn_id, **fields)
+
+            # Speaker ID runs on audio the wake word front-end already buffered, the speaker is kept for later turns
+            speaker_index = get_speaker_index()
+            speaker_identifier = SpeakerIdentifier(speaker_index) if speaker_index else None
+            current_speaker = None
+
+            # Several satellites may hear the same wake word: only the arbitration winner wakes up
+            wake_arbiter = get_wake_arbiter()
+            wake_arbiter.register(connection_id, satellite_id)
+            wake_arbitration = None   # Pending arbitration task
+            pending_wake_audio = []   # Audio held until the arbitration decision
+
+            # Inbound backlog feeds the load governor; at half rate, sleeping frames are scored in pairs
+            backlog = governor.register(connection_id)
+            held_audio = None
+
+            burst_engine = BurstEngine(gemini_client, connection_id) if engine == ENGINE_BURST else None
+            burst_task = None
+
+            # Local fast path: home commands matched on the Live input transcription, confirmations cached
+            intent_matcher = None
+            if settings.FAST_INTENTS_ENABLED and live is not None:
+                intent_matcher = get_intent_index().matcher()
+                tools_manager, tts_cache = get_tools_manager(), get_tts_cache()
+                tts_cache.prewarm(intent_matcher.index.static_confirmations(), tts_service)  # Once per process
+            user_transcript = []
+            transcript_at = 0.0
+            # The fast path answered the current utterance; once that utterance has ended
+            # (finished transcript or turn boundary), the next transcript is a new one for the model
+            fast_intent_fired = False
+            fast_utterance_ended = False
 
             async def tts_processing_loop():
                 """Consumes text from queue, buffers sentences, and streams audio"""
                 import re
+                nonlocal is_awake
                 buffer = ""
+                tts_postprocessor = get_tts_postprocessor()
+                first_sentence = True  # Only the first sentence of an answer is trimmed to the margin
+
+                async def speak(sentence):
+                    nonlocal first_sentence
+                    logger.debug("Synthesizing: %s", sentence)
+                    sentence_turn_id = turn_id
+                    audio_data = await tts_service.synthesize(sentence)
+                    # Final Check before sending
+                    if audio_data and not (interrupt_event.is_set() or not is_awake):
+                        pcm, codec = tts_postprocessor.process(audio_data, first_sentence)
+                        first_sentence = False
+                        send_turn_audio(pcm, sentence_turn_id, codec)
+                    else:
+                        logger.info("TTS Loop: Not sending audio due to interruption or sleep.")
                 
                 logger.info("Starting TTS processing loop")
                 while True:
@@ -46,16 +192,15 @@ async def audio_websocket(websocket: WebSocket):
                     if interrupt_event.is_set():
                         logger.info("TTS Loop: Clearing buffer due to interruption")
                         buffer = ""
+                        first_sentence = True
                         # Drain queue
                         # Drain queue immediately
                         while not text_queue.empty():
                             try: text_queue.get_nowait()
                             except asyncio.QueueEmpty: break
                         interrupt_event.clear()
-                        # Tell client to stop audio (optional, client already stops roughly)
-                        try: await websocket.send_text('{"type": "interrupt"}')
-                        except Exception as e:
-                            logger.error(f"Failed to send interrupt signal: {e}")
+                        # Tell client to stop audio (priority lane, never waits behind queued audio)
+                        writer.send_control({"type": "interrupt", "turn_id": turn_id})
 
                     try:
                         try:
@@ -66,12 +211,25 @@ async def audio_websocket(websocket: WebSocket):
                             
                         if text_chunk is None: # Sentinel for exit
                             break
+
+                        if text_chunk is END_OF_TURN:
+                            # Speak the trailing fragment (no final punctuation) and close the turn
+                            if buffer.strip() and is_awake and not interrupt_event.is_set():
+                                await speak(buffer)
+                            buffer = ""
+                            first_sentence = True
+                            writer.end_turn(turn_id)  # Behind the turn's queued audio
+                            if engine == ENGINE_BURST:
+                                # One command per wake, as in the burst script
+                                is_awake = False
+                                record_state("sleep", reason="end_of_turn")
+                            continue
                         
-                        logger.debug(f"TTS Loop: Received chunk: {text_chunk}")
+                        logger.debug("TTS Loop: Received chunk: %s", text_chunk)
 
                         # GATEKEEPER: If we went back to sleep, discard everything
                         if not is_awake: 
-                            logger.info(f"TTS Loop: Discarding chunk '{text_chunk}' because system is asleep.")
+                            logger.debug("TTS Loop: Discarding chunk '%s' because system is asleep.", text_chunk)
                             continue 
 
                         buffer += text_chunk
@@ -91,129 +249,456 @@ async def audio_websocket(websocket: WebSocket):
                                 
                                 sentence = sentences[i] + sentences[i+1]
                                 if sentence.strip():
-                                    logger.info(f"Synthesizing: {sentence}")
-                                    audio_data = await tts_service.synthesize(sentence)
-                                    # Final Check before sending
-                                    if audio_data and not (interrupt_event.is_set() or not is_awake):
-                                        await websocket.send_bytes(audio_data)
-                                    else:
-                                        logger.info("TTS Loop: Not sending audio due to interruption or sleep.")
+                                    await speak(sentence)
                             
                             buffer = sentences[-1] if not (interrupt_event.is_set() or not is_awake) else ""
                     except Exception as e:
-                        logger.error(f"Error in TTS loop: {e}")
+                        logger.error("Error in TTS loop: %s", e)
                         await asyncio.sleep(0.1)
 
+            def cancel_burst():
+                if burst_engine:
+                    burst_engine.stop()
+                    if burst_task and not burst_task.done():
+                        burst_task.cancel()
+
+            async def handle_client_interrupt():
+                logger.info("Received CLIENT INTERRUPTION signal")
+                record_state("client_interrupt")
+                interrupt_event.set()
+                start_new_turn()
+                cancel_burst()
+                # Stop forwarding the generation (the rest of the turn is dropped by turn ID)
+                if live is not None:
+                    await live.interrupt()
+
+            async def on_input_transcription(transcription):
+                """Streaming transcript of the user: kept for session summaries, matched against the intent index"""
+                nonlocal transcript_at, fast_intent_fired, fast_utterance_ended
+                user_transcript.append(transcription.text)
+                if intent_matcher is None or not is_awake:
+                    return
+                if fast_utterance_ended:
+                    # First words after the utterance the fast path answered: the model answers these
+                    live.user_spoke()
+                    intent_matcher.reset()
+                    fast_intent_fired = fast_utterance_ended = False
+                transcript_at = time.monotonic()
+                match = intent_matcher.feed(transcription.text, bool(transcription.finished))
+                if match:
+                    await on_intent(match)
+                elif intent_matcher.pending:
+                    asyncio.ensure_future(settle_intent())
+                if transcription.finished and fast_intent_fired:
+                    fast_utterance_ended = True
+
+            async def settle_intent():
+                """A complete phrase followed by no new words (transcript not marked finished)"""
+                await asyncio.sleep(settings.FAST_INTENT_SETTLE_S)
+                if time.monotonic() - transcript_at >= settings.FAST_INTENT_SETTLE_S and is_awake:
+                    match = intent_matcher.settle()
+                    if match:
+                        await on_intent(match)
+
+            async def on_intent(match):
+                nonlocal fast_intent_fired, fast_utterance_ended
+                logger.info('⚡ Fast path: %s %s ("%s")', match.tool, match.args, match.phrase)
+                record_state("fast_intent", tool=match.tool, args=match.args)
+                # The model's answer to this utterance is dropped (already started or not)
+                if live.responding:
+                    start_new_turn()
+                await live.cancel_turn()
+                fast_intent_fired, fast_utterance_ended = True, False
+                asyncio.ensure_future(run_fast_intent(match, turn_id))
+
+            def record_user_turn():
+                """The user's turn ends where the model's answer starts (or at turn_complete without one)"""
+                if user_transcript:
+                    live.record_user_text("".join(user_transcript).strip())
+                    user_transcript.clear()
+
+            def end_user_utterance():
+                nonlocal fast_utterance_ended
+                record_user_turn()
+                if intent_matcher:
+                    intent_matcher.reset()
+                fast_utterance_ended = fast_intent_fired
+
+            async def run_fast_intent(match, fast_turn_id):
+                try:
+                    result = await tools_manager.execute_tool(match.tool, match.args)
+                    text = match.confirmation(result)
+                except Exception:
+                    text = FAST_INTENT_FAILURE
+                cached = await tts_cache.synthesize(text, tts_service)
+                if cached and is_awake and turn_id == fast_turn_id:
+                    audio_data, codec = cached
+                    send_turn_audio(audio_data, fast_turn_id, codec)
+                    writer.end_turn(fast_turn_id)
+
+            async def process_audio(data):
+                """Runs wake word detection on a PCM chunk and forwards it to Gemini if awake"""
+                nonlocal is_awake, wake_arbitration, held_audio
+                audio_np = np.frombuffer(data, dtype=np.int16)
+                wakeword_detector.replay_preroll = governor.level < LEVEL_SHED_EXTRAS
+                if governor.level >= LEVEL_HALF_RATE and not is_awake and wake_arbitration is None:
+                    # Every other frame: hold this one, score both with one model run next time
+                    if held_audio is None:
+                        held_audio = audio_np
+                        return
+                    scores = wakeword_detector.predict(np.concatenate((held_audio, audio_np)), latest_only=True)
+                    held_audio = None
+                elif held_audio is not None:
+                    scores = wakeword_detector.predict(np.concatenate((held_audio, audio_np)))
+                    held_audio = None
+                else:
+                    scores = wakeword_detector.predict(audio_np)
+                if recorder:
+                    recorder.scores(scores)
+
+                # Per wake word threshold and debounce (several wake words firing together count once)
+                detections = wakeword_detector.detections(scores)
+                if detections:
+                    mdl_name, score = max(detections, key=lambda detection: detection[1])
+                    if not is_awake:
+                        if wake_arbitration is None:
+                            logger.info("✨ WAKE WORD DETECTED: %s (Score: %.3f)", mdl_name, score)
+                            record_state("wake_detected", model=mdl_name, score=round(score, 4))
+                            pending_wake_audio.clear()
+                            wake_arbitration = asyncio.create_task(arbitrate_wake(score))
+                    else:
+                        # WAKE WORD INTERRUPTION -> SLEEP
+                        logger.info("🔄 WAKE WORD INTERRUPTION -> SLEEPING (Score: %.3f)", score)
+                        record_state("wake_interrupt", model=mdl_name, score=round(score, 4))
+                        interrupt_event.set()
+                        start_new_turn()
+                        cancel_burst()
+                        # Go back to sleep immediately
+                        is_awake = False
+                        if live is not None:
+                            await live.interrupt()
+
+                # Shed under load (along with the gate pre-roll replay)
+                if governor.level < LEVEL_SHED_EXTRAS:
+                    for mdl_name, score in scores.items():
+                        if 0.1 < score < wakeword_detector.thresholds[mdl_name]:
+                            # Low confidence logging as requested in test script style (sampled, rate-limited)
+                            low_confidence_log.info("🔍 Low Confidence: %s (Score: %.3f)", mdl_name, score)
+                
+                # GATEKEEPER: Only send to Gemini if Awake
+                if is_awake:
+                    await forward_audio(data, audio_np)
+                    # Off the critical path: the audio is already on its way to Gemini
+                    if speaker_identifier and speaker_identifier.update(len(audio_np)):
+                        asyncio.ensure_future(identify_speaker())
+                elif wake_arbitration is not None:
+                    pending_wake_audio.append(bytes(data))
+                else:
+                    asleep_log.debug("Discarding audio input, system is asleep.")
+
+            async def forward_audio(data, audio_np):
+                """Hands awake audio to the conversation engine"""
+                nonlocal is_awake, burst_task, last_speech_at
+                rms = frame_rms(audio_np)
+                if rms > settings.VAD_RMS_THRESHOLD:
+                    last_speech_at = time.monotonic()
+                if live is not None:
+                    await live.send_audio(bytes(data))
+                    # Speech keeps the session busy (no context rotation mid-utterance)
+                    if rms > settings.VAD_RMS_THRESHOLD:
+                        live.touch()
+                    return
+                event = burst_engine.feed(data, audio_np, rms)
+                if event == SPEECH_END:
+                    logger.info("🤫 End of speech -> burst request")
+                    record_state("speech_end")
+                    burst_task = asyncio.create_task(run_burst(turn_id))
+                elif event == NO_SPEECH:
+                    logger.info("😴 No command after the wake word -> sleeping")
+                    record_state("sleep", reason="no_speech")
+                    writer.end_turn(turn_id)
+                    is_awake = False
+
+            async def run_burst(burst_turn_id):
+                """Streams the burst answer into the TTS pipeline, so the first sentence is spoken early"""
+                try:
+                    async for text in burst_engine.respond():
+                        if turn_id != burst_turn_id:
+                            return
+                        await text_queue.put(text)
+                except asyncio.CancelledError:
+                    logger.info("Burst request cancelled")
+                    raise
+                except Exception as e:
+                    logger.error("Error in burst request: %s", e)
+                if turn_id == burst_turn_id:
+                    await text_queue.put(END_OF_TURN)
+
+            async def arbitrate_wake(score):
+                """Waits for the arbitration decision, then wakes up (flushing the held audio) or goes back to sleep"""
+                nonlocal is_awake, wake_arbitration
+                try:
+                    if not await wake_arbiter.submit(connection_id, satellite_id, score):
+                        logger.info("😴 Wake word won by another satellite -> staying asleep")
+                        record_state("arbitration_lost")
+                        pending_wake_audio.clear()
+                        return
+                    # Chunks arriving while we flush are appended and flushed too
+                    if burst_engine:
+                        burst_engine.start()
+                    held_samples = 0
+                    while pending_wake_audio:
+                        chunk = pending_wake_audio.pop(0)
+                        held_samples += len(chunk) // 2
+                        await forward_audio(chunk, np.frombuffer(chunk, dtype=np.int16))
+                    is_awake = True
+                    record_state("awake")
+                    if live is not None:
+                        live.touch()
+                    start_new_turn()
+                    if speaker_identifier:
+                        # The held audio (and the wake word before it) is part of the utterance to identify
+                        speaker_identifier.start(held_samples)
+                    writer.send_control({"type": "turn_start", "turn_id": turn_id})
+                except Exception as e:
+                    logger.error("Error in wake arbitration: %s", e)
+                finally:
+                    wake_arbitration = None
+
+            async def identify_speaker():
+                """Embedding and lookup off the event loop, the audio keeps flowing to Gemini meanwhile"""
+                try:
+                    await on_speaker_identified(*await speaker_identifier.identify(wakeword_detector))
+                except Exception as e:
+                    logger.error("Error in speaker identification: %s", e)
+
+            async def on_speaker_identified(speaker, score):
+                """Tags the connection with the speaker so later turns are personalized without a second pass"""
+                nonlocal current_speaker
+                if speaker is None:
+                    logger.info("👤 Speaker not recognized (best score: %.3f)", score)
+                    return
+                logger.info("👤 Speaker identified: %s (Score: %.3f, turn %s)", speaker, score, turn_id)
+                record_state("speaker", speaker=speaker, score=round(score, 4))
+                if speaker != current_speaker:
+                    current_speaker = speaker
+                    writer.speaker = speaker
+                    if not settings.SPEAKER_ID_ANNOUNCE:
+                        return
+                    if live is not None:
+                        live.set_speaker(speaker)  # Announced after this turn, off the audio path
+                    else:
+                        burst_engine.system_note = f"\nLe locuteur est {speaker}."
+
             async def receive_from_client():
                 """Receives audio from WebSocket and sends to Gemini"""
-                nonlocal is_awake, last_wake_time
+                nonlocal satellite_id
                 try:
                     logger.info("Starting receive_from_client loop")
                     while True:
                         try:
                             message = await websocket.receive()
+                            if recorder:
+                                recorder.inbound(message)
                             if "text" in message:
-                                # Start of a control message
-                                import json
+                                # Start of a control message (legacy JSON, or the protocol hello)
                                 try:
                                     data = json.loads(message["text"])
-                                    if data.get("type") == "interrupt":
-                                        logger.info("Received CLIENT INTERRUPTION signal")
-                                        interrupt_event.set()
-                                        # Also notify Gemini that we are interrupting? 
-                                        # Not strictly necessary if we stop playing, but good practice.
-                                        # await session.send(input="[INTERRUPTION]", end_of_turn=True) 
+                                    kind = data.get("type")
+                                    if kind == "hello":
+                                        if data.get("satellite") and data["satellite"] != satellite_id:
+                                            satellite_id = data["satellite"]
+                                            log_context.satellite_id = satellite_id
+                                            wakeword_detector.select(satellite_id)
+                                            record_meta()
+                                            wake_arbiter.unregister(connection_id)
+                                            wake_arbiter.register(connection_id, satellite_id)
+                                        writer.protocol_version = protocol.negotiate(data)
+                                        writer.send_control({"type": "hello", "protocol": writer.protocol_version,
+                                                             "session": session_token, "resumed": resumed})
+                                        if live is not None:
+                                            live.token_sent = True
+                                        logger.info("Satellite protocol negotiated: v%s", writer.protocol_version)
+                                    elif kind == "interrupt":
+                                        await handle_client_interrupt()
                                 except Exception as e:
-                                    logger.error(f"Error parsing control message: {e}")
+                                    logger.error("Error parsing control message: %s", e)
 
                             elif "bytes" in message:
-                                # Audio Data
                                 data = message["bytes"]
-                                audio_np = np.frombuffer(data, dtype=np.int16)
-                                prediction = wakeword_model.predict(audio_np)
-                                
-                                for mdl_name, score in prediction.items():
-                                    if score >= 0.5:
-                                        now = time.time()
-                                        if now - last_wake_time > 1.0: # 1.0s Debounce logic
-                                            last_wake_time = now
-                                            
-                                            if not is_awake:
-                                                logger.info(f"✨ WAKE WORD DETECTED: {mdl_name} (Score: {score:.3f})")
-                                                is_awake = True
-                                            else:
-                                                # WAKE WORD INTERRUPTION -> SLEEP
-                                                logger.info(f"🔄 WAKE WORD INTERRUPTION -> SLEEPING (Score: {score:.3f})")
-                                                interrupt_event.set()
-                                                # Go back to sleep immediately
-                                                is_awake = False
-                                    elif score > 0.1:
-                                        # Low confidence logging as requested in test script style
-                                        logger.info(f"🔍 Low Confidence: {mdl_name} (Score: {score:.3f})")
-                                
-                                # GATEKEEPER: Only send to Gemini if Awake
-                                if is_awake:
-                                    await session.send(input={"data": data, "mime_type": "audio/pcm"}, end_of_turn=False)
-                                else:
-                                    logger.debug("Discarding audio input, system is asleep.")
+                                timestamp_ms = None
+                                if writer.protocol_version >= protocol.PROTOCOL_VERSION:
+                                    try:
+                                        frame = protocol.decode_frame(data)
+                                    except protocol.ProtocolError as e:
+                                        logger.warning("Dropping malformed frame: %s", e)
+                                        continue
+                                    lost = writer.inbound.track(frame.seq)
+                                    if lost:
+                                        logger.warning("Inbound frame loss: %s frame(s) before seq %s",
+                                                       lost, frame.seq)
+                                    if frame.type == MsgType.INTERRUPT:
+                                        await handle_client_interrupt()
+                                        continue
+                                    if frame.type == MsgType.PING:
+                                        writer.send_control({"type": "pong", "timestamp_ms": frame.timestamp_ms})
+                                        continue
+                                    if frame.type != MsgType.AUDIO:
+                                        continue
+                                    data = frame.payload
+                                    timestamp_ms = frame.timestamp_ms
+                                backlog.update(len(data) // 2, timestamp_ms)
+                                await process_audio(data)
+                                backlog.handled()
 
                         except RuntimeError as e:
                              # Starlette/FastAPI specific disconnect error sometimes
-                             logger.warning(f"RuntimeError in receive: {e}")
+                             logger.warning("RuntimeError in receive: %s", e)
                              break
                              
                 except WebSocketDisconnect:
                     logger.info("Client disconnected (WebSocket)")
                 except Exception as e:
-                    logger.error(f"Error in receive_from_client: {e}")
+                    logger.error("Error in receive_from_client: %s", e)
                 finally:
                     logger.info("Exiting receive_from_client loop")
+                    wake_arbiter.unregister(connection_id)
+                    governor.unregister(connection_id)
+                    cancel_burst()
+                    writer.close()
+                    connection_closed.set()
 
             async def send_to_client():
                 """Receives TEXT -> Pushes to Queue"""
                 nonlocal is_awake
                 try:
                     logger.info("Starting send_to_client loop (Gemini -> Queue)")
+                    if live is None:
+                        # Burst answers are pushed by run_burst
+                        await connection_closed.wait()
+                        return
                     while True:
+                        # Re-read on every turn: the session may have been rotated
+                        session, generation = live.session, live.generation
                         try:
                             async for response in session.receive():
                                 server_content = response.server_content
+                                live.record_usage(response.usage_metadata)
                                 
                                 if server_content:
+                                    if server_content.input_transcription and server_content.input_transcription.text:
+                                        await on_input_transcription(server_content.input_transcription)
+                                        if not (server_content.model_turn or server_content.turn_complete
+                                                or server_content.interrupted):
+                                            continue # Transcription only: no pacing
+
                                     if server_content.interrupted:
+                                        if live.end_generation():
+                                            continue # Acknowledges our own barge-in
                                         logger.info("🛑 Gemini Interrupted -> Silence")
+                                        record_state("gemini_interrupted")
                                         interrupt_event.set()
+                                        start_new_turn()
                                         is_awake = False # STRICT SILENCE: Sleep immediately
                                         continue
                                     
-                                    if server_content.model_turn and is_awake:
+                                    if server_content.model_turn and not live.responding:
+                                        record_user_turn()
+                                    if server_content.model_turn and not live.begin_output(turn_id):
+                                        # Rest of a cancelled turn, until Gemini stops it on the user's new audio
+                                        live.discard(server_content.model_turn.parts)
+                                        await live.interrupt()
+                                    elif server_content.model_turn and is_awake:
                                         for part in server_content.model_turn.parts:
-                                            if part.text: 
-                                                logger.debug(f"Gemini -> Queue: {part.text}")
+                                            if engine == ENGINE_NATIVE:
+                                                # Native audio goes straight to the writer (no copy, no Cloud TTS).
+                                                # Tagged with the turn the generation started in: after a barge-in,
+                                                # the writer drops the rest of it as stale.
+                                                if part.inline_data and part.inline_data.data:
+                                                    live.record_model_audio(len(part.inline_data.data))
+                                                    send_turn_audio(part.inline_data.data, live.output_turn_id, Codec.PCM16_24K)
+                                            elif part.text: 
+                                                logger.debug("Gemini -> Queue: %s", part.text)
+                                                live.record_model_text(part.text)
                                                 await text_queue.put(part.text)
-                                await asyncio.sleep(0.1)
+
+                                    if server_content.turn_complete:
+                                        end_user_utterance()
+                                        cancelled = live.responding and live.output_turn_id != turn_id
+                                        if not live.end_generation() and not cancelled:
+                                            live.end_model_turn()
+                                            await text_queue.put(END_OF_TURN)
+                                        await live.announce_speaker()
+                                if engine != ENGINE_NATIVE:
+                                    # Native audio parts are small and must not be paced down
+                                    await asyncio.sleep(0.1)
 
                         except Exception as inner_e:
-                            logger.error(f"Error inside receive loop: {inner_e}")
+                            if live.generation != generation:
+                                continue # Old session closed by a rotation
+                            logger.error("Error inside receive loop: %s", inner_e)
+                            live.healthy = False
                             break
+                except asyncio.CancelledError:
+                    logger.info("Satellite disconnected, leaving the Live session")
                 except Exception as e:
-                    logger.error(f"Error in send_to_client: {e}")
+                    logger.error("Error in send_to_client: %s", e)
                 finally:
                     logger.info("Exiting send_to_client loop")
                     await text_queue.put(None) # Signal exit
 
+            async def context_budget_loop():
+                """Rotates the Live session once it is over budget, only while the satellite is idle"""
+                if live is None:
+                    return
+                while not connection_closed.is_set():
+                    try:
+                        await asyncio.wait_for(connection_closed.wait(), timeout=1.0)
+                        break
+                    except asyncio.TimeoutError:
+                        pass
+                    idle = (live.idle_for() >= settings.SESSION_IDLE_S
+                            and wake_arbitration is None and text_queue.empty())
+                    if live.over_budget() and idle:
+                        await live.rotate()
+
             # Run tasks
-            # We need 3 tasks now: Mic Input, Gemini Output, TTS Processing
+            # We need 5 tasks now: Mic Input, Gemini Output, TTS Processing, Outbound Writer, Context Budget
+            gemini_task = asyncio.create_task(send_to_client())
+
+            async def receive_until_disconnect():
+                await receive_from_client()
+                # The Live receive loop does not end with the websocket: stop it so the session can be parked
+                gemini_task.cancel()
+
             await asyncio.gather(
-                receive_from_client(), 
-                send_to_client(),
-                tts_processing_loop()
+                receive_until_disconnect(),
+                gemini_task,
+                tts_processing_loop(),
+                writer.run(),
+                context_budget_loop()
             )
 
     except Exception as e:
-        logger.error(f"Session error: {e}")
+        logger.error("Session error: %s", e)
         # Close connection if not already closed
         try:
             await websocket.close()
         except:
             pass
+    finally:
+        if recorder:
+            recorder.close()
+
+
+@router.websocket("/ws/hub")
+async def hub_websocket(websocket: WebSocket):
+    """
+    Many satellites over one connection (framing in app/core/protocol.py).
+    Every channel runs the /ws/audio logic through a websocket look-alike,
+    with one shared reader and writer for the hub socket.
+    """
+    await websocket.accept()
+    hub = HubConnection(websocket, uuid.uuid4().hex[:8], audio_websocket)
+    logger.info("Hub connected (%s)", hub.connection_id)
+    await hub.run()
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List
 
 class Settings(BaseSettings):
     PROJECT_ID: str = "project-id-placeholder"
@@ -13,10 +14,102 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json" # "json" (one object per line) or "text"
+    LOG_QUEUE_SIZE: int = 10000 # Records beyond this are dropped (counted in /stats/logging)
+    LOG_HOT_EVENTS_PER_S: float = 5.0 # Rate cap of per-frame events (e.g. low confidence scores)
+    LOG_HOT_SAMPLE_EVERY: int = 4 # One per-frame event in N is considered (80 ms frames: ~3/s per connection)
     
     # Audio Settings
     SAMPLE_RATE: int = 16000
     CHANNELS: int = 1
+    VAD_RMS_THRESHOLD: int = 1000
+
+    # Wake Word (model name = file stem, e.g. "Motisma-v1")
+    WAKEWORD_MODELS: List[str] = ["models/Motisma-v1.onnx"]
+    WAKEWORD_THRESHOLD: float = 0.5
+    WAKEWORD_THRESHOLDS: Dict[str, float] = {} # Per model name overrides
+    WAKEWORD_DEBOUNCE_S: float = 1.0
+    SATELLITE_WAKEWORDS: Dict[str, List[str]] = {} # Satellite id -> enabled model names (default: all)
+    WAKEWORD_INT8: bool = False # Use the <model>.int8.onnx variants (scripts/quantize_wakeword.py) when present
+    WAKE_GATE_ENABLED: bool = False # Energy/spectral flux gate in front of the wake word models (off until
+                                    # scripts/eval_wake_gate.py shows no lost detection on real recordings)
+    WAKE_GATE_MARGIN_DB: float = 9.0 # Frame energy above the adaptive noise floor that opens the gate
+    WAKE_GATE_FLUX_DB: float = 6.0 # Mean band energy increase (onset) that opens the gate
+    WAKE_GATE_HANGOVER_S: float = 1.5 # Gate stays open this long after the last active frame
+    WAKE_GATE_PREROLL_S: float = 2.2 # Audio replayed into the front-end when the gate opens (embedding context + window)
+
+    # ONNX Runtime (wake word heads and the shared feature models)
+    ORT_INTRA_OP_THREADS: int = 1 # Many detectors share the process: one thread each avoids oversubscription
+    ORT_INTER_OP_THREADS: int = 1
+    ORT_GRAPH_OPTIMIZATION: str = "all" # "disable", "basic", "extended" or "all"
+    ORT_CPU_MEM_ARENA: bool = True
+    ORT_EXECUTION_MODE: str = "sequential" # "sequential" or "parallel"
+
+    # Speaker Identification (disabled while no speaker is enrolled)
+    SPEAKER_INDEX_PATH: str = "models/speakers.npz"
+    SPEAKER_EMBEDDING_MODEL: str = "" # Speaker verification ONNX model (fbank in); empty: wake word features
+    SPEAKER_ID_PREROLL_S: float = 1.0 # Audio before the wake detection included in the embedding (the wake word)
+    SPEAKER_ID_WINDOW_S: float = 1.0 # Audio after the detection used for the embedding (arbitration hold included)
+    SPEAKER_ID_THRESHOLD: float = 0.75 # Minimum cosine score to accept a match (tune with scripts/eval_speaker_id.py)
+    SPEAKER_ID_ANNOUNCE: bool = True # Tell Gemini who is speaking (personalization)
+
+    # Multi-satellite wake arbitration
+    WAKE_ARBITRATION_WINDOW_MS: int = 200
+    SATELLITE_ROOMS: Dict[str, str] = {} # Satellite id -> room group (default: one group for the home)
+
+    # Live session context budget
+    SESSION_CONTEXT_BUDGET_TOKENS: int = 24000 # Approximate, rotation to a fresh session past it
+    SESSION_IDLE_S: float = 5.0 # Rotation only happens after this much idle time
+    SESSION_SUMMARY_TURNS: int = 6
+    SESSION_SUMMARY_MAX_CHARS: int = 1500
+    SESSION_PARK_GRACE_S: float = 30.0 # Live session kept open after a disconnect, for a reconnect with its token
+    SESSION_PARK_MAX: int = 8 # Parked sessions (the oldest is closed first)
+    SESSION_PARK_MAX_TOTAL_S: float = 120.0 # Total time a session may spend parked across reconnects
+
+    # Local fast path: simple home commands matched on the Live input transcription (no model round trip)
+    FAST_INTENTS_ENABLED: bool = False # Opt-in while the fast path is validated against real transcripts
+    FAST_INTENT_SETTLE_S: float = 0.3 # Quiet transcript after a complete phrase, when it is not marked finished
+    HOME_ROOMS: List[str] = ["salon", "cuisine", "chambre", "bureau", "entrée", "salle de bain"]
+    TTS_CACHE_ENTRIES: int = 64 # Synthesized confirmations kept in memory (post-processed)
+
+    # TTS post-processing (WAV header stripped, silence trimmed, optional loudness normalization)
+    TTS_TRIM_THRESHOLD_DBFS: float = -45.0 # 10 ms frames peaking below this are silence
+    TTS_TRIM_MARGIN_MS: int = 30 # Silence kept before the first and after the last voiced frame
+    TTS_SENTENCE_GAP_MS: int = 250 # Leading silence kept on the later sentences of an answer (natural pauses)
+    TTS_NORMALIZE: bool = False # Same RMS level for every sentence
+    TTS_TARGET_DBFS: float = -20.0 # RMS of the voiced frames after normalization
+    TTS_MAX_GAIN_DB: float = 12.0 # Never amplify more than this (quiet sentences, breaths)
+
+    # Conversation engine: "live" (Gemini Live + Cloud TTS), "native" (Live native audio, no Cloud TTS)
+    # or "burst" (one HTTP request per command)
+    CONVERSATION_ENGINE: str = "live"
+    SATELLITE_ENGINES: Dict[str, str] = {} # Satellite id -> engine override
+    NATIVE_AUDIO_MODEL_ID: str = "gemini-2.5-flash-native-audio-preview-09-2025"
+    NATIVE_AUDIO_VOICE: str = "Kore" # Prebuilt Live voice (Puck, Charon, Kore, Fenrir, Aoede)
+    BURST_MODEL_ID: str = "gemini-2.5-flash"
+    BURST_SILENCE_S: float = 1.3 # Silence that ends a command
+    BURST_NO_SPEECH_TIMEOUT_S: float = 3.0
+    BURST_MAX_UTTERANCE_S: float = 30.0
+    USE_LOCAL_STANDINS: bool = False # Local Gemini/TTS stand-ins (offline benchmarks and replay)
+
+    # Session recording (inbound audio, wake scores, decisions; replay with scripts/replay_session.py)
+    RECORD_SESSIONS: bool = False
+    RECORDINGS_DIR: str = "recordings"
+    RECORDING_SEGMENT_BYTES: int = 16 * 1024 * 1024 # ~8 min of 16kHz PCM16 per segment file
+
+    # Load governor (thresholds of levels 1-3: shed extras, half-rate wake scoring, refuse connections)
+    GOVERNOR_LAG_MS: List[float] = [50.0, 150.0, 400.0] # Event loop lag (smoothed)
+    GOVERNOR_BACKLOG_MS: List[float] = [300.0, 800.0, 2000.0] # Worst connection behind real time
+    GOVERNOR_RECOVERY_S: float = 5.0 # Calm time before stepping down one level
+    GOVERNOR_RETRY_AFTER_S: int = 15 # Retry hint sent to refused connections
+
+    # Hub connections (/ws/hub: many satellites over one websocket)
+    HUB_MAX_CHANNELS: int = 32
+    HUB_MAX_PENDING_BYTES: int = 262144 # Outbound batch size at which channel writers wait for the hub writer
+
+    # Outbound Writer (per connection)
+    OUTBOUND_AUDIO_MAX_BYTES: int = 480000 # ~10s of 24kHz PCM16
+    OUTBOUND_OVERFLOW_POLICY: str = "drop_turn" # "drop_turn" or "disconnect"
     
     class Config:
         env_file = ".env"
@@ -1,15 +1,187 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+import time
+from typing import Dict, Optional
 from app.core.config import get_settings
 
 settings = get_settings()
 
+
+class LogContext:
+    """
+    Connection fields attached to every record logged on behalf of a satellite.
+    Mutable on purpose: the endpoint tasks share one instance, so bumping the
+    turn ID in one task is seen by the others.
+    """
+    def __init__(self, connection_id: Optional[str] = None, satellite_id: Optional[str] = None):
+        self.connection_id = connection_id
+        self.satellite_id = satellite_id
+        self.turn_id = None
+
+
+_log_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default=None)
+
+
+def bind_connection(connection_id: str, satellite_id: Optional[str] = None) -> LogContext:
+    """Tags the records of the current task (and the tasks it spawns) with the connection"""
+    context = LogContext(connection_id, satellite_id)
+    _log_context.set(context)
+    return context
+
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record):
+        context = _log_context.get()
+        record.connection_id = context.connection_id if context else None
+        record.satellite_id = context.satellite_id if context else None
+        record.turn_id = context.turn_id if context else None
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without blocking the event loop.
+    The message is not formatted here (the listener does it), and records are
+    dropped and counted when the queue is full.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("connection_id", "satellite_id", "turn_id", "suppressed"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        message = super().format(record)
+        if getattr(record, "connection_id", None):
+            turn = f"/{record.turn_id}" if record.turn_id is not None else ""
+            message = f"[{record.connection_id}{turn}] {message}"
+        if getattr(record, "suppressed", None):
+            message += f" (+{record.suppressed} suppressed)"
+        return message
+
+
+class HotLog:
+    """
+    Sampled and rate-limited logging for per-frame events.
+    One event in `sample_every` is considered, then a token bucket caps the
+    rate across every connection. Suppressed events are counted, and the count
+    is attached to the next record that goes through.
+    """
+    def __init__(self, logger: logging.Logger, name: str, rate_per_s: Optional[float] = None,
+                 sample_every: Optional[int] = None):
+        self.logger = logger
+        self.name = name
+        self.rate = rate_per_s if rate_per_s is not None else settings.LOG_HOT_EVENTS_PER_S
+        self.sample_every = max(1, sample_every if sample_every is not None else settings.LOG_HOT_SAMPLE_EVERY)
+        self._tokens = self.rate
+        self._refilled_at = time.monotonic()
+        self._seen = 0
+        self._pending_suppressed = 0
+        self.emitted = 0
+        self.suppressed = 0
+        _hot_logs[name] = self
+
+    def log(self, level: int, msg: str, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        self._seen += 1
+        if self._seen % self.sample_every:
+            self._suppress()
+            return
+        now = time.monotonic()
+        self._tokens = min(self.rate, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            self._suppress()
+            return
+        self._tokens -= 1
+        self.emitted += 1
+        extra = {"suppressed": self._pending_suppressed} if self._pending_suppressed else None
+        self._pending_suppressed = 0
+        self.logger.log(level, msg, *args, extra=extra)
+
+    def info(self, msg: str, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def debug(self, msg: str, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def _suppress(self):
+        self.suppressed += 1
+        self._pending_suppressed += 1
+
+
+_hot_logs: Dict[str, HotLog] = {}
+_queue_handler: Optional[_QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def logging_stats():
+    """Queue drops and per-event sampling counters"""
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "queue_dropped": _queue_handler.dropped if _queue_handler else 0,
+        "hot_events": {name: {"emitted": hot.emitted, "suppressed": hot.suppressed}
+                       for name, hot in _hot_logs.items()},
+    }
+
+
 def setup_logging():
-    logging.basicConfig(
-        level=settings.LOG_LEVEL,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+    """
+    Root logging goes through a bounded queue: the event loop only enqueues,
+    a listener thread formats and writes to stdout.
+    """
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        if settings.LOG_FORMAT == "json":
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(_TextFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+        _queue_handler = _QueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        _queue_handler.addFilter(_ContextFilter())
+        root = logging.getLogger()
+        root.handlers[:] = [_queue_handler]
+        root.setLevel(settings.LOG_LEVEL)
+        logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -0,0 +1,172 @@
+"""
+Binary framing protocol for /ws/audio (version 2).
+
+Every binary websocket message starts with a 12-byte little-endian header:
+
+    version:u8  type:u8  codec:u8  flags:u8  turn_id:u16  seq:u16  timestamp_ms:u32
+
+followed by the payload (audio bytes, or UTF-8 JSON for CONTROL frames).
+Version 1 is the legacy protocol (raw PCM bytes + JSON text frames); a client
+opts into version 2 by sending `{"type": "hello", "protocol": 2}` as its first
+text message, and the server answers with the negotiated version.
+
+Hub connections (/ws/hub) carry many satellites over one websocket. A binary
+hub message is a batch of records, each one a v2 frame prefixed with
+
+    channel:u16  length:u32
+
+and text messages are the JSON control messages of a channel, tagged with a
+"channel" field (plus "open" / "close" to manage the channels themselves).
+"""
+import json
+import struct
+import time
+from enum import IntEnum
+from typing import NamedTuple
+
+PROTOCOL_LEGACY = 1
+PROTOCOL_VERSION = 2
+
+HEADER = struct.Struct("<BBBBHHI")
+HEADER_SIZE = HEADER.size
+HUB_RECORD = struct.Struct("<HI")
+
+
+class MsgType(IntEnum):
+    AUDIO = 1       # Audio payload (direction given by the endpoint)
+    INTERRUPT = 2   # Stop playback, turn_id is the new current turn
+    TURN_START = 3
+    TURN_END = 4
+    PING = 5        # timestamp_ms is echoed back in the PONG
+    PONG = 6
+    CONTROL = 7     # JSON payload, for rare messages without a dedicated type
+
+
+class Codec(IntEnum):
+    NONE = 0
+    PCM16_16K = 1
+    PCM16_24K = 2
+    WAV = 3
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+class Frame(NamedTuple):
+    type: int
+    codec: int
+    flags: int
+    turn_id: int
+    seq: int
+    timestamp_ms: int
+    payload: memoryview
+
+
+def now_ms() -> int:
+    """Wall-clock milliseconds, wrapped to 32 bits"""
+    return int(time.time() * 1000) & 0xFFFFFFFF
+
+
+def elapsed_ms(since_ms: int) -> int:
+    """Milliseconds elapsed since a (wrapped) timestamp"""
+    return (now_ms() - since_ms) & 0xFFFFFFFF
+
+
+def turn_is_stale(turn_id: int, current_turn_id: int) -> bool:
+    """True if `turn_id` is older than `current_turn_id` (16-bit wrap-around aware)"""
+    return ((turn_id - current_turn_id) & 0xFFFF) >= 0x8000
+
+
+def encode_frame(msg_type: int, payload: bytes = b"", turn_id: int = 0, seq: int = 0,
+                 codec: int = Codec.NONE, timestamp_ms: int = None, flags: int = 0) -> bytes:
+    """Builds a version 2 frame"""
+    if timestamp_ms is None:
+        timestamp_ms = now_ms()
+    header = HEADER.pack(PROTOCOL_VERSION, msg_type, codec, flags,
+                         turn_id & 0xFFFF, seq & 0xFFFF, timestamp_ms & 0xFFFFFFFF)
+    return header + payload
+
+
+def decode_frame(data) -> Frame:
+    """Parses a version 2 frame. The payload is a zero-copy view into `data`."""
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise ProtocolError(f"Frame too short ({len(view)} bytes)")
+    version, msg_type, codec, flags, turn_id, seq, timestamp_ms = HEADER.unpack_from(view)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported frame version {version}")
+    return Frame(msg_type, codec, flags, turn_id, seq, timestamp_ms, view[HEADER_SIZE:])
+
+
+def encode_control(message: dict, seq: int = 0) -> bytes:
+    """Maps a control message dict to its dedicated frame type (CONTROL + JSON otherwise)"""
+    kind = message.get("type")
+    turn_id = message.get("turn_id", 0)
+    if kind == "interrupt":
+        return encode_frame(MsgType.INTERRUPT, turn_id=turn_id, seq=seq)
+    if kind == "turn_start":
+        return encode_frame(MsgType.TURN_START, turn_id=turn_id, seq=seq)
+    if kind == "turn_end":
+        return encode_frame(MsgType.TURN_END, turn_id=turn_id, seq=seq)
+    if kind == "pong":
+        return encode_frame(MsgType.PONG, seq=seq, timestamp_ms=message["timestamp_ms"])
+    return encode_frame(MsgType.CONTROL, json.dumps(message).encode("utf-8"), turn_id=turn_id, seq=seq)
+
+
+def encode_hub_records(records) -> bytes:
+    """Packs (channel, frame) pairs into one hub message"""
+    parts = []
+    for channel, frame in records:
+        parts.append(HUB_RECORD.pack(channel, len(frame)))
+        parts.append(frame)
+    return b"".join(parts)
+
+
+def iter_hub_records(data):
+    """Yields (channel, frame) from a hub message, frames are zero-copy views into `data`"""
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        if offset + HUB_RECORD.size > len(view):
+            raise ProtocolError(f"Truncated hub record header at offset {offset}")
+        channel, length = HUB_RECORD.unpack_from(view, offset)
+        offset += HUB_RECORD.size
+        if offset + length > len(view):
+            raise ProtocolError(f"Truncated hub record on channel {channel}")
+        yield channel, view[offset:offset + length]
+        offset += length
+
+
+def negotiate(hello: dict) -> int:
+    """Returns the protocol version to use for a client `hello` message"""
+    try:
+        requested = int(hello.get("protocol", PROTOCOL_LEGACY))
+    except (TypeError, ValueError):
+        return PROTOCOL_LEGACY
+    return max(PROTOCOL_LEGACY, min(requested, PROTOCOL_VERSION))
+
+
+class SequenceTracker:
+    """Counts lost and out-of-order frames from 16-bit sequence numbers"""
+    def __init__(self):
+        self.expected = None
+        self.received = 0
+        self.lost = 0
+        self.out_of_order = 0
+
+    def track(self, seq: int) -> int:
+        """Records a sequence number, returns the number of frames lost before it"""
+        self.received += 1
+        if self.expected is None:
+            self.expected = (seq + 1) & 0xFFFF
+            return 0
+        gap = (seq - self.expected) & 0xFFFF
+        if gap >= 0x8000:
+            # Late frame, already counted as lost
+            self.out_of_order += 1
+            self.lost = max(0, self.lost - 1)
+            return 0
+        self.expected = (seq + 1) & 0xFFFF
+        self.lost += gap
+        return gap
@@ -3,6 +3,7 @@ from fastapi import FastAPI, WebSocket
 from app.core.config import get_settings
 from app.core.logging import setup_logging
 from app.api.websocket_endpoint import router as ws_router
+from app.api.stats_endpoint import router as stats_router
 
 settings = get_settings()
 setup_logging()
@@ -10,6 +11,7 @@ setup_logging()
 app = FastAPI(title="Jarvis Native Core", version="0.1.0")
 
 app.include_router(ws_router)
+app.include_router(stats_router)
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,144 @@
+import logging
+import struct
+import time
+from typing import AsyncIterator, Optional
+import numpy as np
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SPEECH_END = "speech_end"
+NO_SPEECH = "no_speech"
+
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")  # Mono PCM16 RIFF header, 44 bytes
+
+
+def wav_header_values(rate: int, pcm_bytes: int):
+    return (b"RIFF", 36 + pcm_bytes, b"WAVE", b"fmt ", 16, 1, 1, rate, rate * 2, 2, 16, b"data", pcm_bytes)
+
+
+def frame_rms(audio: np.ndarray) -> float:
+    """RMS of a PCM16 frame, vectorized"""
+    if not len(audio):
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(audio, dtype=np.float32))))
+
+
+class EnergyVAD:
+    """
+    End-of-speech detection on frame energy.
+    Time is counted in samples, so decisions are the same live and on replay.
+    """
+    def __init__(self, threshold: float, silence_s: float, no_speech_timeout_s: float, rate: int = 16000):
+        self.threshold = threshold
+        self.silence_samples = int(silence_s * rate)
+        self.timeout_samples = int(no_speech_timeout_s * rate)
+        self.reset()
+
+    def reset(self):
+        self.has_speech = False
+        self.samples = 0
+        self.silent_samples = 0
+
+    def update(self, audio: np.ndarray, rms: Optional[float] = None) -> Optional[str]:
+        self.samples += len(audio)
+        if (frame_rms(audio) if rms is None else rms) > self.threshold:
+            self.has_speech = True
+            self.silent_samples = 0
+            return None
+        self.silent_samples += len(audio)
+        if self.has_speech and self.silent_samples >= self.silence_samples:
+            return SPEECH_END
+        if not self.has_speech and self.samples >= self.timeout_samples:
+            return NO_SPEECH
+        return None
+
+
+class WavBuffer:
+    """
+    Utterance buffer laid out as a WAV file: the 44-byte header is reserved at
+    the front of a preallocated bytearray and patched in place at the end, so
+    building the container never copies the PCM.
+    """
+    HEADER_SIZE = WAV_HEADER.size
+
+    def __init__(self, max_seconds: float, rate: int = 16000):
+        self.rate = rate
+        self._buf = bytearray(self.HEADER_SIZE + int(max_seconds * rate) * 2)
+        self._size = 0
+
+    def reset(self):
+        self._size = 0
+
+    @property
+    def pcm_bytes(self) -> int:
+        return self._size
+
+    def append(self, pcm) -> bool:
+        """Appends PCM16 bytes, returns False once the buffer is full"""
+        start = self.HEADER_SIZE + self._size
+        n = min(len(pcm), len(self._buf) - start)
+        self._buf[start:start + n] = memoryview(pcm)[:n]
+        self._size += n
+        return n == len(pcm)
+
+    def wav(self) -> memoryview:
+        """Writes the header in place and returns a view on the whole container"""
+        WAV_HEADER.pack_into(self._buf, 0, *wav_header_values(self.rate, self._size))
+        return memoryview(self._buf)[:self.HEADER_SIZE + self._size]
+
+
+class BurstEngine:
+    """
+    Request/response engine for models the Live channel rejects.
+    Awake audio is buffered into a WAV container until the VAD detects the end
+    of speech. It is then sent in one `generate_content_stream` request, and the
+    text is yielded as it streams in. The caller feeds it to the TTS pipeline,
+    so the first sentence is spoken before the response is complete.
+    """
+    def __init__(self, gemini_client, connection_id: str):
+        self.gemini_client = gemini_client
+        self.connection_id = connection_id
+        self.vad = EnergyVAD(settings.VAD_RMS_THRESHOLD, settings.BURST_SILENCE_S, settings.BURST_NO_SPEECH_TIMEOUT_S)
+        self.buffer = WavBuffer(settings.BURST_MAX_UTTERANCE_S)
+        self.listening = False
+        self.speech_end_at = None
+        self.system_note = ""  # Extra context appended to the system instruction (e.g. the speaker)
+
+    def start(self):
+        """Starts listening for a command (called on wake)"""
+        self.vad.reset()
+        self.buffer.reset()
+        self.listening = True
+
+    def stop(self):
+        self.listening = False
+
+    def feed(self, pcm, audio: np.ndarray, rms: Optional[float] = None) -> Optional[str]:
+        """Buffers awake audio, returns SPEECH_END or NO_SPEECH when listening should stop"""
+        if not self.listening:
+            return None
+        if not self.buffer.append(pcm):
+            logger.warning("[%s] Burst: utterance too long, sending what we have", self.connection_id)
+            event = SPEECH_END
+        else:
+            event = self.vad.update(audio, rms)
+        if event:
+            self.listening = False
+            self.speech_end_at = time.monotonic()
+        return event
+
+    async def respond(self) -> AsyncIterator[str]:
+        """Sends the buffered utterance and yields the response text as it streams in"""
+        if self.buffer.pcm_bytes < 3200: # Less than 0.1s of audio
+            return
+        wav = self.buffer.wav()
+        logger.info("[%s] 🚀 Sending burst (%s bytes)", self.connection_id, len(wav))
+        first = True
+        async for text in self.gemini_client.generate_burst(wav, self.system_note):
+            if first:
+                logger.info("[%s] ⏱️ Burst: first token %.2fs after end of speech",
+                            self.connection_id, time.monotonic() - self.speech_end_at)
+                first = False
+            yield text
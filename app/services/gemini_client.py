@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 from google import genai
+from google.genai import types
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -22,20 +23,52 @@ class GeminiClient:
         self.model_id = settings.GEMINI_MODEL_ID
         
         # Live config with Google Search Tool enabled
+        # (the input transcription feeds the local fast path for home commands)
         self.config = {
             "tools": [{"google_search": {}}],
             "response_modalities": ["TEXT"],
+            "input_audio_transcription": {},
             "system_instruction": settings.SYSTEM_INSTRUCTION
         }
 
-    def start_session(self):
+        # Native audio: the model speaks with a built-in voice (24kHz PCM parts), no Cloud TTS
+        self.native_audio_config = {
+            "tools": [{"google_search": {}}],
+            "response_modalities": ["AUDIO"],
+            "input_audio_transcription": {},
+            "speech_config": {
+                "voice_config": {"prebuilt_voice_config": {"voice_name": settings.NATIVE_AUDIO_VOICE}}
+            },
+            "system_instruction": settings.SYSTEM_INSTRUCTION
+        }
+
+    def start_session(self, native_audio: bool = False):
         """
         Starts a live session with Gemini.
         Returns the session context manager.
         """
-        logger.info(f"Connecting to Gemini Live API: {self.model_id}")
+        model_id = settings.NATIVE_AUDIO_MODEL_ID if native_audio else self.model_id
+        logger.info("Connecting to Gemini Live API: %s", model_id)
         # Connect to the live session
         return self.client.aio.live.connect(
-            model=self.model_id,
-            config=self.config
+            model=model_id,
+            config=self.native_audio_config if native_audio else self.config
+        )
+
+    async def generate_burst(self, wav, system_note: str = ""):
+        """
+        Burst mode (for models the Live channel rejects): sends one WAV
+        utterance over HTTP and yields the text answer as it streams in.
+        """
+        stream = await self.client.aio.models.generate_content_stream(
+            model=settings.BURST_MODEL_ID,
+            # The SDK needs bytes: this is the only copy of the utterance
+            contents=[types.Part.from_bytes(data=bytes(wav), mime_type="audio/wav")],
+            config={
+                "tools": [{"google_search": {}}],
+                "system_instruction": settings.SYSTEM_INSTRUCTION + system_note
+            }
         )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
@@ -0,0 +1,58 @@
+import logging
+import time
+from typing import Dict
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Light state by room. There is no home automation backend yet: the tool
+# records the requested state so the fast path and the LLM answer consistently.
+_lights: Dict[str, bool] = {}
+
+
+async def get_time():
+    now = time.localtime()
+    if now.tm_min == 0:
+        return f"Il est {now.tm_hour} heures."
+    return f"Il est {now.tm_hour} heures {now.tm_min}."
+
+
+async def set_light(room: str, on: bool):
+    _lights[room] = on
+    logger.info("💡 Light %s: %s", room, "on" if on else "off")
+    return on
+
+
+def light_states() -> Dict[str, bool]:
+    return dict(_lights)
+
+
+def register_home_tools(manager):
+    """Registers the home tools and their spoken forms"""
+    manager.register_tool(
+        "get_time", get_time,
+        phrases={
+            "quelle heure est-il": {},
+            "quelle heure il est": {},
+            "il est quelle heure": {},
+            "donne-moi l'heure": {},
+        },
+    )
+    rooms = {}
+    for room in settings.HOME_ROOMS:
+        for article in ("du ", "de la ", "de l'", "dans le ", "dans la ", "dans l'"):
+            rooms[article + room] = {"room": room}
+    manager.register_tool(
+        "set_light", set_light,
+        phrases={
+            "allume la lumière {entity}": {"on": True},
+            "allume les lumières {entity}": {"on": True},
+            "allume la lampe {entity}": {"on": True},
+            "éteins la lumière {entity}": {"on": False},
+            "éteins les lumières {entity}": {"on": False},
+            "éteins la lampe {entity}": {"on": False},
+        },
+        entities=rooms,
+        confirmation="C'est fait.",
+    )
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import WebSocketDisconnect
+from app.core import protocol
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Active hubs, keyed by connection id (exposed through /stats/hubs)
+_active_hubs: Dict[str, "HubConnection"] = {}
+
+
+def hub_stats():
+    return [hub.snapshot() for hub in list(_active_hubs.values())]
+
+
+class HubChannel:
+    """
+    Websocket look-alike for one satellite of a hub connection, so the
+    /ws/audio logic (wake word, turns, Live session) runs unchanged per
+    channel. Inbound messages are handed over by the hub reader, outbound
+    ones go to the shared hub writer.
+    """
+    def __init__(self, hub: "HubConnection", channel: int, satellite_id: Optional[str],
+                 session_token: Optional[str]):
+        self.hub = hub
+        self.channel = channel
+        self.query_params = {key: value for key, value in (("satellite", satellite_id), ("session", session_token))
+                             if value}
+        self._inbound = asyncio.Queue()
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        message = await self._inbound.get()
+        if message is None:
+            raise WebSocketDisconnect(1000)
+        return message
+
+    def feed(self, message: dict):
+        self._inbound.put_nowait(message)
+
+    def disconnect(self):
+        self._inbound.put_nowait(None)
+
+    async def send_bytes(self, data):
+        await self.hub.send_frame(self.channel, data)
+
+    async def send_text(self, text: str):
+        await self.hub.send_control(self.channel, json.loads(text))
+
+    async def close(self, code: int = 1000, reason: str = None):
+        if self.closed:
+            return
+        self.closed = True
+        await self.hub.send_control(self.channel, {"type": "closed", "code": code, "reason": reason})
+
+
+class HubConnection:
+    """
+    One websocket carrying many satellites, tagged by channel ID.
+    A single reader demultiplexes inbound records to the channels; a single
+    writer batches the frames queued by every channel since its last send
+    into one message. Each channel runs `handler` (the /ws/audio logic) in
+    its own task, with its own wake and turn state.
+    """
+    def __init__(self, websocket, connection_id: str, handler: Callable[[HubChannel], Awaitable[None]],
+                 max_channels: Optional[int] = None, max_pending_bytes: Optional[int] = None):
+        self.websocket = websocket
+        self.connection_id = connection_id
+        self.handler = handler
+        self.max_channels = max_channels or settings.HUB_MAX_CHANNELS
+        self.max_pending_bytes = max_pending_bytes or settings.HUB_MAX_PENDING_BYTES
+        self.channels: Dict[int, HubChannel] = {}
+        self._tasks = set()
+
+        self._control = deque()  # JSON texts, sent before frames
+        self._frames = []        # (channel, frame) of the next batch
+        self._pending_bytes = 0
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._closed = False
+
+        # Statistics
+        self.received_messages = 0
+        self.received_records = 0
+        self.sent_messages = 0
+        self.sent_records = 0
+        self.unknown_records = 0
+
+        _active_hubs[connection_id] = self
+
+    # --- Channels ---
+
+    def open_channel(self, channel, satellite_id: Optional[str], session_token: Optional[str] = None):
+        if not isinstance(channel, int) or not 0 <= channel <= 0xFFFF:
+            logger.warning("[%s] Invalid hub channel: %r", self.connection_id, channel)
+            return
+        if channel in self.channels:
+            self.close_channel(channel)
+        if len(self.channels) >= self.max_channels:
+            logger.warning("[%s] Hub full (%s channels), refusing channel %s",
+                           self.connection_id, self.max_channels, channel)
+            self._queue_control(channel, {"type": "closed", "code": 1013, "reason": "Hub full"})
+            return
+        hub_channel = HubChannel(self, channel, satellite_id, session_token)
+        # Hub channels always speak the framed protocol
+        hub_channel.feed({"type": "websocket.receive",
+                          "text": json.dumps({"type": "hello", "protocol": protocol.PROTOCOL_VERSION})})
+        self.channels[channel] = hub_channel
+        task = asyncio.create_task(self.handler(hub_channel))
+        self._tasks.add(task)
+        task.add_done_callback(lambda task: self._channel_done(task, hub_channel))
+        logger.info("[%s] Hub channel %s opened (satellite: %s)",
+                    self.connection_id, channel, satellite_id or "default")
+
+    def _channel_done(self, task: asyncio.Task, hub_channel: HubChannel):
+        # The handler may end on its own (refused, session error): stop routing to it
+        self._tasks.discard(task)
+        if self.channels.get(hub_channel.channel) is hub_channel:
+            del self.channels[hub_channel.channel]
+
+    def close_channel(self, channel: int):
+        hub_channel = self.channels.pop(channel, None)
+        if hub_channel:
+            hub_channel.disconnect()
+
+    # --- Writer ---
+
+    async def send_frame(self, channel: int, frame: bytes):
+        while self._pending_bytes >= self.max_pending_bytes and not self._closed:
+            await self._drained.wait()
+        if self._closed:
+            return
+        self._frames.append((channel, frame))
+        self._pending_bytes += len(frame)
+        if self._pending_bytes >= self.max_pending_bytes:
+            self._drained.clear()
+        self._wakeup.set()
+
+    async def send_control(self, channel: int, message: dict):
+        self._queue_control(channel, message)
+
+    def _queue_control(self, channel: int, message: dict):
+        if self._closed:
+            return
+        message["channel"] = channel
+        self._control.append(json.dumps(message))
+        self._wakeup.set()
+
+    async def _run_writer(self):
+        try:
+            while True:
+                if self._control:
+                    await self.websocket.send_text(self._control.popleft())
+                    self.sent_messages += 1
+                elif self._frames:
+                    batch, self._frames = self._frames, []
+                    self._pending_bytes = 0
+                    self._drained.set()
+                    await self.websocket.send_bytes(protocol.encode_hub_records(batch))
+                    self.sent_messages += 1
+                    self.sent_records += len(batch)
+                elif self._closed:
+                    break
+                else:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+        except Exception as e:
+            logger.error("[%s] Hub writer error: %s", self.connection_id, e)
+        finally:
+            self._closed = True
+            self._drained.set()
+
+    # --- Reader ---
+
+    async def _run_reader(self):
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                self.received_messages += 1
+                if message.get("bytes") is not None:
+                    try:
+                        for channel, frame in protocol.iter_hub_records(message["bytes"]):
+                            self.received_records += 1
+                            hub_channel = self.channels.get(channel)
+                            if hub_channel is None:
+                                self.unknown_records += 1
+                                continue
+                            hub_channel.feed({"type": "websocket.receive", "bytes": frame})
+                    except protocol.ProtocolError as e:
+                        logger.warning("[%s] Dropping malformed hub message: %s", self.connection_id, e)
+                elif message.get("text") is not None:
+                    self._route_text(message["text"])
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error("[%s] Hub reader error: %s", self.connection_id, e)
+
+    def _route_text(self, text: str):
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            logger.error("[%s] Error parsing hub control message: %s", self.connection_id, e)
+            return
+        kind, channel = data.get("type"), data.get("channel")
+        if kind == "open":
+            self.open_channel(channel, data.get("satellite"), data.get("session"))
+        elif kind == "close":
+            self.close_channel(channel)
+        elif channel in self.channels:
+            self.channels[channel].feed({"type": "websocket.receive", "text": text})
+
+    async def run(self):
+        """Serves the hub until the websocket closes, then ends every channel (their sessions get parked)"""
+        writer = asyncio.create_task(self._run_writer())
+        try:
+            await self._run_reader()
+        finally:
+            for channel in list(self.channels):
+                self.close_channel(channel)
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._closed = True
+            self._wakeup.set()
+            await writer
+            _active_hubs.pop(self.connection_id, None)
+            logger.info("[%s] Hub closed (%s records in, %s out in %s messages)",
+                        self.connection_id, self.received_records, self.sent_records, self.sent_messages)
+
+    def snapshot(self):
+        return {
+            "connection_id": self.connection_id,
+            "channels": sorted(self.channels),
+            "received_messages": self.received_messages,
+            "received_records": self.received_records,
+            "sent_messages": self.sent_messages,
+            "sent_records": self.sent_records,
+            "records_per_message_out": round(self.sent_records / self.sent_messages, 2) if self.sent_messages else 0.0,
+            "unknown_records": self.unknown_records,
+        }
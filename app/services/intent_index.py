@@ -0,0 +1,170 @@
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.services.tools_manager import ToolIntent, get_tools_manager
+
+logger = logging.getLogger(__name__)
+
+# Skipped before the command starts ("Jarvis, allume...")
+FILLERS = {"jarvis", "motisma", "euh", "alors", "bon", "dis", "hey"}
+# Allowed after a complete phrase ("... s'il te plaît")
+POLITE_TAIL = {"s", "il", "te", "plait", "stp", "svp", "merci"}
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase tokens without accents or punctuation ("Éteins l'entrée" -> eteins, l, entree)"""
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[a-z0-9]+", text)
+
+
+class IntentMatch:
+    def __init__(self, intent: ToolIntent, args: Dict[str, Any], phrase: str):
+        self.intent = intent
+        self.tool = intent.tool
+        self.args = args
+        self.phrase = phrase
+
+    def confirmation(self, result=None) -> str:
+        return self.intent.confirmation.format(result=result, **self.args)
+
+
+class _Node:
+    __slots__ = ("children", "match")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.match: Optional[IntentMatch] = None
+
+
+class IntentIndex:
+    """
+    Token trie of every spoken form of the registered tools, entity slots
+    expanded at build time, so matching a transcript costs one dict lookup
+    per word.
+    """
+    def __init__(self, tools_manager=None):
+        tools_manager = tools_manager or get_tools_manager()
+        self.root = _Node()
+        self.intents = tools_manager.intents()
+        self.phrases = 0
+        for intent in self.intents:
+            for phrase, args in intent.expansions():
+                self._insert(normalize(phrase), IntentMatch(intent, args, phrase))
+
+        # Statistics
+        self.utterances = 0
+        self.matches = 0
+
+    def _insert(self, tokens: List[str], match: IntentMatch):
+        node = self.root
+        for token in tokens:
+            node = node.children.setdefault(token, _Node())
+        if node.match is not None:
+            logger.warning("Ambiguous phrase '%s' (%s / %s), keeping %s",
+                           match.phrase, node.match.tool, match.tool, node.match.tool)
+            return
+        node.match = match
+        self.phrases += 1
+
+    def matcher(self) -> "IntentMatcher":
+        return IntentMatcher(self)
+
+    def static_confirmations(self) -> List[str]:
+        """Confirmations that do not depend on the tool result (synthesized once, cached)"""
+        return sorted({intent.confirmation for intent in self.intents if "{" not in intent.confirmation})
+
+    def snapshot(self):
+        return {
+            "tools": len(self.intents),
+            "phrases": self.phrases,
+            "utterances": self.utterances,
+            "matches": self.matches,
+            "hit_rate": round(self.matches / self.utterances, 3) if self.utterances else 0.0,
+        }
+
+
+class IntentMatcher:
+    """
+    Incremental matching of one utterance, fed with the streaming transcript.
+    Anchored at the start of the utterance (fillers skipped): the first word
+    that leaves the index ends matching, and the model answers as usual.
+    A complete phrase only fires once the transcript is finished, or has
+    been quiet for a moment (`settle()`): any word other than a polite tail
+    after it ("... et de la cuisine", "... à Tokyo") hands the utterance back
+    to the model.
+    """
+    def __init__(self, index: IntentIndex):
+        self.index = index
+        self.reset()
+
+    def reset(self):
+        self._text = ""
+        self._consumed = 0
+        self._node = self.index.root
+        self._started = False
+        self._heard = None  # Phrase already complete, waiting for the end of the utterance
+        self.done = False
+
+    def feed(self, text: str, finished: bool = False) -> Optional[IntentMatch]:
+        if self.done:
+            return None
+        if not self._text:
+            self.index.utterances += 1
+        self._text += text
+        tokens = normalize(self._text)
+        # The last word may still grow, unless the transcript ends with a separator
+        growing = bool(not finished and self._text and self._text[-1].isalnum())
+        for token in tokens[self._consumed:len(tokens) - growing]:
+            self._consumed += 1
+            if not self._advance(token):
+                self.done = True
+                return None
+        if finished:
+            match = self._heard or self._node.match
+            if match:
+                return self._fire(match)
+            self.done = True
+        return None
+
+    def _advance(self, token: str) -> bool:
+        if self._heard is not None:
+            return token in POLITE_TAIL
+        if not self._started and token in FILLERS:
+            return True
+        self._started = True
+        self._node = self._node.children.get(token)
+        if self._node is None:
+            return False
+        if self._node.match and not self._node.children:
+            self._heard = self._node.match
+        return True
+
+    @property
+    def pending(self) -> bool:
+        """True when the utterance would match if it ended now"""
+        if self.done:
+            return False
+        if self._heard or self._node.match:
+            return True
+        tokens = normalize(self._text)
+        if len(tokens) > self._consumed:
+            child = self._node.children.get(tokens[-1])
+            return child is not None and child.match is not None
+        return False
+
+    def settle(self) -> Optional[IntentMatch]:
+        """No new words for a moment: the utterance is taken as finished"""
+        return self.feed("", finished=True) if self.pending else None
+
+    def _fire(self, match: IntentMatch) -> IntentMatch:
+        self.done = True
+        self.index.matches += 1
+        return match
+
+
+@lru_cache()
+def get_intent_index() -> IntentIndex:
+    return IntentIndex()
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Dict
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+AUDIO_BYTES_PER_TOKEN = 1000  # Gemini counts 32 tokens/s of audio, 16kHz PCM16 is 32000 bytes/s
+OUTPUT_AUDIO_BYTES_PER_TOKEN = 1500  # 24kHz PCM16 native audio output
+CHARS_PER_TOKEN = 4
+
+# Active sessions, keyed by connection id (exposed through /stats/sessions)
+_active_sessions: Dict[str, "LiveSession"] = {}
+
+
+def session_stats():
+    """Returns the context statistics of every open Live session"""
+    return [live.snapshot() for live in list(_active_sessions.values())]
+
+
+class LiveSession:
+    """
+    Owns the Gemini Live session of a satellite and tracks its approximate
+    context size. Past the budget, `rotate()` swaps it for a fresh session
+    seeded with a compact summary of the recent conversation; audio sent
+    while the swap is in progress is held and replayed into the new session.
+    """
+    def __init__(self, gemini_client, connection_id: str, native_audio: bool = False):
+        self.gemini_client = gemini_client
+        self.connection_id = connection_id
+        self.native_audio = native_audio
+        self.budget = settings.SESSION_CONTEXT_BUDGET_TOKENS
+        self.session = None
+        self.generation = 0  # Bumped on every rotation
+        self._stack = None
+        self._rotating = False
+        self._held_audio = []
+        self.healthy = True  # Cleared when the session fails (it is then never parked for a reconnect)
+        self.token_sent = False  # Set once the client holds the session token (nobody could reclaim it otherwise)
+
+        self.context_tokens = 0
+        self.recent_turns = deque(maxlen=settings.SESSION_SUMMARY_TURNS)  # (role, text)
+        self._model_text = []
+        self.last_activity = time.monotonic()
+
+        # Current generation: turn it started in, and barge-in state
+        self.responding = False
+        self.output_turn_id = None
+        self._interrupted_at = None
+        self._cancel_pending = False  # The fast path answered an utterance the model has not started on
+
+        # Identified speaker, announced between turns
+        self.speaker = None
+        self._announced_speaker = None
+
+        # Statistics
+        self.rotations = 0
+        self.rotation_sizes = []
+        self.interrupts = 0
+        self.interrupt_stop_total = 0.0
+        self.discarded_tokens = 0.0
+        self.cancelled_turns = 0
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+        return False
+
+    async def open(self):
+        self._stack = await self._connect()
+        _active_sessions[self.connection_id] = self
+        return self
+
+    async def close(self):
+        _active_sessions.pop(self.connection_id, None)
+        stack, self._stack = self._stack, None
+        if stack:
+            await stack.aclose()
+
+    def attach(self, connection_id: str):
+        """Hands a parked session over to a new connection"""
+        self.connection_id = connection_id
+        self.token_sent = True  # Reclaimed with it
+        self.responding = False
+        self._interrupted_at = None
+        self._cancel_pending = False
+        self.touch()
+        _active_sessions[connection_id] = self
+
+    def detach(self):
+        _active_sessions.pop(self.connection_id, None)
+
+    async def _connect(self):
+        stack = AsyncExitStack()
+        self.session = await stack.enter_async_context(self.gemini_client.start_session(native_audio=self.native_audio))
+        return stack
+
+    # --- Inputs ---
+
+    async def send_audio(self, data: bytes):
+        if self._rotating:
+            self._held_audio.append(data)
+            return
+        self.context_tokens += len(data) / AUDIO_BYTES_PER_TOKEN
+        await self.session.send(input={"data": data, "mime_type": "audio/pcm"}, end_of_turn=False)
+
+    async def send_text(self, text: str, end_of_turn: bool = False):
+        self.context_tokens += len(text) / CHARS_PER_TOKEN
+        await self.session.send(input=text, end_of_turn=end_of_turn)
+
+    def set_speaker(self, speaker: str):
+        """
+        Client content interrupts the answer in progress (and would land in
+        the middle of the user's audio turn): the speaker is only announced
+        by `announce_speaker()`, between turns.
+        """
+        self.speaker = speaker
+
+    async def announce_speaker(self):
+        """Called after turn_complete: tells the model who is speaking, once per change"""
+        if self.speaker is None or self.speaker == self._announced_speaker or self.responding:
+            return
+        self._announced_speaker = self.speaker
+        await self.send_text(f"[Locuteur : {self.speaker}]")
+
+    async def interrupt(self):
+        """
+        Barge-in: stops forwarding the current generation (the rest of it is
+        dropped by turn ID). Nothing is sent upstream: client content would
+        land in the context as a junk user turn. Gemini's own activity
+        detection stops the generation when the user's new audio comes in;
+        `end_generation()` then treats its `interrupted` as ours.
+        """
+        if not self.responding or self._interrupted_at is not None:
+            return
+        self._interrupted_at = time.monotonic()
+        self.output_turn_id = None
+        self.interrupts += 1
+
+    async def cancel_turn(self):
+        """
+        The local fast path answered the utterance: drops the model's answer
+        to it, whether it has started or not. An answer
+        not started yet is the next generation, unless the user speaks again
+        first (`user_spoke()`).
+        """
+        self.cancelled_turns += 1
+        if self.responding:
+            await self.interrupt()
+        else:
+            self._cancel_pending = True
+
+    def user_spoke(self):
+        """New user speech after a cancel: the next generation answers it, not the cancelled utterance"""
+        self._cancel_pending = False
+
+    # --- Outputs ---
+
+    def begin_output(self, turn_id: int) -> bool:
+        """
+        Called for every model output message. The first one tags the generation
+        with the current turn; returns False for the rest of a cancelled turn.
+        """
+        if not self.responding:
+            self.responding = True
+            self.output_turn_id = turn_id
+            if self._cancel_pending:
+                self.output_turn_id = None  # Answer to an utterance the fast path already handled
+            self._cancel_pending = False
+        return self.output_turn_id == turn_id
+
+    def discard(self, parts):
+        """Counts the output of a cancelled generation"""
+        for part in parts:
+            if part.text:
+                self.discarded_tokens += len(part.text) / CHARS_PER_TOKEN
+            elif part.inline_data and part.inline_data.data:
+                self.discarded_tokens += len(part.inline_data.data) / OUTPUT_AUDIO_BYTES_PER_TOKEN
+
+    def end_generation(self) -> bool:
+        """Called on turn_complete / interrupted, returns True if our own barge-in ended the generation"""
+        self.responding = False
+        if self._interrupted_at is None:
+            return False
+        stop = time.monotonic() - self._interrupted_at
+        self._interrupted_at = None
+        self.interrupt_stop_total += stop
+        self._model_text = []
+        logger.info("[%s] ⏹️ Generation stopped %.0f ms after barge-in (%.0f tokens discarded so far)",
+                    self.connection_id, 1000 * stop, self.discarded_tokens)
+        return True
+
+    def record_model_text(self, text: str):
+        self.context_tokens += len(text) / CHARS_PER_TOKEN
+        self._model_text.append(text)
+        self.touch()
+
+    def record_model_audio(self, size: int):
+        self.context_tokens += size / OUTPUT_AUDIO_BYTES_PER_TOKEN
+        self.touch()
+
+    def record_user_text(self, text: str):
+        self.recent_turns.append(("user", text))
+
+    def end_model_turn(self):
+        if self._model_text:
+            self.recent_turns.append(("model", "".join(self._model_text).strip()))
+            self._model_text = []
+
+    def record_usage(self, usage):
+        """Prefers the server's token count over our estimate when it is reported"""
+        if usage is not None and usage.total_token_count:
+            self.context_tokens = usage.total_token_count
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    # --- Rotation ---
+
+    def over_budget(self) -> bool:
+        return self.context_tokens > self.budget
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_activity
+
+    def summary(self) -> str:
+        """Compact summary of the recent conversation used to seed a fresh session"""
+        lines = []
+        for role, text in self.recent_turns:
+            speaker = "Utilisateur" if role == "user" else "Jarvis"
+            lines.append(f"- {speaker} : {text}")
+        body = "\n".join(lines)[-settings.SESSION_SUMMARY_MAX_CHARS:]
+        return ("[Contexte] Résumé de la conversation récente (ne pas répondre à ce message) :\n" + body) if body else ""
+
+    async def rotate(self):
+        """Swaps the session for a fresh one seeded with the summary"""
+        size = self.context_tokens
+        logger.info("[%s] Rotating Live session at ~%.0f tokens (budget %s)", self.connection_id, size, self.budget)
+        self._rotating = True
+        old_stack = self._stack
+        try:
+            self._stack = await self._connect()
+            self.context_tokens = 0
+            self.generation += 1
+            self.responding = False
+            self._interrupted_at = None
+            self._cancel_pending = False
+            self._announced_speaker = None
+            summary = self.summary()
+            if summary:
+                await self.send_text(summary)
+            await self.announce_speaker()
+        except Exception as e:
+            if self._stack is old_stack:
+                logger.error("[%s] Session rotation failed, keeping the current session: %s", self.connection_id, e)
+                return False
+            logger.error("[%s] Failed to seed the new session: %s", self.connection_id, e)
+        finally:
+            self._rotating = False
+            held, self._held_audio = self._held_audio, []
+            for data in held:
+                await self.send_audio(data)
+
+        self.rotations += 1
+        self.rotation_sizes.append(round(size))
+        await old_stack.aclose()
+        return True
+
+    def snapshot(self):
+        return {
+            "connection_id": self.connection_id,
+            "context_tokens": round(self.context_tokens),
+            "budget_tokens": self.budget,
+            "rotations": self.rotations,
+            "context_tokens_at_rotation": self.rotation_sizes[-10:],
+            "barge_ins": self.interrupts,
+            "interrupt_stop_ms_avg": round(1000 * self.interrupt_stop_total / self.interrupts, 1) if self.interrupts else 0.0,
+            "discarded_tokens": round(self.discarded_tokens),
+            "cancelled_turns": self.cancelled_turns,
+        }
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Optional
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Degradation levels, each one includes the previous ones
+LEVEL_NORMAL = 0
+LEVEL_SHED_EXTRAS = 1   # No low-confidence logging, no wake gate pre-roll replay
+LEVEL_HALF_RATE = 2     # Sleeping satellites are scored every other frame
+LEVEL_REFUSE = 3        # New connections are refused (close 1013 with a retry hint)
+LEVEL_NAMES = ["normal", "shed_extras", "half_rate", "refuse_connections"]
+
+TICK_S = 0.1
+BASELINE_WINDOW_S = 20.0  # v2 clock offset: minimum delay over this window (older minimums expire)
+REBASE_S = 60.0  # Backlog beyond this is a clock jump, not a backlog
+WAIT_S = 0.02    # A receive that waited longer than this found nothing queued
+STALE_S = 1.0    # A connection without audio for this long reports no backlog
+BACKLOG_QUORUM = 2  # Connections past a backlog threshold needed to go beyond shedding extras on backlog alone
+
+
+class BacklogMeter:
+    """
+    How far behind real time a connection's audio is processed.
+    With protocol v2 the satellite timestamps its frames, so the delay is
+    measured against its clock, offset removed by the minimum delay seen over
+    the last BASELINE_WINDOW_S: the baseline re-seeds itself as old minimums
+    expire, so clock drift or a backward step of the satellite clock only
+    reads as a backlog until the window has moved past it.
+    Legacy frames carry no timestamp, and their pacing says nothing about the
+    server (a muted mic, a ring buffer drop or a slow capture clock all look
+    like gaps), so the queue is estimated on the server side: a receive that
+    had to wait found nothing queued, otherwise the queue grew by the time
+    spent handling the previous chunk minus the audio it held.
+    """
+    def __init__(self):
+        self._window = deque()  # (arrived_at, delay), delays increasing: sliding window minimum
+        self._arrived_at = None
+        self._handled_at = None
+        self._duration = 0.0
+        self.backlog = 0.0
+
+    def update(self, samples: int, timestamp_ms: Optional[int] = None):
+        """Called when a chunk arrives (before it is handled)"""
+        now = time.monotonic()
+        if timestamp_ms is not None:
+            delay = now - timestamp_ms / 1000
+            if self._window and delay - self._window[0][1] > REBASE_S:
+                self._window.clear()  # Satellite clock jump (u32 timestamp wrap): rebase now
+            while self._window and self._window[-1][1] >= delay:
+                self._window.pop()
+            self._window.append((now, delay))
+            while now - self._window[0][0] > BASELINE_WINDOW_S:
+                self._window.popleft()
+            self.backlog = delay - self._window[0][1]
+        elif self._handled_at is not None:
+            if now - self._handled_at > WAIT_S:
+                self.backlog = 0.0
+            else:
+                handling = self._handled_at - self._arrived_at
+                self.backlog = max(0.0, self.backlog + handling - self._duration)
+        self._arrived_at = now
+        self._handled_at = None
+        self._duration = samples / 16000
+
+    def handled(self):
+        """Called once the chunk of the last update has been handled"""
+        self._handled_at = time.monotonic()
+
+    def current(self, now: float) -> float:
+        if self._arrived_at is None or now - self._arrived_at > STALE_S:
+            return 0.0
+        return self.backlog
+
+
+class LoadGovernor:
+    """
+    Server-wide overload control. Watches the event loop lag and the worst
+    per-connection backlog, steps up to the level they call for immediately,
+    and steps down one level at a time once the load has stayed lower for
+    GOVERNOR_RECOVERY_S.
+    """
+    def __init__(self):
+        self.lag_thresholds = settings.GOVERNOR_LAG_MS
+        self.backlog_thresholds = settings.GOVERNOR_BACKLOG_MS
+        self.recovery = settings.GOVERNOR_RECOVERY_S
+        self.retry_after = settings.GOVERNOR_RETRY_AFTER_S
+        self.level = LEVEL_NORMAL
+        self.lag = 0.0
+        self.backlog = 0.0
+        self._meters: Dict[str, BacklogMeter] = {}
+        self._calm_since = None
+        self._task = None
+        self.transitions = deque(maxlen=50)
+        self.refused = 0
+
+    def ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def register(self, connection_id: str) -> BacklogMeter:
+        meter = self._meters[connection_id] = BacklogMeter()
+        return meter
+
+    def unregister(self, connection_id: str):
+        self._meters.pop(connection_id, None)
+
+    @property
+    def refusing(self) -> bool:
+        return self.level >= LEVEL_REFUSE
+
+    def refuse(self):
+        self.refused += 1
+
+    def _level_for(self, value_ms: float, thresholds) -> int:
+        return sum(1 for threshold in thresholds if value_ms >= threshold)
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + TICK_S
+            await asyncio.sleep(TICK_S)
+            lag = max(0.0, time.monotonic() - expected)
+            self.lag = 0.7 * self.lag + 0.3 * lag
+            now = time.monotonic()
+            backlogs = [meter.current(now) for meter in self._meters.values()]
+            self.backlog = max(backlogs, default=0.0)
+            self._step(max(self._level_for(1000 * self.lag, self.lag_thresholds), self._backlog_level(backlogs)))
+
+    def _backlog_level(self, backlogs) -> int:
+        """
+        One connection behind (or its clock) only sheds extras: half rate and
+        refusal take BACKLOG_QUORUM connections past their threshold
+        """
+        level = LEVEL_NORMAL
+        for candidate, threshold in enumerate(self.backlog_thresholds, start=1):
+            behind = sum(1 for backlog in backlogs if 1000 * backlog >= threshold)
+            if behind >= (1 if candidate <= LEVEL_SHED_EXTRAS else BACKLOG_QUORUM):
+                level = candidate
+        return level
+
+    def _step(self, wanted: int):
+        now = time.monotonic()
+        if wanted > self.level:
+            self._set_level(wanted)
+            self._calm_since = None
+        elif wanted < self.level:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.recovery:
+                self._set_level(self.level - 1)
+                self._calm_since = now
+        else:
+            self._calm_since = None
+
+    def _set_level(self, level: int):
+        logger.warning("Load governor: %s -> %s (loop lag %.0f ms, worst backlog %.0f ms)",
+                       LEVEL_NAMES[self.level], LEVEL_NAMES[level], 1000 * self.lag, 1000 * self.backlog)
+        self.transitions.append({
+            "at": round(time.time(), 3),
+            "from": LEVEL_NAMES[self.level],
+            "to": LEVEL_NAMES[level],
+            "loop_lag_ms": round(1000 * self.lag, 1),
+            "backlog_ms": round(1000 * self.backlog, 1),
+        })
+        self.level = level
+
+    def snapshot(self):
+        return {
+            "level": LEVEL_NAMES[self.level],
+            "loop_lag_ms": round(1000 * self.lag, 1),
+            "worst_backlog_ms": round(1000 * self.backlog, 1),
+            "connections": len(self._meters),
+            "refused_connections": self.refused,
+            "transitions": list(self.transitions),
+        }
+
+
+@lru_cache()
+def get_load_governor() -> LoadGovernor:
+    return LoadGovernor()
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import numpy as np
+from app.core.config import get_settings
+from app.services.burst_engine import EnergyVAD, SPEECH_END, WAV_HEADER, wav_header_values
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Local stand-ins for Gemini and Cloud TTS (USE_LOCAL_STANDINS=true), used for
+# offline benchmarks and replay. Timings are illustrative orders of magnitude,
+# not measurements of the real services.
+DEFAULT_REPLY = "Il est dix heures. Il fait beau à Paris aujourd'hui, avec vingt degrés cet après-midi."
+LIVE_VAD_SILENCE_S = 0.6     # Server-side end of speech detection of the Live API
+LIVE_FIRST_TOKEN_S = 0.35    # Live: end of speech -> first token (model already warm)
+NATIVE_FIRST_AUDIO_S = 0.45  # Live native audio: end of speech -> first audio part
+TRANSCRIPTION_SILENCE_S = 0.2  # Input transcription: silence before the last words are transcribed
+TRANSCRIPTION_WORD_S = 0.02  # Between streamed transcription chunks
+BURST_FIRST_TOKEN_S = 0.9    # Burst: request -> first token (upload + cold request)
+TOKEN_INTERVAL_S = 0.05      # Between streamed text chunks
+TTS_BASE_S = 0.15            # Cloud TTS round trip
+TTS_PER_CHAR_S = 0.001
+TTS_RATE = 24000
+
+
+def _message(text=None, turn_complete=False, interrupted=False, audio=None, transcription=None, finished=False):
+    """Builds an object shaped like a genai LiveServerMessage"""
+    parts = []
+    if text is not None:
+        parts.append(SimpleNamespace(text=text, inline_data=None, executable_code=None))
+    if audio is not None:
+        parts.append(SimpleNamespace(text=None, inline_data=SimpleNamespace(data=audio, mime_type="audio/pcm"),
+                                     executable_code=None))
+    content = SimpleNamespace(
+        model_turn=SimpleNamespace(parts=parts) if parts else None,
+        turn_complete=turn_complete,
+        interrupted=interrupted,
+        input_transcription=SimpleNamespace(text=transcription, finished=finished) if transcription else None,
+        output_transcription=None,
+    )
+    return SimpleNamespace(server_content=content, usage_metadata=None,
+                           session_resumption_update=None, go_away=None, tool_call=None)
+
+
+def _chunks(text: str, size: int = 16):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _tone(ms: int) -> bytes:
+    """24kHz PCM16 tone standing in for speech"""
+    n = TTS_RATE * ms // 1000
+    return (np.sin(np.arange(n) * 2 * np.pi * 220 / TTS_RATE) * 6000).astype(np.int16).tobytes()
+
+
+class LocalLiveSession:
+    """
+    Stand-in Live session: answers every utterance (energy VAD on the streamed audio) with canned text,
+    and stops the answer in progress as soon as new speech starts.
+    With a client transcript, the utterance is also "transcribed", word by word, shortly after speech stops.
+    """
+    def __init__(self, client: "LocalGeminiClient", native_audio: bool = False):
+        self.client = client
+        self.native_audio = native_audio
+        self.vad = EnergyVAD(settings.VAD_RMS_THRESHOLD, LIVE_VAD_SILENCE_S, no_speech_timeout_s=1e9)
+        self.transcript_vad = EnergyVAD(settings.VAD_RMS_THRESHOLD, TRANSCRIPTION_SILENCE_S, no_speech_timeout_s=1e9)
+        self._messages = asyncio.Queue()
+        self._replies = set()
+        self._generating = asyncio.Lock()  # One generation at a time: a new turn waits for the current one
+        self._current = None
+        self.closed = False
+
+    async def send(self, input=None, end_of_turn=False):
+        if isinstance(input, dict) and "data" in input:
+            audio = np.frombuffer(input["data"], dtype=np.int16)
+            if self.client.transcript and self.transcript_vad.update(audio) == SPEECH_END:
+                self.transcript_vad.reset()
+                self._start(self._transcribe())
+            speaking = self.vad.has_speech
+            if self.vad.update(audio) == SPEECH_END:
+                self.vad.reset()
+                self._start_reply()
+            elif self.vad.has_speech and not speaking and self._current is not None:
+                # Speech over the answer interrupts it (automatic activity detection of the Live API)
+                self._current.cancel()
+                self._current = None
+                await self._messages.put(_message(interrupted=True))
+        elif end_of_turn:
+            self._start_reply()
+
+    def _start_reply(self):
+        self._start(self._reply())
+
+    def _start(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._replies.add(task)
+        task.add_done_callback(self._replies.discard)
+
+    async def _transcribe(self):
+        words = self.client.transcript.split()
+        for i, word in enumerate(words):
+            await self._messages.put(_message(transcription=" " + word, finished=i == len(words) - 1))
+            await asyncio.sleep(TRANSCRIPTION_WORD_S)
+
+    async def _reply(self):
+        async with self._generating:
+            self._current = asyncio.current_task()
+            try:
+                await self._generate()
+            finally:
+                if self._current is asyncio.current_task():
+                    self._current = None
+
+    async def _generate(self):
+        if self.native_audio:
+            await asyncio.sleep(NATIVE_FIRST_AUDIO_S)
+            for chunk in _chunks(self.client.reply):
+                self.client.generated_chunks += 1
+                await self._messages.put(_message(audio=_tone(60 * len(chunk))))
+                await asyncio.sleep(TOKEN_INTERVAL_S)
+        else:
+            await asyncio.sleep(self.client.live_first_token_s)
+            for chunk in _chunks(self.client.reply):
+                self.client.generated_chunks += 1
+                await self._messages.put(_message(text=chunk))
+                await asyncio.sleep(TOKEN_INTERVAL_S)
+        await self._messages.put(_message(turn_complete=True))
+
+    async def receive(self):
+        while not self.closed:
+            message = await self._messages.get()
+            if message is None:
+                return
+            yield message
+            if message.server_content.turn_complete or message.server_content.interrupted:
+                return
+
+    async def close(self):
+        self.closed = True
+        for task in list(self._replies):
+            task.cancel()
+        await self._messages.put(None)
+
+
+class LocalGeminiClient:
+    """Stand-in for GeminiClient (Live sessions and burst requests)"""
+    def __init__(self, reply: str = DEFAULT_REPLY, live_first_token_s: float = LIVE_FIRST_TOKEN_S,
+                 burst_first_token_s: float = BURST_FIRST_TOKEN_S, transcript: str = None):
+        self.model_id = "local-standin"
+        self.reply = reply
+        self.transcript = transcript  # What the user "says" (input transcription), none by default
+        self.live_first_token_s = live_first_token_s
+        self.burst_first_token_s = burst_first_token_s
+        self.generated_chunks = 0  # Text/audio chunks generated by Live sessions (tokens spent)
+
+    @asynccontextmanager
+    async def start_session(self, native_audio: bool = False):
+        session = LocalLiveSession(self, native_audio)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    async def generate_burst(self, wav, system_note: str = ""):
+        await asyncio.sleep(self.burst_first_token_s)
+        for chunk in _chunks(self.reply):
+            yield chunk
+            await asyncio.sleep(TOKEN_INTERVAL_S)
+
+
+class LocalTTSService:
+    """Stand-in for TTSService: LINEAR16 WAV with leading/trailing silence, like Chirp3-HD output"""
+    def __init__(self, ms_per_char: int = 60, silence_ms: int = 150):
+        self.ms_per_char = ms_per_char
+        self.silence_ms = silence_ms
+
+    async def synthesize(self, text: str):
+        if not text.strip():
+            return None
+        await asyncio.sleep(TTS_BASE_S + TTS_PER_CHAR_S * len(text))
+        silence = bytes(2 * (TTS_RATE * self.silence_ms // 1000))
+        pcm = silence + _tone(self.ms_per_char * len(text.strip())) + silence
+        return WAV_HEADER.pack(*wav_header_values(TTS_RATE, len(pcm))) + pcm
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional
+from app.core.config import get_settings
+from app.core import protocol
+from app.core.protocol import Codec, MsgType
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+OVERFLOW_DROP_TURN = "drop_turn"
+OVERFLOW_DISCONNECT = "disconnect"
+
+# Active writers, keyed by connection id (exposed through /stats/connections)
+_active_writers: Dict[str, "OutboundWriter"] = {}
+
+
+def connection_stats():
+    """Returns the send statistics of every connected satellite"""
+    return [writer.snapshot() for writer in list(_active_writers.values())]
+
+
+class OutboundWriter:
+    """
+    Owns every write to a satellite websocket.
+    Control messages go through a priority lane and are always sent before any
+    queued audio, except turn_end which follows the audio of its turn. Audio
+    goes through a byte-bounded lane tagged with turn IDs so that a slow link
+    only ever delays (or drops) its own stale turn.
+    """
+    def __init__(self, websocket, connection_id: str,
+                 max_audio_bytes: Optional[int] = None,
+                 overflow_policy: Optional[str] = None):
+        self.websocket = websocket
+        self.connection_id = connection_id
+        self.speaker = None  # Set once speaker identification tags the connection
+        self.engine = None   # Conversation engine of the satellite
+        self.recorder = None # Session recorder (outbound metadata), if recording is enabled
+        self.max_audio_bytes = max_audio_bytes or settings.OUTBOUND_AUDIO_MAX_BYTES
+        self.overflow_policy = overflow_policy or settings.OUTBOUND_OVERFLOW_POLICY
+        if self.overflow_policy not in (OVERFLOW_DROP_TURN, OVERFLOW_DISCONNECT):
+            raise ValueError(f"Unknown outbound overflow policy: {self.overflow_policy}")
+
+        # Legacy (raw bytes + JSON text) until the client negotiates version 2
+        self.protocol_version = protocol.PROTOCOL_LEGACY
+        self.inbound = protocol.SequenceTracker()
+        self._seq = 0
+
+        self._control = deque()  # (message, enqueued_at)
+        self._audio = deque()    # (turn_id, data, codec, enqueued_at), codec None: turn_end message
+        self._audio_bytes = 0
+        self._min_turn_id = 0    # Audio from older turns is stale
+        self._wakeup = asyncio.Event()
+        self._closed = False
+
+        # Send statistics
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.dropped_turns = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+        self.first_audio_ms = deque(maxlen=20)  # Per turn: end of speech -> first audio queued
+
+        _active_writers[connection_id] = self
+
+    def send_control(self, message: dict):
+        """Queues a control message on the priority lane"""
+        if self._closed:
+            return
+        if self.recorder:
+            self.recorder.outbound(message)
+        self._control.append((message, time.monotonic()))
+        self._wakeup.set()
+
+    def end_turn(self, turn_id: int):
+        """
+        Queues turn_end behind the audio already queued for the turn (in the
+        audio lane), so it never overtakes the turn's tail. Without queued
+        audio for the turn, it goes through the control lane right away.
+        """
+        message = {"type": "turn_end", "turn_id": turn_id}
+        if self._closed or not any(queued[0] == turn_id for queued in self._audio):
+            self.send_control(message)
+            return
+        if self.recorder:
+            self.recorder.outbound(message)
+        self._audio.append((turn_id, message, None, time.monotonic()))
+        self._wakeup.set()
+
+    def send_audio(self, data: bytes, turn_id: int, codec: int = Codec.WAV):
+        """Queues audio for a turn, applying the overflow policy if the lane is full"""
+        if self.recorder:
+            self.recorder.outbound({"type": "audio", "turn_id": turn_id, "bytes": len(data), "codec": int(codec)})
+        if self._closed or turn_id < self._min_turn_id:
+            self._count_drop(len(data))
+            return
+
+        while self._audio and self._audio_bytes + len(data) > self.max_audio_bytes:
+            if self.overflow_policy == OVERFLOW_DISCONNECT:
+                logger.warning("[%s] Outbound audio lane full (%s bytes queued) -> disconnecting",
+                               self.connection_id, self._audio_bytes)
+                self._closed = True
+                self._wakeup.set()
+                asyncio.ensure_future(self._disconnect())
+                return
+            oldest_turn = self._audio[0][0]
+            if oldest_turn < turn_id:
+                # Drop the oldest (stale) turn entirely, never the one being produced
+                logger.warning("[%s] Outbound audio lane full -> dropping turn %s", self.connection_id, oldest_turn)
+                self.dropped_turns += 1
+                self.discard_before(oldest_turn + 1)
+            elif oldest_turn == turn_id:
+                # The current turn alone fills the lane: trim its oldest chunks, keep it playing
+                self._drop_oldest_audio()
+            else:
+                # Late chunk of a turn older than everything queued
+                self._count_drop(len(data))
+                return
+
+        self._audio.append((turn_id, data, codec, time.monotonic()))
+        self._audio_bytes += len(data)
+        self._wakeup.set()
+
+    def record_first_audio(self, latency: float):
+        """Records the response latency of a turn (seconds from the end of speech)"""
+        self.first_audio_ms.append(round(1000 * latency))
+
+    def discard_before(self, turn_id: int):
+        """Drops queued audio of every turn older than `turn_id` and refuses further chunks for them"""
+        self._min_turn_id = max(self._min_turn_id, turn_id)
+        # Stale chunks are refused on entry, so the lane is ordered by turn
+        while self._audio and self._audio[0][0] < self._min_turn_id:
+            self._drop_oldest_audio()
+
+    def _drop_oldest_audio(self):
+        """Drops the head of the audio lane; a turn_end waiting there moves to the control lane"""
+        _, data, codec, enqueued_at = self._audio.popleft()
+        if codec is None:
+            self._control.append((data, enqueued_at))
+            return
+        self._audio_bytes -= len(data)
+        self._count_drop(len(data))
+
+    def close(self):
+        """Stops the writer once the control lane is flushed"""
+        self._closed = True
+        self._wakeup.set()
+
+    async def run(self):
+        """Writer task: sends control messages first, then audio, one at a time"""
+        try:
+            while True:
+                if self._control:
+                    message, enqueued_at = self._control.popleft()
+                    if self.protocol_version >= protocol.PROTOCOL_VERSION and message.get("type") != "hello":
+                        payload = protocol.encode_control(message, seq=self._next_seq())
+                        await self.websocket.send_bytes(payload)
+                    else:
+                        payload = json.dumps(message)
+                        await self.websocket.send_text(payload)
+                    self._record_send(len(payload), enqueued_at)
+                elif self._audio and not self._closed:
+                    turn_id, data, codec, enqueued_at = self._audio.popleft()
+                    if codec is None:
+                        # turn_end sequenced after the turn's audio
+                        self._control.appendleft((data, enqueued_at))
+                        continue
+                    self._audio_bytes -= len(data)
+                    if self.protocol_version >= protocol.PROTOCOL_VERSION:
+                        data = protocol.encode_frame(MsgType.AUDIO, data, turn_id=turn_id,
+                                                     seq=self._next_seq(), codec=codec)
+                    await self.websocket.send_bytes(data)
+                    self._record_send(len(data), enqueued_at)
+                elif self._closed:
+                    break
+                else:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+        except Exception as e:
+            logger.error("[%s] Outbound writer error: %s", self.connection_id, e)
+            self._closed = True
+        finally:
+            _active_writers.pop(self.connection_id, None)
+
+    def snapshot(self):
+        """Returns the current send statistics"""
+        return {
+            "connection_id": self.connection_id,
+            "protocol": self.protocol_version,
+            "speaker": self.speaker,
+            "engine": self.engine,
+            "overflow_policy": self.overflow_policy,
+            "queued_control": len(self._control),
+            "queued_audio_bytes": self._audio_bytes,
+            "sent_messages": self.sent_messages,
+            "sent_bytes": self.sent_bytes,
+            "dropped_chunks": self.dropped_chunks,
+            "dropped_bytes": self.dropped_bytes,
+            "dropped_turns": self.dropped_turns,
+            "send_lag_ms_avg": round(1000 * self.lag_total / self.sent_messages, 2) if self.sent_messages else 0.0,
+            "send_lag_ms_max": round(1000 * self.lag_max, 2),
+            "send_lag_ms_last": round(1000 * self.lag_last, 2),
+            "first_audio_ms_recent": list(self.first_audio_ms),
+            "inbound_frames": self.inbound.received,
+            "inbound_lost_frames": self.inbound.lost,
+        }
+
+    def _next_seq(self):
+        seq = self._seq
+        self._seq = (self._seq + 1) & 0xFFFF
+        return seq
+
+    def _record_send(self, size: int, enqueued_at: float):
+        lag = time.monotonic() - enqueued_at
+        self.sent_messages += 1
+        self.sent_bytes += size
+        self.lag_total += lag
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+
+    def _count_drop(self, size: int):
+        self.dropped_chunks += 1
+        self.dropped_bytes += size
+
+    async def _disconnect(self):
+        try:
+            await self.websocket.close(code=1008, reason="Outbound backlog exceeded")
+        except Exception:
+            pass
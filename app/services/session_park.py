@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Optional
+from app.core.config import get_settings
+from app.services.live_session import LiveSession
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def new_session_token() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class _Parked:
+    def __init__(self, live: LiveSession, satellite_id: Optional[str], timer: asyncio.TimerHandle):
+        self.live = live
+        self.satellite_id = satellite_id
+        self.parked_at = time.monotonic()
+        self.timer = timer
+
+
+class SessionPark:
+    """
+    Keeps the Live session of a disconnected satellite open for a grace period,
+    so a reconnect presenting the same session token reattaches to it (no new
+    handshake, conversation intact). Bounded in count (the oldest is closed
+    first) and in total parked time per session, so a flapping link cannot
+    hold a session forever.
+    """
+    def __init__(self, max_parked: Optional[int] = None, grace_s: Optional[float] = None,
+                 max_total_s: Optional[float] = None):
+        self.max_parked = max_parked if max_parked is not None else settings.SESSION_PARK_MAX
+        self.grace = grace_s if grace_s is not None else settings.SESSION_PARK_GRACE_S
+        self.max_total = max_total_s if max_total_s is not None else settings.SESSION_PARK_MAX_TOTAL_S
+        self._parked: "OrderedDict[str, _Parked]" = OrderedDict()  # token -> parked session, oldest first
+        self._parked_time = {}  # token -> seconds already spent parked
+
+        # Statistics
+        self.parks = 0
+        self.reattached = 0
+        self.expired = 0
+        self.evicted = 0
+        self.reattach_total = 0.0
+
+    def park(self, token: Optional[str], live: LiveSession, satellite_id: Optional[str]) -> bool:
+        """Parks a session, returns False if it must be closed instead"""
+        if not token or self.max_parked <= 0:
+            return False
+        remaining = min(self.grace, self.max_total - self._parked_time.get(token, 0.0))
+        if remaining <= 0:
+            logger.info("Session %s…: parked time budget exhausted, closing", token[:6])
+            self._parked_time.pop(token, None)
+            return False
+        while len(self._parked) >= self.max_parked:
+            old_token, _ = next(iter(self._parked.items()))
+            logger.info("Session park full, closing the oldest parked session (%s…)", old_token[:6])
+            self.evicted += 1
+            self._close(old_token)
+        timer = asyncio.get_running_loop().call_later(remaining, self._expire, token)
+        self._parked[token] = _Parked(live, satellite_id, timer)
+        self.parks += 1
+        logger.info("Parked Live session %s… for %.0fs (%s parked)", token[:6], remaining, len(self._parked))
+        return True
+
+    def claim(self, token: Optional[str], satellite_id: Optional[str]) -> Optional[LiveSession]:
+        """Takes a parked session back (None if unknown, expired or parked by another satellite)"""
+        parked = self._parked.get(token) if token else None
+        if parked is None or parked.satellite_id != satellite_id:
+            return None
+        del self._parked[token]
+        parked.timer.cancel()
+        parked_for = time.monotonic() - parked.parked_at
+        self._parked_time[token] = self._parked_time.get(token, 0.0) + parked_for
+        self.reattached += 1
+        logger.info("Reattached Live session %s… after %.1fs", token[:6], parked_for)
+        return parked.live
+
+    def _expire(self, token: str):
+        if token in self._parked:
+            self.expired += 1
+            logger.info("Parked session %s… expired", token[:6])
+            self._close(token)
+
+    def _close(self, token: str):
+        parked = self._parked.pop(token)
+        parked.timer.cancel()
+        self._parked_time.pop(token, None)
+        asyncio.ensure_future(parked.live.close())
+
+    def forget(self, token: str):
+        self._parked_time.pop(token, None)
+
+    def record_reattach(self, seconds: float):
+        self.reattach_total += seconds
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "parked": len(self._parked),
+            "max_parked": self.max_parked,
+            "grace_s": self.grace,
+            "parked_s": {token[:6]: round(now - parked.parked_at, 1) for token, parked in self._parked.items()},
+            "parks": self.parks,
+            "reattached": self.reattached,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "reattach_ms_avg": round(1000 * self.reattach_total / self.reattached, 2) if self.reattached else 0.0,
+        }
+
+
+@lru_cache()
+def get_session_park() -> SessionPark:
+    return SessionPark()
+
+
+@asynccontextmanager
+async def attached_live_session(gemini_client, connection_id: str, token: Optional[str],
+                                satellite_id: Optional[str], native_audio: bool = False):
+    """
+    Yields (live session, session token, resumed). Reattaches the parked session
+    of `token` if there is one, otherwise opens a new session with a new token.
+    On exit the session is parked for a reconnect, or closed if it failed or
+    if the client never received its token (legacy satellites send no hello).
+    """
+    park = get_session_park()
+    start = time.monotonic()
+    live = park.claim(token, satellite_id)
+    resumed = live is not None
+    if resumed:
+        live.attach(connection_id)
+        park.record_reattach(time.monotonic() - start)
+    else:
+        token = new_session_token()
+        live = LiveSession(gemini_client, connection_id, native_audio=native_audio)
+        await live.open()
+    failed = False
+    try:
+        yield live, token, resumed
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        live.detach()
+        if failed or not live.healthy or not live.token_sent or not park.park(token, live, satellite_id):
+            park.forget(token)
+            await live.close()
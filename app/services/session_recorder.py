@@ -0,0 +1,138 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Record kinds (0 marks the zero-filled end of a segment)
+META = 1           # JSON: satellite, engine, wake word models (order of the SCORES arrays), wake engine settings
+INBOUND_BYTES = 2  # Raw websocket binary message (legacy PCM or a v2 frame)
+INBOUND_TEXT = 3   # Raw websocket text message (hello, legacy JSON control)
+SCORES = 4         # float32 wake word scores of one inbound chunk
+STATE = 5          # JSON: wake, arbitration, interruption, sleep...
+OUTBOUND = 6       # JSON: metadata of a message queued for the satellite (never the audio itself)
+
+RECORD = struct.Struct("<B3xIQ")  # kind, payload length, microseconds since the start of the connection
+
+KIND_NAMES = {META: "meta", INBOUND_BYTES: "inbound_bytes", INBOUND_TEXT: "inbound_text",
+              SCORES: "scores", STATE: "state", OUTBOUND: "outbound"}
+
+
+class SessionRecorder:
+    """
+    Opt-in recording of one connection (RECORD_SESSIONS=true).
+    Records are appended to preallocated memory-mapped segment files, so a
+    record costs a header pack and a memcpy, with no syscall on the audio path.
+    The payload is written before its header: a crash leaves at worst a
+    zero-filled tail, which readers treat as the end of the segment.
+    """
+    def __init__(self, connection_id: str, directory: Optional[str] = None,
+                 segment_bytes: Optional[int] = None):
+        self.connection_id = connection_id
+        self.directory = directory or os.path.join(
+            settings.RECORDINGS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{connection_id}")
+        self.segment_bytes = segment_bytes or settings.RECORDING_SEGMENT_BYTES
+        os.makedirs(self.directory, exist_ok=True)
+        self._start_ns = time.monotonic_ns()
+        self._file = None
+        self._mm = None
+        self._offset = 0
+        self.closed = False
+
+        # Statistics
+        self.segments = 0
+        self.records = 0
+        self.recorded_bytes = 0
+        self.write_ns = 0
+
+        self._open_segment(self.segment_bytes)
+        logger.info("[%s] Recording session to %s", connection_id, self.directory)
+
+    def _open_segment(self, size: int):
+        path = os.path.join(self.directory, f"{self.segments:05d}.seg")
+        self._file = open(path, "w+b")
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._offset = 0
+        self.segments += 1
+
+    def _close_segment(self):
+        self._mm.flush()
+        self._mm.close()
+        # Drop the unused preallocated tail
+        self._file.truncate(self._offset)
+        self._file.close()
+
+    def _append(self, kind: int, payload):
+        if self.closed:
+            return
+        now = time.monotonic_ns()
+        size = RECORD.size + len(payload)
+        if self._offset + size > len(self._mm):
+            self._close_segment()
+            self._open_segment(max(self.segment_bytes, size))
+        start = self._offset + RECORD.size
+        self._mm[start:start + len(payload)] = payload
+        RECORD.pack_into(self._mm, self._offset, kind, len(payload), (now - self._start_ns) // 1000)
+        self._offset += size
+        self.records += 1
+        self.recorded_bytes += size
+        self.write_ns += time.monotonic_ns() - now
+
+    def _append_json(self, kind: int, fields: dict):
+        self._append(kind, json.dumps(fields, separators=(",", ":")).encode())
+
+    # --- Record types ---
+
+    def meta(self, **fields):
+        self._append_json(META, fields)
+
+    def inbound(self, message: dict):
+        """Records a raw websocket message as received"""
+        if message.get("bytes") is not None:
+            self._append(INBOUND_BYTES, message["bytes"])
+        elif message.get("text") is not None:
+            self._append(INBOUND_TEXT, message["text"].encode())
+
+    def scores(self, scores: dict):
+        self._append(SCORES, np.fromiter(scores.values(), dtype=np.float32, count=len(scores)).tobytes())
+
+    def state(self, event: str, **fields):
+        fields["event"] = event
+        self._append_json(STATE, fields)
+
+    def outbound(self, fields: dict):
+        self._append_json(OUTBOUND, fields)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._close_segment()
+        avg_us = self.write_ns / self.records / 1000 if self.records else 0.0
+        logger.info("[%s] Recording closed: %s records, %s bytes in %s segment(s), %.1f us/record",
+                    self.connection_id, self.records, self.recorded_bytes, self.segments, avg_us)
+
+
+def iter_records(directory: str) -> Iterator[Tuple[int, float, bytes]]:
+    """Yields (kind, seconds since the start of the connection, payload) in recording order"""
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".seg"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + RECORD.size <= len(data):
+            kind, length, t_us = RECORD.unpack_from(data, offset)
+            if kind == 0:
+                break
+            start = offset + RECORD.size
+            yield kind, t_us / 1e6, data[start:start + length]
+            offset = start + length
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import numpy as np
+import onnxruntime as ort
+from app.core.config import get_settings
+from app.services.wakeword import FRAME_SAMPLES, SharedFeatures, session_options
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SAMPLE_RATE = 16000
+FBANK_FRAME = 400   # 25 ms windows
+FBANK_HOP = 160     # 10 ms hop
+FBANK_FFT = 512
+FBANK_MELS = 80
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+class SpeakerIndex:
+    """
+    In-memory enrollment index.
+    Embeddings are stored L2-normalized in one preallocated matrix, so cosine
+    scoring against every enrolled vector is a single matrix-vector product.
+    A speaker may have several rows (one per enrollment clip).
+    """
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self.names: List[str] = []
+
+    def __len__(self):
+        return self._size
+
+    def add(self, name: str, embedding: np.ndarray):
+        if self._size == len(self._matrix):
+            grown = np.zeros((2 * len(self._matrix), self.dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size] = _normalize(np.asarray(embedding, dtype=np.float32))
+        self._size += 1
+        self.names.append(name)
+
+    def search(self, embedding: np.ndarray, top_k: int = 1) -> List[Tuple[str, float]]:
+        """Returns the `top_k` best (name, cosine score) matches"""
+        if not self._size:
+            return []
+        scores = self._matrix[:self._size] @ _normalize(np.asarray(embedding, dtype=np.float32))
+        if top_k == 1:
+            best = int(np.argmax(scores))
+            return [(self.names[best], float(scores[best]))]
+        top_k = min(top_k, self._size)
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.names[i], float(scores[i])) for i in best]
+
+    def save(self, path: str):
+        np.savez(path, names=np.array(self.names), embeddings=self._matrix[:self._size])
+
+    @classmethod
+    def load(cls, path: str) -> "SpeakerIndex":
+        data = np.load(path)
+        embeddings = data["embeddings"]
+        index = cls(embeddings.shape[1], capacity=max(len(embeddings), 1))
+        for name, embedding in zip(data["names"], embeddings):
+            index.add(str(name), embedding)
+        return index
+
+
+@lru_cache()
+def _mel_banks() -> np.ndarray:
+    """Kaldi mel filterbank matrix (FBANK_MELS, FBANK_FFT // 2 + 1), 20 Hz to Nyquist"""
+    mel = lambda f: 1127.0 * np.log(1.0 + f / 700.0)
+    edges = np.linspace(mel(20.0), mel(SAMPLE_RATE / 2), FBANK_MELS + 2)
+    bins = mel(np.arange(FBANK_FFT // 2 + 1) * SAMPLE_RATE / FBANK_FFT)
+    left, center, right = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    banks = np.minimum((bins - left) / (center - left), (right - bins) / (right - center))
+    return np.maximum(banks, 0.0).astype(np.float32)
+
+
+def log_mel_fbank(audio: np.ndarray) -> np.ndarray:
+    """Kaldi-style log-mel filterbanks of PCM16 audio (frames, FBANK_MELS), as speaker models are trained on"""
+    if len(audio) < FBANK_FRAME:
+        return np.zeros((0, FBANK_MELS), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(audio.astype(np.float32), FBANK_FRAME)[::FBANK_HOP].copy()
+    frames -= frames.mean(axis=1, keepdims=True)
+    frames[:, 1:] -= 0.97 * frames[:, :-1]
+    frames[:, 0] *= 0.03
+    frames *= np.power(np.hanning(FBANK_FRAME), 0.85)  # Povey window
+    power = np.square(np.abs(np.fft.rfft(frames, FBANK_FFT)))
+    return np.log(np.maximum(power @ _mel_banks().T, np.finfo(np.float32).eps))
+
+
+class WakeFeatureEmbedder:
+    """
+    Mean of the wake word front-end embeddings: no extra model pass, but the
+    features are trained for keywords, not voices. Speakers separate poorly;
+    check them with scripts/eval_speaker_id.py before trusting the threshold.
+    """
+    name = "wake_features"
+    dim = 96
+
+    def window(self, detector, n_samples: int) -> np.ndarray:
+        frames = max(1, n_samples // FRAME_SAMPLES)
+        return detector.features.feature_buffer[-frames:].copy()
+
+    def embed(self, features: np.ndarray) -> np.ndarray:
+        return features.mean(axis=0)
+
+    def embed_audio(self, audio: np.ndarray) -> np.ndarray:
+        return SharedFeatures()._get_embeddings(audio).mean(axis=0)
+
+
+class SpeakerModelEmbedder:
+    """
+    Speaker verification ONNX model (e.g. a WeSpeaker ResNet/ECAPA export):
+    mean-normalized log-mel filterbanks in, one voice embedding out. It runs
+    on the raw audio the wake word front-end keeps, in a worker thread.
+    """
+    name = "speaker_model"
+
+    def __init__(self, path: str):
+        self.session = ort.InferenceSession(path, sess_options=session_options(), providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def window(self, detector, n_samples: int) -> np.ndarray:
+        return detector.recent_audio(n_samples)
+
+    def embed(self, audio: np.ndarray) -> np.ndarray:
+        features = log_mel_fbank(audio)
+        features -= features.mean(axis=0)
+        return self.session.run(None, {self.input_name: features[None]})[0].reshape(-1)
+
+    def embed_audio(self, audio: np.ndarray) -> np.ndarray:
+        return self.embed(audio)
+
+
+@lru_cache()
+def get_speaker_embedder():
+    """The speaker verification model if one is configured, else the wake word features"""
+    path = settings.SPEAKER_EMBEDDING_MODEL
+    if not path:
+        return WakeFeatureEmbedder()
+    if not os.path.isabs(path):
+        path = os.path.join(os.getcwd(), path)
+    embedder = SpeakerModelEmbedder(path)
+    logger.info("Loaded speaker embedding model: %s (%s dimensions)", os.path.basename(path), embedder.dim)
+    return embedder
+
+
+@lru_cache()
+def get_speaker_index() -> Optional[SpeakerIndex]:
+    """Loads the enrollment index once per process (None if no speaker is enrolled)"""
+    path = settings.SPEAKER_INDEX_PATH
+    if not os.path.isabs(path):
+        path = os.path.join(os.getcwd(), path)
+    if not os.path.exists(path):
+        logger.info("Speaker identification disabled (no enrollment index)")
+        return None
+    index = SpeakerIndex.load(path)
+    embedder = get_speaker_embedder()
+    if index.dim != embedder.dim:
+        logger.error("Speaker identification disabled: the index holds %s-dimension embeddings, %s gives %s "
+                     "(re-enroll with scripts/enroll_speaker.py)",
+                     index.dim, embedder.name, embedder.dim)
+        return None
+    logger.info("Loaded speaker index: %s embeddings, %s speakers", len(index), len(set(index.names)))
+    return index
+
+
+class SpeakerIdentifier:
+    """
+    Speaker identification for one connection, once per awake period.
+    The window starts with the wake word itself (SPEAKER_ID_PREROLL_S before
+    the detection) and covers the audio held during the wake arbitration and
+    the first SPEAKER_ID_WINDOW_S of the utterance. Everything in it has been
+    through the wake word front-end already, so the window is taken from the
+    detector's buffers; the embedding and lookup run off the event loop.
+    """
+    def __init__(self, index: SpeakerIndex, embedder=None):
+        self.index = index
+        self.embedder = embedder or get_speaker_embedder()
+        self.window_samples = max(FRAME_SAMPLES, int(settings.SPEAKER_ID_WINDOW_S * SAMPLE_RATE))
+        self.preroll_samples = int(settings.SPEAKER_ID_PREROLL_S * SAMPLE_RATE)
+        self.threshold = settings.SPEAKER_ID_THRESHOLD
+        self._seen = 0
+        self.active = False
+
+    def start(self, held_samples: int = 0):
+        """Starts a new identification (called on wake, with the audio held since the detection)"""
+        self._seen = held_samples
+        self.active = True
+
+    def update(self, n_samples: int) -> bool:
+        """Counts awake audio, True once the window is complete (then call identify)"""
+        if not self.active:
+            return False
+        self._seen += n_samples
+        if self._seen < self.window_samples:
+            return False
+        self.active = False
+        return True
+
+    async def identify(self, detector) -> Tuple[Optional[str], float]:
+        """Returns (speaker or None, score) for the window that just completed"""
+        window = self.embedder.window(detector, self.preroll_samples + self._seen)
+        embedding = await asyncio.get_running_loop().run_in_executor(None, self.embedder.embed, window)
+        matches = self.index.search(embedding)
+        if not matches:
+            return None, 0.0
+        name, score = matches[0]
+        return (name if score >= self.threshold else None), score
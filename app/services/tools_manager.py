@@ -1,8 +1,34 @@
-from typing import Dict, Any, Callable
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional
 from app.core.logging import logging
 
 logger = logging.getLogger(__name__)
 
+class ToolIntent:
+    """
+    Spoken forms of a tool, for the local fast path.
+    `phrases` maps a phrase to the tool arguments it implies; a phrase may
+    contain an {entity} slot, filled with each name of `entities` (which adds
+    its own arguments). `confirmation` is spoken after the tool has run, formatted
+    with the arguments and the tool's `result`.
+    """
+    def __init__(self, tool: str, phrases: Dict[str, Dict[str, Any]],
+                 entities: Optional[Dict[str, Dict[str, Any]]] = None, confirmation: str = "{result}"):
+        self.tool = tool
+        self.phrases = phrases
+        self.entities = entities or {}
+        self.confirmation = confirmation
+
+    def expansions(self):
+        """Yields (phrase, arguments) with every entity slot filled"""
+        for phrase, args in self.phrases.items():
+            if "{entity}" not in phrase:
+                yield phrase, dict(args)
+                continue
+            for entity, entity_args in self.entities.items():
+                yield phrase.replace("{entity}", entity), {**args, **entity_args}
+
+
 class ToolsManager:
     """
     Manages the registration and execution of tools (functions) 
@@ -10,11 +36,18 @@ class ToolsManager:
     """
     def __init__(self):
         self._tools: Dict[str, Callable] = {}
+        self._intents: Dict[str, ToolIntent] = {}
 
-    def register_tool(self, name: str, func: Callable):
-        """Registers a new tool"""
-        logger.info(f"Registering tool: {name}")
+    def register_tool(self, name: str, func: Callable, phrases: Optional[Dict[str, Dict[str, Any]]] = None,
+                      entities: Optional[Dict[str, Dict[str, Any]]] = None, confirmation: str = "{result}"):
+        """Registers a new tool (with phrases, it can also be triggered by the local fast path)"""
+        logger.info("Registering tool: %s", name)
         self._tools[name] = func
+        if phrases:
+            self._intents[name] = ToolIntent(name, phrases, entities, confirmation)
+
+    def intents(self) -> List[ToolIntent]:
+        return list(self._intents.values())
 
     def get_tool_definitions(self):
         """Returns the definitions (schemas) of registered tools for the LLM"""
@@ -24,12 +57,21 @@ class ToolsManager:
     async def execute_tool(self, name: str, args: Dict[str, Any]):
         """Executes a tool by name"""
         if name not in self._tools:
-            logger.error(f"Tool not found: {name}")
+            logger.error("Tool not found: %s", name)
             return None
-        logger.info(f"Executing tool: {name} with args: {args}")
+        logger.info("Executing tool: %s with args: %s", name, args)
         try:
             # Handle async vs sync tools if needed
             return await self._tools[name](**args)
         except Exception as e:
-            logger.error(f"Error executing tool {name}: {e}")
+            logger.error("Error executing tool %s: %s", name, e)
             raise e
+
+
+@lru_cache()
+def get_tools_manager() -> ToolsManager:
+    """Process-wide tools (home tools registered)"""
+    from app.services.home_tools import register_home_tools
+    manager = ToolsManager()
+    register_home_tools(manager)
+    return manager
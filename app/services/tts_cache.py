@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+from app.core.config import get_settings
+from app.services.tts_postprocess import get_tts_postprocessor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class TTSCache:
+    """
+    Process-wide LRU of synthesized sentences, for the short fixed answers
+    of the local fast path (a hit costs no TTS round trip at all).
+    Entries are stored post-processed, as (audio, codec). A sentence being
+    synthesized is shared by every caller asking for it meanwhile.
+    """
+    def __init__(self, max_entries: Optional[int] = None, postprocessor=None):
+        self.max_entries = max_entries if max_entries is not None else settings.TTS_CACHE_ENTRIES
+        self.postprocessor = postprocessor or get_tts_postprocessor()
+        self._audio: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._prewarm_task = None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    async def synthesize(self, text: str, tts_service):
+        audio = self._audio.get(text)
+        if audio is not None:
+            self._audio.move_to_end(text)
+            self.hits += 1
+            return audio
+        inflight = self._inflight.get(text)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+        self.misses += 1
+        return await self._synthesize(text, tts_service)
+
+    async def _synthesize(self, text: str, tts_service):
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[text] = future
+        audio = None
+        try:
+            audio = await tts_service.synthesize(text)
+            if audio:
+                audio = self._audio[text] = self.postprocessor.process(audio)
+                while len(self._audio) > self.max_entries:
+                    self._audio.popitem(last=False)
+            return audio or None
+        finally:
+            del self._inflight[text]
+            future.set_result(audio or None)
+
+    def prewarm(self, texts: Iterable[str], tts_service) -> asyncio.Task:
+        """Synthesizes the fixed sentences once per process (later calls get the same task)"""
+        if self._prewarm_task is None:
+            self._prewarm_task = asyncio.ensure_future(self._prewarm(list(texts), tts_service))
+        return self._prewarm_task
+
+    async def _prewarm(self, texts, tts_service):
+        for text in texts:
+            if text not in self._audio and text not in self._inflight:
+                await self._synthesize(text, tts_service)
+        logger.info("TTS cache warm (%s sentences)", len(self._audio))
+
+    def snapshot(self):
+        return {
+            "entries": len(self._audio),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+@lru_cache()
+def get_tts_cache() -> TTSCache:
+    return TTSCache()
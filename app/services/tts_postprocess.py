@@ -0,0 +1,167 @@
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple
+import numpy as np
+from app.core.config import get_settings
+from app.core.protocol import Codec
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+TTS_RATE = 24000   # TTSService requests LINEAR16 at 24kHz (Codec.PCM16_24K)
+FRAME_MS = 10      # Silence is detected per 10 ms frame
+FULL_SCALE = 32768.0
+
+
+def parse_wav(data: bytes) -> Optional[Tuple[int, memoryview]]:
+    """(sample rate, PCM view) of a mono PCM16 WAV blob, None for anything else"""
+    view = memoryview(data)
+    if len(view) < 12 or bytes(view[:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+        return None
+    rate = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = int.from_bytes(view[offset + 4:offset + 8], "little")
+        body = view[offset + 8:offset + 8 + chunk_size]
+        if chunk_id == b"fmt ":
+            if len(body) < 16:
+                return None
+            audio_format, channels = int.from_bytes(body[0:2], "little"), int.from_bytes(body[2:4], "little")
+            bits = int.from_bytes(body[14:16], "little")
+            if (audio_format, channels, bits) != (1, 1, 16):
+                return None
+            rate = int.from_bytes(body[4:8], "little")
+        elif chunk_id == b"data":
+            if rate is None:
+                return None
+            # Streamed WAVs may carry a placeholder size: the data runs to the end
+            return rate, body[:len(body) - len(body) % 2]
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+class TTSPostProcessor:
+    """
+    Post-processing of every synthesized sentence before it is queued:
+    the WAV container is stripped (the satellite gets raw PCM16 24kHz), the
+    near-silence Chirp3-HD puts around the voice is trimmed down to a short
+    margin, and the level is optionally normalized so consecutive sentences
+    play at the same volume. The leading silence removed from the first
+    sentence of an answer is audio the satellite no longer has to play
+    before the first word; later sentences keep up to `sentence_gap_ms` of
+    it, so the pauses between sentences stay natural.
+    """
+    def __init__(self, threshold_dbfs: Optional[float] = None, margin_ms: Optional[int] = None,
+                 normalize: Optional[bool] = None, target_dbfs: Optional[float] = None,
+                 max_gain_db: Optional[float] = None, sentence_gap_ms: Optional[int] = None):
+        self.threshold_dbfs = threshold_dbfs if threshold_dbfs is not None else settings.TTS_TRIM_THRESHOLD_DBFS
+        self.margin_ms = margin_ms if margin_ms is not None else settings.TTS_TRIM_MARGIN_MS
+        self.sentence_gap_ms = sentence_gap_ms if sentence_gap_ms is not None else settings.TTS_SENTENCE_GAP_MS
+        self.normalize = normalize if normalize is not None else settings.TTS_NORMALIZE
+        self.target_dbfs = target_dbfs if target_dbfs is not None else settings.TTS_TARGET_DBFS
+        self.max_gain_db = max_gain_db if max_gain_db is not None else settings.TTS_MAX_GAIN_DB
+
+        # Statistics (time to audible: first sentences only)
+        self.sentences = 0
+        self.first_sentences = 0
+        self.passthrough = 0
+        self.leading_trimmed_ms = 0.0
+        self.trailing_trimmed_ms = 0.0
+        self.bytes_saved = 0
+        self.last_leading_trimmed_ms = 0.0
+
+    def process(self, audio: bytes, first: bool = True) -> Tuple[bytes, int]:
+        """
+        Returns (audio, codec): raw PCM16 24kHz when the input is a WAV it can
+        handle, else unchanged. `first`: first sentence of an answer.
+        """
+        parsed = parse_wav(audio)
+        if parsed is None or parsed[0] != TTS_RATE:
+            self.passthrough += 1
+            return audio, Codec.WAV
+        rate, pcm = parsed
+        samples = np.frombuffer(pcm, dtype=np.int16)
+
+        start, end = self._voiced_span(samples, rate, self.margin_ms if first else self.sentence_gap_ms)
+        trimmed = samples[start:end]
+        if self.normalize and len(trimmed):
+            trimmed = self._normalized(trimmed, rate)
+
+        leading_ms = 1000 * start / rate
+        trailing_ms = 1000 * (len(samples) - end) / rate
+        self.sentences += 1
+        self.trailing_trimmed_ms += trailing_ms
+        self.bytes_saved += len(audio) - 2 * len(trimmed)
+        if first:
+            self.first_sentences += 1
+            self.leading_trimmed_ms += leading_ms
+            self.last_leading_trimmed_ms = leading_ms
+            logger.debug("TTS post-processing: %.0f ms earlier to audible (%.0f ms trimmed at the end, %.2f s kept)",
+                         leading_ms, trailing_ms, len(trimmed) / rate)
+        else:
+            logger.debug("TTS post-processing: %.0f ms trimmed before, %.0f ms after the sentence",
+                         leading_ms, trailing_ms)
+        return trimmed.tobytes(), Codec.PCM16_24K
+
+    def _frame_dbfs(self, samples: np.ndarray, rate: int) -> np.ndarray:
+        """Peak level of every frame (dBFS), vectorized over the sentence"""
+        frame = rate * FRAME_MS // 1000
+        n_frames = len(samples) // frame
+        frames = samples[:n_frames * frame].reshape(n_frames, frame)
+        if len(samples) % frame:
+            # The partial last frame, padded with silence
+            tail = np.zeros((1, frame), dtype=np.int16)
+            tail[0, :len(samples) % frame] = samples[n_frames * frame:]
+            frames = np.concatenate([frames, tail])
+        peaks = np.abs(frames.astype(np.int32)).max(axis=1)
+        return 20 * np.log10(np.maximum(peaks, 1) / FULL_SCALE)
+
+    def _voiced_span(self, samples: np.ndarray, rate: int, lead_ms: int) -> Tuple[int, int]:
+        """Sample range from the first to the last frame above the threshold, `lead_ms` before and the margin after"""
+        if not len(samples):
+            return 0, 0
+        voiced = np.flatnonzero(self._frame_dbfs(samples, rate) > self.threshold_dbfs)
+        if not len(voiced):
+            return 0, len(samples)  # Nothing above the threshold: left as is
+        frame = rate * FRAME_MS // 1000
+        margin = rate * self.margin_ms // 1000
+        start = max(0, int(voiced[0]) * frame - rate * lead_ms // 1000)
+        end = min(len(samples), (int(voiced[-1]) + 1) * frame + margin)
+        return start, end
+
+    def _normalized(self, samples: np.ndarray, rate: int) -> np.ndarray:
+        """Gain to the target RMS level (voiced frames only, pauses do not count), never clipping"""
+        frame = rate * FRAME_MS // 1000
+        n_frames = len(samples) // frame
+        if not n_frames:
+            return samples
+        frames = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float32)
+        voiced = frames[self._frame_dbfs(samples[:n_frames * frame], rate) > self.threshold_dbfs]
+        if not len(voiced):
+            return samples
+        rms = np.sqrt(np.mean(np.square(voiced)))
+        peak = np.abs(samples.astype(np.int32)).max()
+        gain_db = self.target_dbfs - 20 * np.log10(max(rms, 1.0) / FULL_SCALE)
+        gain = min(10 ** (min(gain_db, self.max_gain_db) / 20), 32767 / max(peak, 1))
+        if abs(gain - 1.0) < 0.01:
+            return samples
+        return np.round(samples.astype(np.float32) * gain).astype(np.int16)
+
+    def snapshot(self):
+        sentences = self.sentences or 1
+        return {
+            "sentences": self.sentences,
+            "first_sentences": self.first_sentences,
+            "passthrough": self.passthrough,
+            "time_to_audible_saved_ms_avg": round(self.leading_trimmed_ms / (self.first_sentences or 1), 1),
+            "time_to_audible_saved_ms_last": round(self.last_leading_trimmed_ms, 1),
+            "trailing_trimmed_ms_avg": round(self.trailing_trimmed_ms / sentences, 1),
+            "bytes_saved": self.bytes_saved,
+            "normalize": self.normalize,
+        }
+
+
+@lru_cache()
+def get_tts_postprocessor() -> TTSPostProcessor:
+    return TTSPostProcessor()
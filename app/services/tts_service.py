@@ -46,5 +46,5 @@ class TTSService:
             return response.audio_content
             
         except Exception as e:
-            logger.error(f"TTS Synthesis error: {e}")
+            logger.error("TTS Synthesis error: %s", e)
             return None
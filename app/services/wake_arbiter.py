@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DEFAULT_GROUP = "home"
+
+
+class _Candidate:
+    def __init__(self, connection_id: str, satellite_id: Optional[str], score: float):
+        self.connection_id = connection_id
+        self.satellite_id = satellite_id
+        self.score = score
+        self.submitted_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class WakeArbiter:
+    """
+    Server-wide wake arbitration: when one utterance wakes several satellites
+    of the same room group, only the best-scoring one opens a turn.
+    Wake events are collected during a short window starting at the first one;
+    satellites hold their awake audio until the decision, so the losers go
+    back to sleep before anything reaches Gemini.
+    """
+    def __init__(self, window_ms: Optional[int] = None):
+        self.window = (window_ms if window_ms is not None else settings.WAKE_ARBITRATION_WINDOW_MS) / 1000
+        self._groups: Dict[str, set] = {}               # group -> connected connection ids
+        self._rounds: Dict[str, List[_Candidate]] = {}  # group -> candidates of the open round
+        self._last_win: Dict[str, tuple] = {}           # group -> (round start, winner connection id)
+
+        # Statistics
+        self.decisions = 0
+        self.contested = 0
+        self.suppressed = 0
+        self.uncontested_fast_path = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    @staticmethod
+    def group_of(satellite_id: Optional[str]) -> str:
+        return settings.SATELLITE_ROOMS.get(satellite_id, DEFAULT_GROUP) if satellite_id else DEFAULT_GROUP
+
+    def register(self, connection_id: str, satellite_id: Optional[str]):
+        self._groups.setdefault(self.group_of(satellite_id), set()).add(connection_id)
+
+    def unregister(self, connection_id: str):
+        for members in self._groups.values():
+            members.discard(connection_id)
+
+    async def submit(self, connection_id: str, satellite_id: Optional[str], score: float) -> bool:
+        """Submits a wake event, returns True if this satellite wins the turn"""
+        group = self.group_of(satellite_id)
+        now = time.monotonic()
+
+        # Late detection of an utterance that already woke another satellite
+        last = self._last_win.get(group)
+        if last and now - last[0] < 2 * self.window and last[1] != connection_id:
+            self.suppressed += 1
+            logger.info("Wake arbitration [%s]: late wake from %s suppressed", group, satellite_id or connection_id)
+            return False
+
+        # Alone in its group: nothing to arbitrate, no added latency
+        if group not in self._rounds and len(self._groups.get(group, ())) <= 1:
+            self.uncontested_fast_path += 1
+            self._record_decision(group, now, connection_id, 0.0)
+            return True
+
+        candidate = _Candidate(connection_id, satellite_id, score)
+        if group not in self._rounds:
+            self._rounds[group] = []
+            asyncio.get_running_loop().call_later(self.window, self._resolve, group, now)
+        self._rounds[group].append(candidate)
+        return await candidate.future
+
+    def _resolve(self, group: str, started_at: float):
+        candidates = self._rounds.pop(group, [])
+        if not candidates:
+            return
+        winner = max(candidates, key=lambda c: (c.score, -c.submitted_at))
+        latency = time.monotonic() - started_at
+        self._record_decision(group, started_at, winner.connection_id, latency)
+        if len(candidates) > 1:
+            self.contested += 1
+            self.suppressed += len(candidates) - 1
+            logger.info("Wake arbitration [%s]: %s wins (score %.3f) over %s satellite(s) in %.0f ms",
+                        group, winner.satellite_id or winner.connection_id, winner.score, len(candidates) - 1,
+                        1000 * latency)
+        for candidate in candidates:
+            if not candidate.future.done():
+                candidate.future.set_result(candidate is winner)
+
+    def _record_decision(self, group: str, started_at: float, winner: str, latency: float):
+        self._last_win[group] = (started_at, winner)
+        self.decisions += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def snapshot(self):
+        return {
+            "window_ms": round(1000 * self.window),
+            "groups": {group: len(members) for group, members in self._groups.items()},
+            "decisions": self.decisions,
+            "contested": self.contested,
+            "suppressed_wakes": self.suppressed,
+            "uncontested_fast_path": self.uncontested_fast_path,
+            "latency_ms_avg": round(1000 * self.latency_total / self.decisions, 2) if self.decisions else 0.0,
+            "latency_ms_max": round(1000 * self.latency_max, 2),
+        }
+
+
+@lru_cache()
+def get_wake_arbiter() -> WakeArbiter:
+    return WakeArbiter()
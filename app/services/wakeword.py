@@ -0,0 +1,470 @@
+import logging
+import os
+import time
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import onnxruntime as ort
+import openwakeword
+from openwakeword.utils import AudioFeatures
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+FRAME_SAMPLES = 1280  # One embedding frame (80 ms @ 16kHz)
+WARMUP_FRAMES = 5     # Scores are forced to 0 while the feature buffer fills (as openwakeword does)
+GATE_BANDS = 16
+INT8_SUFFIX = ".int8.onnx"
+
+# Wake engine settings recorded with sessions (see engine_settings)
+ENGINE_SETTINGS = ("WAKEWORD_MODELS", "WAKEWORD_DEBOUNCE_S", "SATELLITE_WAKEWORDS", "WAKEWORD_INT8",
+                   "WAKE_GATE_ENABLED", "WAKE_GATE_MARGIN_DB", "WAKE_GATE_FLUX_DB", "WAKE_GATE_HANGOVER_S",
+                   "WAKE_GATE_PREROLL_S", "ORT_GRAPH_OPTIMIZATION")
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+# Gate counters, summed over every detector (exposed through /stats/wakeword)
+# Gated and skipped audio is counted in samples (chunks vary in size), reported in FRAME_SAMPLES frames
+_gate_totals = {"samples": 0, "skipped_samples": 0, "model_frames": 0, "model_s": 0.0, "gate_s": 0.0,
+                "replayed_frames": 0}
+
+
+def gate_stats():
+    """Skip rate of the wake word gate and an estimate of the CPU time it saved"""
+    totals = _gate_totals
+    frames = totals["samples"] / FRAME_SAMPLES
+    skipped_frames = totals["skipped_samples"] / FRAME_SAMPLES
+    model_ms = 1000 * totals["model_s"] / totals["model_frames"] if totals["model_frames"] else 0.0
+    saved_s = (skipped_frames - totals["replayed_frames"]) * model_ms / 1000 - totals["gate_s"]
+    return {
+        "enabled": settings.WAKE_GATE_ENABLED,
+        "frames": int(frames),
+        "skipped_frames": int(skipped_frames),
+        "skip_rate": round(skipped_frames / frames, 4) if frames else 0.0,
+        "replayed_frames": totals["replayed_frames"],
+        "model_ms_per_frame": round(model_ms, 3),
+        "gate_us_per_frame": round(1e6 * totals["gate_s"] / frames, 1) if frames else 0.0,
+        "cpu_saved_s": round(max(0.0, saved_s), 3),
+    }
+
+
+def model_name(path: str) -> str:
+    """Wake word name used in settings and logs: the model file stem"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def session_options() -> ort.SessionOptions:
+    """ONNX Runtime session options from the settings"""
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = settings.ORT_INTRA_OP_THREADS
+    options.inter_op_num_threads = settings.ORT_INTER_OP_THREADS
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[settings.ORT_GRAPH_OPTIMIZATION]
+    options.enable_cpu_mem_arena = settings.ORT_CPU_MEM_ARENA
+    options.execution_mode = EXECUTION_MODES[settings.ORT_EXECUTION_MODE]
+    return options
+
+
+def int8_path(path: str) -> str:
+    return os.path.splitext(path)[0] + INT8_SUFFIX
+
+
+def model_variant(path: str, int8: Optional[bool] = None) -> str:
+    """Returns the INT8 variant of a model if it is enabled and has been generated"""
+    if not (settings.WAKEWORD_INT8 if int8 is None else int8):
+        return path
+    quantized = int8_path(path)
+    if os.path.exists(quantized):
+        return quantized
+    logger.warning("No INT8 variant of %s (run scripts/quantize_wakeword.py), using fp32", os.path.basename(path))
+    return path
+
+
+def feature_model_paths() -> Tuple[str, str]:
+    """Paths of the openwakeword melspectrogram and embedding ONNX models"""
+    models = openwakeword.FEATURE_MODELS
+    return tuple(models[name]["model_path"].replace(".tflite", ".onnx") for name in ("melspectrogram", "embedding"))
+
+
+@lru_cache()
+def feature_sessions(int8: Optional[bool] = None) -> Tuple[ort.InferenceSession, ort.InferenceSession]:
+    """
+    Melspectrogram and embedding sessions, shared by every detector
+    (the streaming state lives in AudioFeatures, the sessions are stateless).
+    """
+    sessions = []
+    for path in feature_model_paths():
+        path = model_variant(path, int8)
+        sessions.append(ort.InferenceSession(path, sess_options=session_options(), providers=["CPUExecutionProvider"]))
+        logger.info("Loaded feature model: %s", os.path.basename(path))
+    return tuple(sessions)
+
+
+class SharedFeatures(AudioFeatures):
+    """
+    openwakeword's streaming front-end on the shared feature sessions.
+    AudioFeatures.__init__ opens its own melspectrogram/embedding sessions and
+    runs a 4 s warm-up embedding pass; here the sessions come from
+    feature_sessions() and the warm-up buffer is computed once per process.
+    Only the streaming buffers are per connection.
+    """
+    _initial_features = None
+
+    def __init__(self, sr: int = 16000):
+        self.melspec_model, self.embedding_model = feature_sessions()
+        self.onnx_execution_provider = self.melspec_model.get_providers()[0]
+        self.melspec_model_predict = lambda x: self.melspec_model.run(None, {"input": x})
+        self.embedding_model_predict = lambda x: self.embedding_model.run(None, {"input_1": x})[0].squeeze()
+        self.raw_data_buffer = deque(maxlen=sr * 10)
+        self.melspectrogram_max_len = 10 * 97  # 97 frames per second of 16kHz audio
+        self.feature_buffer_max_len = 120      # ~10 s of embeddings
+        self.reset()
+
+    def reset(self):
+        self.raw_data_buffer.clear()
+        self.melspectrogram_buffer = np.ones((76, 32))
+        self.accumulated_samples = 0
+        self.raw_data_remainder = np.empty(0)
+        if SharedFeatures._initial_features is None:
+            # Fixed seed: a replayed recording gives bit-identical scores
+            noise = np.random.default_rng(0).integers(-1000, 1000, 16000 * 4).astype(np.int16)
+            SharedFeatures._initial_features = self._get_embeddings(noise)
+        self.feature_buffer = SharedFeatures._initial_features.copy()
+
+
+class WakeWordHead:
+    """
+    A wake word classifier head (the small model run on top of the shared
+    melspectrogram/embedding front-end). Heads are stateless, so a single
+    ONNX session per model is shared by every connection.
+    """
+    def __init__(self, path: str, int8: Optional[bool] = None):
+        self.name = model_name(path)
+        self.path = model_variant(path, int8)
+        self.session = ort.InferenceSession(self.path, sess_options=session_options(), providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.n_frames = self.session.get_inputs()[0].shape[1]
+        self.threshold = settings.WAKEWORD_THRESHOLDS.get(self.name, settings.WAKEWORD_THRESHOLD)
+
+    def run(self, features: np.ndarray) -> float:
+        """Scores one feature window, shape (1, n_frames, 96)"""
+        return float(self.session.run(None, {self.input_name: features})[0][0, 0])
+
+
+@lru_cache()
+def load_heads() -> Dict[str, WakeWordHead]:
+    """Loads every configured wake word model once per process"""
+    heads = {}
+    for path in settings.WAKEWORD_MODELS:
+        if not os.path.isabs(path):
+            path = os.path.join(os.getcwd(), path)
+        head = WakeWordHead(path)
+        heads[head.name] = head
+        logger.info("Loaded wake word model: %s (threshold %s)", head.name, head.threshold)
+    return heads
+
+
+def engine_settings() -> dict:
+    """Settings the wake engine is built from, recorded with sessions so a replay rebuilds the same detector"""
+    recorded = {name: getattr(settings, name) for name in ENGINE_SETTINGS}
+    recorded["WAKEWORD_THRESHOLDS"] = {name: head.threshold for name, head in load_heads().items()}
+    return recorded
+
+
+class HeadGroup:
+    """
+    Heads sharing an input window length, merged into one ONNX graph
+    (one shared input with a free batch dimension, one score column per head):
+    a single run scores every head on every window of the frame.
+    Without the `onnx` package, or if the heads cannot be merged (different
+    opsets, a graph that does not accept a batch), they run one call per
+    window instead.
+    """
+    def __init__(self, heads: List[WakeWordHead]):
+        self.heads = heads
+        self.names = [head.name for head in heads]
+        self.n_frames = heads[0].n_frames
+        self.session = None
+        try:
+            self.session = ort.InferenceSession(self._merged_model(), sess_options=session_options(),
+                                                providers=["CPUExecutionProvider"])
+            self._check()
+        except ImportError:
+            logger.info("onnx is not installed: wake word heads are scored one call per window (pip install onnx)")
+            self.session = None
+        except Exception as e:
+            logger.warning("Cannot batch wake word heads %s: %s", self.names, e)
+            self.session = None
+
+    def run(self, windows: np.ndarray) -> np.ndarray:
+        """Scores windows of shape (n_windows, n_frames, 96), returns (n_windows, n_heads)"""
+        if self.session is not None:
+            return self.session.run(None, {"features": windows})[0]
+        return np.array([[head.run(window[None]) for head in self.heads] for window in windows])
+
+    def _merged_model(self) -> bytes:
+        import onnx
+        from onnx import TensorProto, compose, helper
+
+        models = [onnx.load(head.path) for head in self.heads]
+        opsets = {tuple((opset.domain, opset.version) for opset in model.opset_import) for model in models}
+        if len(opsets) > 1:
+            raise ValueError("different opsets")
+        nodes, initializers, outputs = [], [], []
+        for i, model in enumerate(models):
+            graph = compose.add_prefix(model, f"head{i}/").graph
+            head_input = graph.input[0].name
+            for node in graph.node:
+                node.input[:] = ["features" if name == head_input else name for name in node.input]
+            nodes.extend(graph.node)
+            initializers.extend(graph.initializer)
+            outputs.append(graph.output[0].name)
+        nodes.append(helper.make_node("Concat", outputs, ["scores"], axis=1))
+        graph = helper.make_graph(
+            nodes, "wakeword_heads",
+            [helper.make_tensor_value_info("features", TensorProto.FLOAT, ["windows", self.n_frames, 96])],
+            [helper.make_tensor_value_info("scores", TensorProto.FLOAT, ["windows", len(self.heads)])],
+            initializers)
+        merged = helper.make_model(graph, opset_imports=models[0].opset_import)
+        merged.ir_version = models[0].ir_version
+        return merged.SerializeToString()
+
+    def _check(self):
+        """The merged graph must give each head's own scores, for more than one window"""
+        windows = np.random.default_rng(0).standard_normal((2, self.n_frames, 96)).astype(np.float32)
+        batched = self.run(windows)
+        single = np.array([[head.run(window[None]) for head in self.heads] for window in windows])
+        if not np.allclose(batched, single, atol=1e-4):
+            raise ValueError(f"batched scores differ by {np.abs(batched - single).max():.2e}")
+
+
+@lru_cache()
+def head_groups(heads: Tuple[WakeWordHead, ...]) -> List[HeadGroup]:
+    """Groups heads that can share one batched run, once per set of heads (per satellite subset)"""
+    groups = {}
+    for head in heads:
+        groups.setdefault(head.n_frames, []).append(head)
+    return [HeadGroup(group) for group in groups.values()]
+
+
+def heads_for_satellite(satellite_id: Optional[str]) -> List[WakeWordHead]:
+    """Returns the wake words enabled on a satellite (all of them unless a subset is configured)"""
+    heads = load_heads()
+    names = settings.SATELLITE_WAKEWORDS.get(satellite_id) if satellite_id else None
+    if not names:
+        return list(heads.values())
+    unknown = [name for name in names if name not in heads]
+    if unknown:
+        logger.warning("Satellite %s: unknown wake word(s) %s", satellite_id, unknown)
+    return [heads[name] for name in names if name in heads]
+
+
+class WakeGate:
+    """
+    Cheap first stage of the wake word cascade.
+    Opens on frame energy above an adaptive noise floor (fast to fall, slow to
+    rise, so speech barely moves it) or on a spectral flux onset, measured on
+    band energies of one FFT per frame. A hangover keeps it open after the
+    last active frame so the models see the end of the wake word.
+    """
+    def __init__(self):
+        self.margin_db = settings.WAKE_GATE_MARGIN_DB
+        self.flux_db = settings.WAKE_GATE_FLUX_DB
+        self.hangover_frames = max(1, round(settings.WAKE_GATE_HANGOVER_S * 16000 / FRAME_SAMPLES))
+        self._band_edges = {}  # Frame length -> rfft band start indices
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = None
+        self._prev_bands = None
+        self._hangover = 0
+        self.is_open = False
+
+    def update(self, audio: np.ndarray) -> bool:
+        """Returns True if the frame should go through the models"""
+        x = audio.astype(np.float32)
+        energy_db = 10 * np.log10(np.mean(x * x) + 1.0)
+        edges = self._band_edges.get(len(x))
+        if edges is None:
+            edges = self._band_edges[len(x)] = np.linspace(0, len(x) // 2 + 1, GATE_BANDS + 1)[:-1].astype(np.intp)
+        spectrum = np.abs(np.fft.rfft(x)) ** 2
+        bands = 10 * np.log10(np.add.reduceat(spectrum, edges) + 1.0)
+        flux = float(np.mean(np.maximum(bands - self._prev_bands, 0.0))) if self._prev_bands is not None else 0.0
+        self._prev_bands = bands
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy_db
+        elif energy_db < self.noise_floor_db:
+            self.noise_floor_db += 0.5 * (energy_db - self.noise_floor_db)
+        else:
+            self.noise_floor_db += 0.01 * (energy_db - self.noise_floor_db)
+
+        if energy_db > self.noise_floor_db + self.margin_db or flux > self.flux_db:
+            self._hangover = self.hangover_frames
+        elif self._hangover:
+            self._hangover -= 1
+        self.is_open = self._hangover > 0
+        return self.is_open
+
+
+class _PreRoll:
+    """Ring buffer of the audio the front-end did not see while the gate was closed"""
+    def __init__(self, seconds: float):
+        self._buf = np.zeros(int(seconds * 16000), dtype=np.int16)
+        self._pos = 0
+        self._count = 0
+
+    def append(self, audio: np.ndarray):
+        size, n = len(self._buf), len(audio)
+        if n >= size:
+            self._buf[:] = audio[-size:]
+            self._pos = 0
+        else:
+            end = self._pos + n
+            if end <= size:
+                self._buf[self._pos:end] = audio
+            else:
+                k = size - self._pos
+                self._buf[self._pos:] = audio[:k]
+                self._buf[:n - k] = audio[k:]
+            self._pos = end % size
+        self._count = min(self._count + n, size)
+
+    def take(self) -> np.ndarray:
+        """Returns the buffered samples in order and empties the buffer"""
+        n, self._count = self._count, 0
+        start = (self._pos - n) % len(self._buf)
+        if start + n <= len(self._buf):
+            return self._buf[start:start + n]
+        return np.concatenate((self._buf[start:], self._buf[:self._pos]))
+
+
+class WakeWordDetector:
+    """
+    Streaming wake word detection for one satellite.
+    The melspectrogram + embedding front-end runs once per frame whatever the
+    number of wake words; the heads then score the feature windows together,
+    one batched ONNX run per window length (HeadGroup).
+    Thresholds and debounce are applied per wake word.
+    With the gate enabled, frames the gate rejects skip the models entirely;
+    they are kept in a pre-roll and replayed into the front-end when the gate
+    opens, so the feature window is the same as if every frame had been seen.
+    Under load the replay can be turned off (replay_preroll), and several frames
+    can be scored by their latest window only (latest_only).
+    """
+    def __init__(self, satellite_id: Optional[str] = None, gate: Optional[bool] = None):
+        self.features = SharedFeatures()
+        self.debounce = settings.WAKEWORD_DEBOUNCE_S
+        use_gate = settings.WAKE_GATE_ENABLED if gate is None else gate
+        self.gate = WakeGate() if use_gate else None
+        self._preroll = _PreRoll(settings.WAKE_GATE_PREROLL_S) if use_gate else None
+        self.replay_preroll = True
+        self.select(satellite_id)
+
+    def select(self, satellite_id: Optional[str]):
+        """(Re)selects the wake words enabled for a satellite"""
+        self.use_heads(heads_for_satellite(satellite_id))
+
+    def use_heads(self, heads: List[WakeWordHead]):
+        """Scores these heads, batched per window length"""
+        self.heads = heads
+        self.groups = head_groups(tuple(heads))
+        self.scores = {head.name: 0.0 for head in self.heads}
+        self.thresholds = {head.name: head.threshold for head in self.heads}
+        self.last_detection = {head.name: 0.0 for head in self.heads}
+        self.frames = 0
+        self.new_frames = 0
+
+    def reset(self):
+        self.features.reset()
+        self.scores = {name: 0.0 for name in self.scores}
+        self.frames = 0
+        if self.gate:
+            self.gate.reset()
+            self._preroll.take()
+
+    def predict(self, audio: np.ndarray, latest_only: bool = False) -> Dict[str, float]:
+        """Feeds PCM16 samples, returns the latest score of each wake word"""
+        if self.gate:
+            _gate_totals["samples"] += len(audio)
+            start = time.perf_counter()
+            was_open = self.gate.is_open
+            is_open = self.gate.update(audio)
+            _gate_totals["gate_s"] += time.perf_counter() - start
+            if not is_open:
+                self._preroll.append(audio)
+                _gate_totals["skipped_samples"] += len(audio)
+                self.new_frames = 0
+                if was_open:
+                    for name in self.scores:
+                        self.scores[name] = 0.0
+                return self.scores
+            if not was_open:
+                # Bring the streaming front-end up to date with the audio it skipped
+                replay = self._preroll.take()
+                if len(replay) and self.replay_preroll:
+                    replayed = self.features(replay) // FRAME_SAMPLES
+                    self.frames += replayed
+                    _gate_totals["replayed_frames"] += replayed
+
+        start = time.perf_counter()
+        scores = self._predict(audio, latest_only)
+        if self.new_frames:
+            _gate_totals["model_frames"] += self.new_frames
+            _gate_totals["model_s"] += time.perf_counter() - start
+        return scores
+
+    def _predict(self, audio: np.ndarray, latest_only: bool = False) -> Dict[str, float]:
+        n_samples = self.features(audio)
+        if n_samples < FRAME_SAMPLES:
+            # Not enough new audio for a feature frame: keep the previous scores
+            self.new_frames = 0
+            return self.scores
+
+        n_new = n_samples // FRAME_SAMPLES
+        self.frames += n_new
+        self.new_frames = n_new
+        windows = {}
+        n_windows = 1 if latest_only else n_new
+        for group in self.groups:
+            if group.n_frames not in windows:
+                windows[group.n_frames] = self._windows(group.n_frames, n_windows)
+            # With several new frames, keep the best window (as openwakeword does)
+            best = group.run(windows[group.n_frames]).max(axis=0)
+            for name, score in zip(group.names, best):
+                self.scores[name] = float(score) if self.frames > WARMUP_FRAMES else 0.0
+        return self.scores
+
+    def detections(self, scores: Dict[str, float], now: Optional[float] = None):
+        """Returns the (name, score) pairs above their threshold, outside their debounce window"""
+        now = now or time.time()
+        detected = []
+        for head in self.heads:
+            score = scores.get(head.name, 0.0)
+            if score >= head.threshold and now - self.last_detection[head.name] > self.debounce:
+                self.last_detection[head.name] = now
+                detected.append((head.name, score))
+        return detected
+
+    def recent_audio(self, n_samples: int) -> np.ndarray:
+        """The last `n_samples` the front-end has seen (it keeps 10 s of raw audio)"""
+        buffer = self.features.raw_data_buffer
+        n_samples = min(n_samples, len(buffer))
+        return np.fromiter(islice(buffer, len(buffer) - n_samples, None), dtype=np.int16, count=n_samples)
+
+    def _windows(self, n_frames: int, n_new: int) -> np.ndarray:
+        """Feature windows ending on each of the `n_new` latest frames, (n_new, n_frames, 96), for all heads"""
+        buffer = self.features.feature_buffer
+        ends = range(len(buffer) - n_new + 1, len(buffer) + 1)
+        return np.stack([buffer[end - n_frames:end] for end in ends]).astype(np.float32)
@@ -0,0 +1,264 @@
+import asyncio
+import threading
+import time
+import wave
+import numpy as np
+
+try:
+    import pyaudio
+except ImportError:  # Headless mode does not need sound hardware
+    pyaudio = None
+
+INPUT_RATE = 16000
+OUTPUT_RATE = 24000
+CHUNK = 1280            # Samples per uplink chunk (80 ms @ 16kHz)
+CALLBACK_FRAMES = 320   # Frames per hardware callback (20 ms @ 16kHz)
+
+
+def pcm_from_wav(data: bytes) -> memoryview:
+    """Returns a view on the PCM samples of a WAV blob (or the data itself if it is raw PCM)"""
+    view = memoryview(data)
+    if bytes(view[:4]) != b"RIFF":
+        return view
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = int.from_bytes(view[offset + 4:offset + 8], "little")
+        if chunk_id == b"data":
+            return view[offset + 8:offset + 8 + chunk_size]
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return view[44:]
+
+
+class RingBuffer:
+    """
+    Single-producer / single-consumer ring buffer of int16 samples.
+    Storage is preallocated; each side only ever moves its own index, so the
+    audio callback thread and the asyncio thread never take a lock.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._write = 0   # Owned by the producer
+        self._read = 0    # Owned by the consumer
+        # Flushes: the producer bumps the generation, the consumer applies each new one once
+        self._flush_to = 0
+        self._flush_generation = 0  # Owned by the producer
+        self._flush_applied = 0     # Owned by the consumer
+        self.overruns = 0
+
+    def available(self) -> int:
+        return self._write - self._read
+
+    def write(self, samples: np.ndarray) -> int:
+        """Producer side: copies samples in, dropping what does not fit"""
+        free = self.capacity - (self._write - self._read)
+        n = min(len(samples), free)
+        if n < len(samples):
+            self.overruns += 1
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:n]
+        self._write += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Consumer side: copies up to len(out) samples out, returns how many"""
+        generation = self._flush_generation
+        if generation != self._flush_applied:
+            # _flush_to is written before the generation: it is at least as recent
+            self._read = max(self._read, self._flush_to)
+            self._flush_applied = generation
+        n = min(len(out), self._write - self._read)
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:n] = self._data[:n - first]
+        self._read += n
+        return n
+
+    def clear(self):
+        """Producer side: discards everything written so far (applied on the next read)"""
+        self._flush_to = self._write
+        self._flush_generation += 1
+
+
+class JitterBuffer:
+    """
+    Playback buffer that waits for `target_ms` of audio before starting (and
+    again after every underrun), absorbing network variance between chunks.
+    """
+    def __init__(self, rate: int = OUTPUT_RATE, target_ms: int = 60, capacity_s: int = 30):
+        self.ring = RingBuffer(rate * capacity_s)
+        self.target = rate * target_ms // 1000
+        self.buffering = True
+        self.underruns = 0
+
+    def push(self, pcm) -> int:
+        return self.ring.write(np.frombuffer(pcm, dtype=np.int16))
+
+    def pull_into(self, out: np.ndarray):
+        """Fills `out` with audio, or silence while (re)buffering"""
+        if self.buffering:
+            if self.ring.available() < self.target:
+                out[:] = 0
+                return
+            self.buffering = False
+        n = self.ring.read_into(out)
+        if n < len(out):
+            out[n:] = 0
+            self.underruns += 1
+            self.buffering = True
+
+    def clear(self):
+        self.ring.clear()
+        self.buffering = True
+
+
+class AudioEngine:
+    """
+    Callback-driven audio engine for the satellite client.
+    The capture callback fills a ring buffer that the uplink coroutine drains in
+    CHUNK-sized pieces; the playback callback pulls from the jitter buffer.
+    `interrupt()` drops queued playback at the next callback (one hardware period).
+    """
+    def __init__(self, backend, jitter_ms: int = 60):
+        self.backend = backend
+        self.capture = RingBuffer(INPUT_RATE * 5)
+        self.playback = JitterBuffer(OUTPUT_RATE, target_ms=jitter_ms)
+        self._chunk = np.zeros(CHUNK, dtype=np.int16)
+        self._out = np.zeros(OUTPUT_RATE, dtype=np.int16)  # Up to 1s per callback
+        self._loop = None
+        self._captured = None
+        self.interrupts = 0
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._captured = asyncio.Event()
+        self.backend.start(self._on_capture, self._on_playback)
+
+    def stop(self):
+        self.backend.stop()
+
+    async def read_chunk(self) -> bytes:
+        """Waits for CHUNK captured samples and returns them as PCM16 bytes"""
+        while self.capture.available() < CHUNK:
+            self._captured.clear()
+            await self._captured.wait()
+        self.capture.read_into(self._chunk)
+        return self._chunk.tobytes()
+
+    def play(self, pcm):
+        self.playback.push(pcm)
+
+    def interrupt(self):
+        self.playback.clear()
+        self.interrupts += 1
+
+    def stats(self):
+        return {
+            "capture_overruns": self.capture.overruns,
+            "playback_overruns": self.playback.ring.overruns,
+            "playback_underruns": self.playback.underruns,
+            "playback_buffered_ms": 1000 * self.playback.ring.available() // OUTPUT_RATE,
+            "interrupts": self.interrupts,
+        }
+
+    # --- Called from the audio thread ---
+
+    def _on_capture(self, in_data: bytes):
+        self.capture.write(np.frombuffer(in_data, dtype=np.int16))
+        if self.capture.available() >= CHUNK:
+            self._loop.call_soon_threadsafe(self._captured.set)
+
+    def _on_playback(self, frame_count: int) -> bytes:
+        out = self._out[:frame_count]
+        self.playback.pull_into(out)
+        return out.tobytes()
+
+
+class PyAudioBackend:
+    """Sound card I/O through PyAudio callback-mode streams"""
+    def __init__(self, input_device=None, output_device=None):
+        if pyaudio is None:
+            raise RuntimeError("PyAudio is not installed, use the headless backend")
+        self.input_device = input_device
+        self.output_device = output_device
+        self.p = pyaudio.PyAudio()
+        self.streams = []
+
+    def start(self, on_capture, on_playback):
+        def input_callback(in_data, frame_count, time_info, status):
+            on_capture(in_data)
+            return (None, pyaudio.paContinue)
+
+        def output_callback(in_data, frame_count, time_info, status):
+            return (on_playback(frame_count), pyaudio.paContinue)
+
+        self.streams = [
+            self.p.open(format=pyaudio.paInt16, channels=1, rate=INPUT_RATE, input=True,
+                         input_device_index=self.input_device,
+                         frames_per_buffer=CALLBACK_FRAMES, stream_callback=input_callback),
+            self.p.open(format=pyaudio.paInt16, channels=1, rate=OUTPUT_RATE, output=True,
+                         output_device_index=self.output_device,
+                         frames_per_buffer=CALLBACK_FRAMES * OUTPUT_RATE // INPUT_RATE,
+                         stream_callback=output_callback),
+        ]
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop_stream()
+            stream.close()
+        self.p.terminate()
+
+
+class HeadlessBackend:
+    """
+    File/null devices driven by a timer thread with the same callback cadence
+    as the sound card. Input is a 16kHz mono WAV file (silence when absent or
+    exhausted), output is written to a 24kHz WAV file (discarded when absent).
+    """
+    def __init__(self, input_file: str = None, output_file: str = None, realtime: bool = True):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.realtime = realtime
+        self._running = False
+        self._thread = None
+
+    def start(self, on_capture, on_playback):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(on_capture, on_playback), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def _run(self, on_capture, on_playback):
+        reader = wave.open(self.input_file, "rb") if self.input_file else None
+        writer = wave.open(self.output_file, "wb") if self.output_file else None
+        if writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(OUTPUT_RATE)
+        silence = bytes(2 * CALLBACK_FRAMES)
+        out_frames = CALLBACK_FRAMES * OUTPUT_RATE // INPUT_RATE
+        period = CALLBACK_FRAMES / INPUT_RATE
+        next_tick = time.monotonic()
+        try:
+            while self._running:
+                data = reader.readframes(CALLBACK_FRAMES) if reader else b""
+                on_capture(data.ljust(len(silence), b"\0"))
+                out = on_playback(out_frames)
+                if writer:
+                    writer.writeframes(out)
+                if self.realtime:
+                    next_tick += period
+                    time.sleep(max(0.0, next_tick - time.monotonic()))
+        finally:
+            if reader:
+                reader.close()
+            if writer:
+                writer.close()
@@ -1,20 +1,21 @@
+import argparse
 import asyncio
+import json
+import os
 import websockets
-import pyaudio
 import sys
 
-# Audio configuration
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-INPUT_RATE = 16000  # Standard for consistent mic capture
-OUTPUT_RATE = 24000 # High quality for Gemini Aoede voice
-CHUNK = 1280
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core import protocol
+from app.core.protocol import Codec, MsgType
+from audio_engine import AudioEngine, PyAudioBackend, HeadlessBackend, INPUT_RATE, OUTPUT_RATE, pcm_from_wav, pyaudio
+
+HELLO_TIMEOUT_S = 2.0  # A legacy server never answers the hello
 
-async def microphone_client():
-    uri = "ws://localhost:8000/ws/audio"
-    p = pyaudio.PyAudio()
 
-    # List available devices
+def select_output_device():
+    """Interactive output device selection (sound card mode only)"""
+    p = pyaudio.PyAudio()
     info = p.get_host_api_info_by_index(0)
     numdevices = info.get('deviceCount')
     print("\n--- Audio Devices ---")
@@ -22,121 +23,187 @@ async def microphone_client():
         if (p.get_device_info_by_host_api_device_index(0, i).get('maxOutputChannels')) > 0:
             print(f"Output Device id {i} - {p.get_device_info_by_host_api_device_index(0, i).get('name')}")
     print("---------------------\n")
-    
-    # Device Selection Logic
+    p.terminate()
+
     try:
         selection = input(f"Select Output Device ID (0-{numdevices-1}) [Default]: ")
-        output_device_index = int(selection) if selection.strip() else None
+        return int(selection) if selection.strip() else None
     except ValueError:
         print("Invalid input, using default.")
-        output_device_index = None
-    
-    print(f"Opening streams... Input: {INPUT_RATE}Hz, Output: {OUTPUT_RATE}Hz on device {output_device_index}")
-
-    # Input Stream (Microphone)
-    input_stream = p.open(format=FORMAT,
-                        channels=CHANNELS,
-                        rate=INPUT_RATE,
-                        input=True,
-                        frames_per_buffer=CHUNK)
-
-    # Output Stream (Speaker)
-    output_stream = p.open(format=FORMAT,
-                         channels=CHANNELS,
-                         rate=OUTPUT_RATE,
-                         output=True,
-                         output_device_index=output_device_index)
-
-    print(f"Connecting to {uri}...")
+        return None
+
+
+async def read_hello(websocket):
+    """
+    Waits for the server's hello reply, returns (hello, early message).
+    A legacy server ignores the hello: after HELLO_TIMEOUT_S, or on the first
+    message that is not a reply, the client stays on v1 and that message is
+    handed back to be processed as usual.
+    """
     try:
+        reply = await asyncio.wait_for(websocket.recv(), timeout=HELLO_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        print(f"No hello reply after {HELLO_TIMEOUT_S}s, assuming a legacy server (protocol v1)")
+        return {}, None
+    if isinstance(reply, str):
+        try:
+            data = json.loads(reply)
+        except ValueError:
+            data = {}
+        if data.get("type") in ("hello", "overloaded"):
+            return data, None
+    return {}, reply
+
+
+async def microphone_client(args):
+    if args.headless:
+        backend = HeadlessBackend(input_file=args.input_file, output_file=args.output_file,
+                                  realtime=not args.fast)
+    else:
+        output_device = args.output_device if args.output_device is not None else select_output_device()
+        backend = PyAudioBackend(input_device=args.input_device, output_device=output_device)
+
+    engine = AudioEngine(backend, jitter_ms=args.jitter_ms)
+    print(f"Opening streams... Input: {INPUT_RATE}Hz, Output: {OUTPUT_RATE}Hz (jitter buffer {args.jitter_ms} ms)")
+    engine.start()
+
+    # Session token from the server's hello: reconnecting with it reattaches to the same conversation
+    session = {"token": None}
+
+    async def connect_once():
+        """Runs one connection, returns True once the requested duration is over"""
+        uri = args.uri
+        if session["token"]:
+            uri += ("&" if "?" in uri else "?") + f"session={session['token']}"
+        print(f"Connecting to {uri}...")
         async with websockets.connect(uri) as websocket:
-            print("Connected! Talk to Jarvis (Ctrl+C to stop)")
-            
-            # Async Queue for audio chunks
-            audio_queue = asyncio.Queue()
+            # Negotiate the binary framing protocol (server answers with the version to use)
+            await websocket.send(json.dumps({"type": "hello", "protocol": protocol.PROTOCOL_VERSION}))
+            hello, early = await read_hello(websocket)
+            if hello.get("type") == "overloaded":
+                # Refused by the load governor (close code 1013): back off as the server asks
+                session["retry_after"] = hello.get("retry_after_s", 5)
+                print(f"Server overloaded, retrying in {session['retry_after']}s")
+                return False
+            framed = hello.get("protocol", protocol.PROTOCOL_LEGACY) >= protocol.PROTOCOL_VERSION
+            session["token"] = hello.get("session") or session["token"]
+            resumed = " (conversation resumed)" if hello.get("resumed") else ""
+            print(f"Connected (protocol v{hello.get('protocol', protocol.PROTOCOL_LEGACY)}){resumed}! "
+                  "Talk to Jarvis (Ctrl+C to stop)")
+
+            state = {"seq": 0, "turn_id": 0}
+            inbound = protocol.SequenceTracker()
+
+            def interrupt():
+                before = engine.stats()["playback_buffered_ms"]
+                engine.interrupt()
+                print(f"[DEBUG] CLIENT RECEIVED INTERRUPT SIGNAL (dropped {before} ms of queued playback)")
 
             async def send_audio():
                 try:
                     while True:
-                        data = await asyncio.to_thread(input_stream.read, CHUNK, exception_on_overflow=False)
+                        data = await engine.read_chunk()
+                        if framed:
+                            data = protocol.encode_frame(MsgType.AUDIO, data, seq=state["seq"], codec=Codec.PCM16_16K)
+                            state["seq"] += 1
                         await websocket.send(data)
-                        await asyncio.sleep(0.01) # Yield control
                 except Exception as e:
                     print(f"Send error: {e}")
 
-            async def play_audio():
-                """Consumes audio from queue and plays it"""
-                try:
-                    while True:
-                        data = await audio_queue.get()
-                        if data is None: break
-                        # Run blocking write in thread to not block event loop
-                        await asyncio.to_thread(output_stream.write, data)
-                        audio_queue.task_done()
-                except Exception as e:
-                    print(f"Player error: {e}")
+            async def send_pings():
+                """Measures round-trip latency (answered by a PONG echoing the timestamp)"""
+                while framed:
+                    await asyncio.sleep(5)
+                    await websocket.send(protocol.encode_frame(MsgType.PING, seq=state["seq"]))
+                    state["seq"] += 1
 
             async def receive_audio():
-                """Reads from WebSocket and routing data"""
+                """Reads from WebSocket and routes audio to the jitter buffer"""
+                pending = [early] if early is not None else []
                 try:
                     while True:
-                        msg = await websocket.recv()
-                        
-                        if isinstance(msg, str):
+                        msg = pending.pop() if pending else await websocket.recv()
+
+                        if framed and isinstance(msg, bytes):
+                            frame = protocol.decode_frame(msg)
+                            lost = inbound.track(frame.seq)
+                            if lost:
+                                print(f"[DEBUG] {lost} frame(s) lost before seq {frame.seq}")
+                            if frame.type == MsgType.INTERRUPT:
+                                # Everything older than the new turn is stale
+                                state["turn_id"] = frame.turn_id
+                                interrupt()
+                            elif frame.type == MsgType.TURN_START:
+                                state["turn_id"] = frame.turn_id
+                            elif frame.type == MsgType.PONG:
+                                print(f"[DEBUG] RTT: {protocol.elapsed_ms(frame.timestamp_ms)} ms | {engine.stats()}")
+                            elif frame.type == MsgType.AUDIO:
+                                if protocol.turn_is_stale(frame.turn_id, state["turn_id"]):
+                                    continue
+                                engine.play(pcm_from_wav(frame.payload) if frame.codec == Codec.WAV else frame.payload)
+                        elif isinstance(msg, str):
                             # Handle Control Message
-                            import json
                             try:
                                 data = json.loads(msg)
                                 if data.get("type") == "interrupt":
-                                    print("\n[DEBUG] CLIENT RECEIVED INTERRUPT SIGNAL")
-                                    print(f"[DEBUG] Queue size before flush: {audio_queue.qsize()}")
-                                    
-                                    # 1. Clear the Python queue (undelivered audio)
-                                    flush_count = 0
-                                    while not audio_queue.empty():
-                                        try:
-                                            audio_queue.get_nowait()
-                                            audio_queue.task_done()
-                                            flush_count += 1
-                                        except asyncio.QueueEmpty:
-                                            break
-                                    print(f"[DEBUG] Flushed {flush_count} chunks from queue")
-                                    
-                                    # 2. Stop/Restart stream is CAUSING CRASHES on Windows/PyAudio
-                                    # We skip hardware buffer clearing for stability.
-                                    # The delay will be slightly higher (buffer size), but it won't crash.
-                                    # output_stream.stop_stream()
-                                    # output_stream.start_stream()
-                                    print("[DEBUG] Audio Queue Cleared (Hardware buffer skipped for stability)")
+                                    interrupt()
                             except Exception as e:
                                 print(f"JSON Error: {e}")
                         else:
-                            # Handle Audio Bytes - Push to queue
-                            await audio_queue.put(msg)
-                            
+                            engine.play(pcm_from_wav(msg))
+
                 except Exception as e:
                     print(f"Receive error: {e}")
-                finally:
-                    await audio_queue.put(None) # Kill player
 
-            # Run tasks
-            await asyncio.gather(send_audio(), receive_audio(), play_audio())
-            
+            tasks = [send_audio(), receive_audio(), send_pings()]
+            if args.duration:
+                tasks = [asyncio.wait_for(asyncio.gather(*tasks), timeout=args.duration)]
+            try:
+                await asyncio.gather(*tasks)
+            except asyncio.TimeoutError:
+                return True
+        return False
+
+    try:
+        while True:
+            try:
+                if await connect_once() or not args.reconnect:
+                    break
+            except (OSError, websockets.ConnectionClosed) as e:
+                if not args.reconnect:
+                    raise
+                print(f"Connection error: {e}")
+            print("Connection lost, reconnecting...")
+            await asyncio.sleep(session.pop("retry_after", 0.5))
     except KeyboardInterrupt:
         print("\nStopping...")
     except Exception as e:
         print(f"Connection error: {e}")
     finally:
-        input_stream.stop_stream()
-        input_stream.close()
-        output_stream.stop_stream()
-        output_stream.close()
-        p.terminate()
+        engine.stop()
+        print(f"Audio stats: {engine.stats()}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Jarvis satellite test client")
+    parser.add_argument("--uri", default="ws://localhost:8000/ws/audio")
+    parser.add_argument("--input-device", type=int, default=None)
+    parser.add_argument("--output-device", type=int, default=None)
+    parser.add_argument("--no-reconnect", dest="reconnect", action="store_false",
+                        help="Exit when the connection drops instead of resuming the session")
+    parser.add_argument("--jitter-ms", type=int, default=60, help="Playback prebuffer absorbing network jitter")
+    parser.add_argument("--headless", action="store_true", help="Use file/null devices instead of the sound card")
+    parser.add_argument("--input-file", default=None, help="Headless: 16kHz mono WAV to stream (silence if omitted)")
+    parser.add_argument("--output-file", default=None, help="Headless: WAV file receiving playback")
+    parser.add_argument("--fast", action="store_true", help="Headless: do not pace the devices in real time")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
     try:
         if sys.platform == 'win32':
              asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        asyncio.run(microphone_client())
+        asyncio.run(microphone_client(parse_args()))
     except KeyboardInterrupt:
         pass
@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.burst_engine import BurstEngine, SPEECH_END
+from app.services.local_standins import LocalGeminiClient, LocalTTSService
+
+# End of speech -> first audio ready to send, Live (hybrid and native audio) vs burst, on the local stand-ins
+# (no network: the numbers compare the pipelines, not the real services).
+
+RATE = 16000
+CHUNK = 1280  # 80 ms, as sent by the satellites
+
+
+def utterance(speech_s: float, silence_s: float) -> np.ndarray:
+    t = np.arange(int(speech_s * RATE))
+    speech = (np.sin(2 * np.pi * 200 * t / RATE) * 8000).astype(np.int16)
+    return np.concatenate([speech, np.zeros(int(silence_s * RATE), dtype=np.int16)])
+
+
+async def paced_chunks(audio: np.ndarray):
+    """Yields 80 ms chunks in real time, like a satellite"""
+    start = time.monotonic()
+    for i, offset in enumerate(range(0, len(audio), CHUNK)):
+        await asyncio.sleep(max(0.0, start + i * CHUNK / RATE - time.monotonic()))
+        yield audio[offset:offset + CHUNK]
+
+
+async def first_sentence_audio(texts, tts):
+    """Same sentence buffering as the TTS loop, returns when the first sentence is synthesized"""
+    buffer = ""
+    async for text in texts:
+        buffer += text
+        sentences = re.split(r'([.!?]+)', buffer)
+        if len(sentences) > 1:
+            return await tts.synthesize(sentences[0] + sentences[1])
+    return await tts.synthesize(buffer)
+
+
+async def run_live(client, tts, audio, speech_end, native_audio: bool = False):
+    async with client.start_session(native_audio=native_audio) as session:
+        async def sender():
+            async for chunk in paced_chunks(audio):
+                await session.send(input={"data": chunk.tobytes(), "mime_type": "audio/pcm"})
+
+        async def texts():
+            async for message in session.receive():
+                for part in (message.server_content.model_turn.parts if message.server_content.model_turn else []):
+                    if part.text:
+                        yield part.text
+
+        async def first_audio_part():
+            async for message in session.receive():
+                for part in (message.server_content.model_turn.parts if message.server_content.model_turn else []):
+                    if part.inline_data:
+                        return part.inline_data.data
+
+        send_task = asyncio.create_task(sender())
+        if native_audio:
+            await first_audio_part()
+        else:
+            await first_sentence_audio(texts(), tts)
+        done = time.monotonic()
+        send_task.cancel()
+        return done - speech_end()
+
+
+async def run_burst(client, tts, audio, speech_end, streamed: bool):
+    engine = BurstEngine(client, "bench")
+    engine.start()
+    async for chunk in paced_chunks(audio):
+        if engine.feed(chunk.tobytes(), chunk) == SPEECH_END:
+            break
+    if streamed:
+        await first_sentence_audio(engine.respond(), tts)
+    else:
+        # Script style: wait for the whole answer, then synthesize it
+        text = "".join([t async for t in engine.respond()])
+        await tts.synthesize(text)
+    return time.monotonic() - speech_end()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--speech", type=float, default=1.5, help="Utterance length (s)")
+    args = parser.parse_args()
+
+    audio = utterance(args.speech, 2.5)
+    client, tts = LocalGeminiClient(), LocalTTSService()
+    rows = {
+        "live (text + Cloud TTS)": lambda end: run_live(client, tts, audio, end),
+        "native audio": lambda end: run_live(client, tts, audio, end, native_audio=True),
+        "burst (streamed TTS)": lambda end: run_burst(client, tts, audio, end, streamed=True),
+        "burst (full answer, then TTS)": lambda end: run_burst(client, tts, audio, end, streamed=False),
+    }
+    print(f"{'engine':>30} | {'end of speech -> first audio ms (mean)':>38} | {'min':>6} | {'max':>6}")
+    for name, run in rows.items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.monotonic()
+            timings.append(await run(lambda: start + args.speech))
+        timings = np.array(timings) * 1000
+        print(f"{name:>30} | {timings.mean():>38.0f} | {timings.min():>6.0f} | {timings.max():>6.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
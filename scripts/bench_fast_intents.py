@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.intent_index import IntentIndex
+from app.services.local_standins import LocalGeminiClient, LocalTTSService
+from app.services.tools_manager import get_tools_manager
+from app.services.tts_cache import TTSCache
+from bench_engines import first_sentence_audio, paced_chunks, utterance
+
+# Local fast path vs the full model path, on the local stand-ins (no network: the numbers
+# compare the pipelines, not the real services).
+# Hit rate: labelled utterances fed word by word to the matcher (expected tool, or None when the
+# model must answer). Latency: end of speech -> first audio ready to send, for a command.
+
+UTTERANCES = [
+    ("allume la lumière du salon", "set_light"),
+    ("Jarvis, éteins la lumière de la cuisine", "set_light"),
+    ("éteins les lumières de la chambre s'il te plaît", "set_light"),
+    ("allume la lampe du bureau", "set_light"),
+    ("allume la lumière de la salle de bain", "set_light"),
+    ("quelle heure est-il ?", "get_time"),
+    ("il est quelle heure", "get_time"),
+    ("euh, quelle heure il est", "get_time"),
+    ("allume la lumière du garage", None),
+    ("est-ce que tu peux allumer la lumière du salon", None),
+    ("mets la lumière du salon à cinquante pour cent", None),
+    ("quelle heure est-il à Tokyo", None),
+    ("raconte-moi une blague", None),
+    ("quel temps fait-il demain", None),
+    ("allume la lumière du salon et de la cuisine", None),
+]
+
+
+def hit_rate(index):
+    rows, hits, commands, false_hits = [], 0, 0, 0
+    for text, expected in UTTERANCES:
+        matcher = index.matcher()
+        words = text.split()
+        match = None
+        for i, word in enumerate(words):
+            match = matcher.feed(" " + word, finished=i == len(words) - 1)
+            if match:
+                break
+        tool = match.tool if match else None
+        commands += expected is not None
+        hits += expected is not None and tool == expected
+        false_hits += expected is None and tool is not None
+        rows.append((text, expected, tool))
+    return rows, hits, commands, false_hits
+
+
+async def run_model_path(client, tts, audio, speech_end):
+    async with client.start_session() as session:
+        async def sender():
+            async for chunk in paced_chunks(audio):
+                await session.send(input={"data": chunk.tobytes(), "mime_type": "audio/pcm"})
+
+        async def texts():
+            async for message in session.receive():
+                for part in (message.server_content.model_turn.parts if message.server_content.model_turn else []):
+                    if part.text:
+                        yield part.text
+
+        send_task = asyncio.create_task(sender())
+        await first_sentence_audio(texts(), tts)
+        done = time.monotonic()
+        send_task.cancel()
+        return done - speech_end()
+
+
+async def run_fast_path(client, tts, cache, index, audio, speech_end):
+    tools = get_tools_manager()
+    async with client.start_session() as session:
+        async def sender():
+            async for chunk in paced_chunks(audio):
+                await session.send(input={"data": chunk.tobytes(), "mime_type": "audio/pcm"})
+
+        send_task = asyncio.create_task(sender())
+        matcher = index.matcher()
+        async for message in session.receive():
+            transcription = message.server_content.input_transcription
+            if transcription and transcription.text:
+                match = matcher.feed(transcription.text, bool(transcription.finished))
+                if match:
+                    result = await tools.execute_tool(match.tool, match.args)
+                    await cache.synthesize(match.confirmation(result), tts)
+                    break
+        done = time.monotonic()
+        send_task.cancel()
+        return done - speech_end()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--speech", type=float, default=1.5, help="Utterance length (s)")
+    args = parser.parse_args()
+
+    index = IntentIndex()
+    rows, hits, commands, false_hits = hit_rate(index)
+    print(f"{'utterance':>50} | {'expected':>9} | matched")
+    for text, expected, tool in rows:
+        print(f"{text:>50} | {expected or '-':>9} | {tool or '-'}")
+    print(f"Hit rate: {hits}/{commands} commands, {false_hits} false hit(s) on {len(rows) - commands} other utterances\n")
+
+    audio = utterance(args.speech, 2.5)
+    tts = LocalTTSService()
+    cache = TTSCache()
+    await cache.prewarm(index.static_confirmations(), tts)
+    rows = {
+        "model (Live + Cloud TTS)": lambda end: run_model_path(LocalGeminiClient(), tts, audio, end),
+        "fast path (set_light)": lambda end: run_fast_path(
+            LocalGeminiClient(transcript="allume la lumière du salon"), tts, cache, index, audio, end),
+        "fast path (get_time)": lambda end: run_fast_path(
+            LocalGeminiClient(transcript="quelle heure est-il"), tts, cache, index, audio, end),
+    }
+    print(f"{'path':>26} | {'end of speech -> first audio ms (mean)':>38} | {'min':>6} | {'max':>6}")
+    for name, run in rows.items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.monotonic()
+            timings.append(await run(lambda: start + args.speech))
+        timings = np.array(timings) * 1000
+        print(f"{name:>26} | {timings.mean():>38.0f} | {timings.min():>6.0f} | {timings.max():>6.0f}")
+    print(f"TTS cache: {cache.snapshot()} (get_time answers change every minute: first one is a miss)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+
+# N satellites streaming (silent, asleep) audio to an in-process server, either one websocket
+# each (/ws/audio) or all of them over one hub connection (/ws/hub). Measures the connection
+# setup, the server-side socket syscalls (send/recv calls on the server's sockets), the inbound
+# websocket messages and the server tasks, per satellite. Gemini/TTS are the local stand-ins.
+# Compression is off, as on the ESP32 satellites.
+
+os.environ["USE_LOCAL_STANDINS"] = "true"
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import uvicorn
+import websockets
+from app.core import protocol
+from app.core.protocol import Codec, MsgType
+from app.main import app
+
+CHUNK_S = 0.08
+SILENCE = bytes(2560)  # 80 ms of 16kHz PCM16
+
+
+class SyscallCounter:
+    """Counts send/recv calls (and bytes received) on the sockets whose local port is the server's"""
+    METHODS = ("send", "sendall", "sendmsg", "recv", "recv_into", "recvfrom")
+
+    def __init__(self, port: int):
+        self.port = port
+        self.calls = 0
+        self.received_bytes = 0
+        self._originals = {}
+
+    def install(self):
+        counter = self
+        for name in self.METHODS:
+            original = getattr(socket.socket, name)
+            self._originals[name] = original
+
+            def wrapper(sock, *args, _original=original, _name=name, **kwargs):
+                result = _original(sock, *args, **kwargs)
+                try:
+                    server_side = sock.getsockname()[1] == counter.port
+                except OSError:
+                    server_side = False
+                if server_side:
+                    counter.calls += 1
+                    if _name.startswith("recv"):
+                        counter.received_bytes += result if isinstance(result, int) else len(result)
+                return result
+            setattr(socket.socket, name, wrapper)
+
+    def uninstall(self):
+        for name, original in self._originals.items():
+            setattr(socket.socket, name, original)
+
+    def reset(self):
+        self.calls = 0
+        self.received_bytes = 0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def drain(websocket):
+    try:
+        async for _ in websocket:
+            pass
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def separate_connections(uri: str, n: int):
+    """One websocket per satellite, returns (sockets, setup seconds per satellite)"""
+    sockets, setup = [], []
+    for i in range(n):
+        start = time.perf_counter()
+        websocket = await websockets.connect(f"{uri}/ws/audio?satellite=sat{i}", compression=None)
+        await websocket.send(json.dumps({"type": "hello", "protocol": protocol.PROTOCOL_VERSION}))
+        await websocket.recv()
+        setup.append(time.perf_counter() - start)
+        sockets.append(websocket)
+    return sockets, setup
+
+
+async def stream_separate(sockets, duration: float):
+    seq = 0
+    start = time.monotonic()
+    tick = 0
+    while time.monotonic() - start < duration:
+        for websocket in sockets:
+            await websocket.send(protocol.encode_frame(MsgType.AUDIO, SILENCE, seq=seq, codec=Codec.PCM16_16K))
+        seq += 1
+        tick += 1
+        await asyncio.sleep(max(0.0, start + tick * CHUNK_S - time.monotonic()))
+
+
+async def hub_connection(uri: str, n: int):
+    """One hub websocket, returns (socket, setup seconds per satellite)"""
+    start = time.perf_counter()
+    websocket = await websockets.connect(f"{uri}/ws/hub", compression=None)
+    for i in range(n):
+        await websocket.send(json.dumps({"type": "open", "channel": i, "satellite": f"sat{i}"}))
+    hellos = set()
+    while len(hellos) < n:
+        message = json.loads(await websocket.recv())
+        if message.get("type") == "hello":
+            hellos.add(message["channel"])
+    return websocket, (time.perf_counter() - start) / n
+
+
+async def stream_hub(websocket, n: int, duration: float):
+    seq = 0
+    start = time.monotonic()
+    tick = 0
+    while time.monotonic() - start < duration:
+        frame = protocol.encode_frame(MsgType.AUDIO, SILENCE, seq=seq, codec=Codec.PCM16_16K)
+        await websocket.send(protocol.encode_hub_records((channel, frame) for channel in range(n)))
+        seq += 1
+        tick += 1
+        await asyncio.sleep(max(0.0, start + tick * CHUNK_S - time.monotonic()))
+
+
+async def measure(mode: str, uri: str, n: int, duration: float, counter: SyscallCounter):
+    tasks_before = len(asyncio.all_tasks())
+    if mode == "separate":
+        sockets, setup = await separate_connections(uri, n)
+        setup_s = sum(setup) / n
+    else:
+        hub, setup_s = await hub_connection(uri, n)
+        sockets = [hub]
+    drains = [asyncio.create_task(drain(websocket)) for websocket in sockets]
+    await asyncio.sleep(0.5)
+    server_tasks = len(asyncio.all_tasks()) - tasks_before - len(drains)
+
+    counter.reset()
+    if mode == "separate":
+        await stream_separate(sockets, duration)
+    else:
+        await stream_hub(hub, n, duration)
+    calls, received = counter.calls, counter.received_bytes
+
+    for websocket in sockets:
+        await websocket.close()
+    await asyncio.gather(*drains)
+    await asyncio.sleep(0.5)
+    frames = duration / CHUNK_S
+    return {
+        "setup_ms": 1000 * setup_s,
+        "syscalls_per_s": calls / duration / n,
+        "bytes_per_frame": received / frames / n,
+        "messages_per_s": (n if mode == "separate" else 1) / CHUNK_S / n,
+        "server_tasks": server_tasks / n,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--satellites", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="Streaming time per mode (s)")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    counter = SyscallCounter(port)
+    counter.install()
+    uri = f"ws://127.0.0.1:{port}"
+    try:
+        rows = {mode: await measure(mode, uri, args.satellites, args.duration, counter)
+                for mode in ("separate", "hub")}
+    finally:
+        counter.uninstall()
+        server.should_exit = True
+        await serve
+
+    print(f"{args.satellites} satellites, {args.duration:.0f} s of 80 ms frames each (per satellite):")
+    print(f"{'':>32} | {'separate':>10} | {'hub':>10}")
+    for key, label in (("setup_ms", "connection setup ms"),
+                       ("syscalls_per_s", "server socket syscalls / s"),
+                       ("messages_per_s", "inbound websocket messages / s"),
+                       ("bytes_per_frame", "bytes received / frame"),
+                       ("server_tasks", "server tasks")):
+        print(f"{label:>32} | {rows['separate'][key]:>10.1f} | {rows['hub'][key]:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
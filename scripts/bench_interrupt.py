@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.live_session import LiveSession
+from app.services.local_standins import LocalGeminiClient, DEFAULT_REPLY, TOKEN_INTERVAL_S
+
+# Barge-in on the local Live stand-in: the user interrupts a long answer (voice,
+# or the satellite's interrupt button) and asks something else, right away or
+# after a pause. Nothing is sent upstream on a barge-in: the output is dropped
+# locally and the generation goes on until Gemini hears the new question.
+# Measures the time until the generation stops, the tokens it still produced,
+# and the next answer's first token (after the end of the new question).
+# Limitation: the stand-in stops a generation on the first chunk of new speech,
+# a behaviour hard-coded in local_standins. These numbers only exercise the
+# server-side handling; they say nothing about the real Live API, whose
+# activity detection has its own latency.
+
+RATE = 16000
+CHUNK = 1280
+
+
+def utterance(speech_s: float, silence_s: float) -> np.ndarray:
+    t = np.arange(int(speech_s * RATE))
+    speech = (np.sin(2 * np.pi * 200 * t / RATE) * 8000).astype(np.int16)
+    return np.concatenate([speech, np.zeros(int(silence_s * RATE), dtype=np.int16)])
+
+
+async def send_paced(live: LiveSession, audio: np.ndarray):
+    start = time.monotonic()
+    for i, offset in enumerate(range(0, len(audio), CHUNK)):
+        await asyncio.sleep(max(0.0, start + i * CHUNK / RATE - time.monotonic()))
+        await live.send_audio(audio[offset:offset + CHUNK].tobytes())
+
+
+async def run(pause_s: float, speech_s: float, chunks_before_interrupt: int, answer_repeat: int):
+    client = LocalGeminiClient(reply=" ".join([DEFAULT_REPLY] * answer_repeat))
+    state = {"turn": 1, "chunks": {1: 0, 2: 0}, "first_token": None, "cancelled_end": None}
+    got_chunks = asyncio.Event()
+
+    async with LiveSession(client, "bench") as live:
+        async def consumer():
+            # Same output handling as send_to_client
+            while True:
+                async for response in live.session.receive():
+                    content = response.server_content
+                    if content.interrupted or content.turn_complete:
+                        live.end_generation()
+                        if state["turn"] == 2 and state["cancelled_end"] is None:
+                            # End of the cancelled generation (stopped, or ran to completion)
+                            state["cancelled_end"] = client.generated_chunks
+                        continue
+                    if content.model_turn:
+                        if not live.begin_output(state["turn"]):
+                            live.discard(content.model_turn.parts)
+                        else:
+                            state["chunks"][state["turn"]] += 1
+                            if state["turn"] == 2 and state["first_token"] is None:
+                                state["first_token"] = time.monotonic()
+                            if state["chunks"][1] >= chunks_before_interrupt:
+                                got_chunks.set()
+
+        consumer_task = asyncio.create_task(consumer())
+        await send_paced(live, utterance(speech_s, 0.8))
+        await got_chunks.wait()
+
+        # Barge-in, then the new question
+        state["turn"] = 2
+        interrupted_at_chunk = client.generated_chunks
+        await live.interrupt()
+        await send_paced(live, utterance(0.0, pause_s))
+        await send_paced(live, utterance(speech_s, 0.0))
+        speech_end = time.monotonic()
+        await send_paced(live, utterance(0.0, 0.8))
+        while state["first_token"] is None:
+            await asyncio.sleep(TOKEN_INTERVAL_S / 5)
+        consumer_task.cancel()
+        stop_ms = 1000 * live.interrupt_stop_total / max(live.interrupts, 1)
+
+    wasted_chunks = (state["cancelled_end"] or client.generated_chunks) - interrupted_at_chunk
+    return stop_ms, wasted_chunks * 16 / 4, 1000 * (state["first_token"] - speech_end)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speech", type=float, default=1.0)
+    parser.add_argument("--chunks", type=int, default=3, help="Answer chunks heard before the barge-in")
+    parser.add_argument("--answer", type=int, default=10, help="Length of the interrupted answer (x the default reply)")
+    args = parser.parse_args()
+
+    print(f"{'pause before question s':>23} | {'stopped after ms':>16} | {'tokens after barge-in':>21} | "
+          f"{'next first token ms':>19}")
+    for pause in (0.0, 0.5, 1.0):
+        stop, tokens, latency = await run(pause, args.speech, args.chunks, args.answer)
+        print(f"{pause:>23.1f} | {stop:>16.0f} | {tokens:>21.0f} | {latency:>19.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.speaker_id import SpeakerIndex
+
+# Speaker lookup time against enrollment index size (96-dim wake word embeddings, --dim 256 for a speaker model).
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=96)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    print(f"{'index size':>10} | {'lookup us (mean)':>16} | {'lookup us (p99)':>15}")
+    for size in [10, 100, 1000, 10000, 100000]:
+        index = SpeakerIndex(args.dim, capacity=size)
+        for i, embedding in enumerate(rng.standard_normal((size, args.dim))):
+            index.add(f"speaker-{i % 50}", embedding)
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1e6
+        print(f"{size:>10} | {timings.mean():>16.1f} | {np.percentile(timings, 99):>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.local_standins import LocalTTSService
+from app.services.tts_postprocess import TTSPostProcessor, parse_wav
+
+# TTS post-processing per sentence: time to audible (first sample above the trim threshold) in
+# the audio as sent before and after, bytes sent, and the CPU cost of the NumPy stage. Each
+# sentence is measured as the first of an answer; the pause kept between the sentences of one
+# answer is reported at the end.
+# Local TTS stand-in by default (150 ms of silence on each side); --real uses Cloud TTS (Chirp3-HD).
+
+SENTENCES = [
+    "C'est fait.",
+    "Il est dix-sept heures vingt.",
+    "J'ai allumé la lumière du salon.",
+    "Demain, il fera beau à Paris avec une température maximale de vingt-deux degrés.",
+    "Bien sûr !",
+    "Je n'ai pas trouvé de lumière dans le garage, veux-tu que je l'ajoute ?",
+]
+
+
+def time_to_audible_ms(pcm: np.ndarray, rate: int, threshold_dbfs: float) -> float:
+    audible = np.flatnonzero(np.abs(pcm.astype(np.int32)) > 32768 * 10 ** (threshold_dbfs / 20))
+    return 1000 * (audible[0] if len(audible) else len(pcm)) / rate
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--real", action="store_true", help="Cloud TTS instead of the local stand-in")
+    parser.add_argument("--normalize", action="store_true")
+    parser.add_argument("--threshold-dbfs", type=float, default=None)
+    parser.add_argument("--margin-ms", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.real:
+        from app.services.tts_service import TTSService
+        tts = TTSService()
+    else:
+        tts = LocalTTSService()
+    processor = TTSPostProcessor(threshold_dbfs=args.threshold_dbfs, margin_ms=args.margin_ms,
+                                 normalize=args.normalize)
+
+    print(f"{'sentence':>40} | {'audible ms':>10} | {'after':>6} | {'saved':>6} | {'kB':>5} | {'after':>5} | {'cpu us':>6}")
+    saved, cpu, pauses = [], [], []
+    for sentence in SENTENCES:
+        wav = await tts.synthesize(sentence)
+        rate, pcm = parse_wav(wav)
+        before = time_to_audible_ms(np.frombuffer(pcm, dtype=np.int16), rate, processor.threshold_dbfs)
+        start = time.perf_counter()
+        audio, _ = processor.process(wav)
+        cpu.append(1e6 * (time.perf_counter() - start))
+        after = time_to_audible_ms(np.frombuffer(audio, dtype=np.int16), rate, processor.threshold_dbfs)
+        saved.append(before - after)
+        # Same sentence later in an answer: trailing silence of the previous one + leading silence kept
+        later, _ = processor.process(wav, first=False)
+        pcm = np.frombuffer(audio, dtype=np.int16)
+        audible = np.flatnonzero(np.abs(pcm.astype(np.int32)) > 32768 * 10 ** (processor.threshold_dbfs / 20))
+        trailing = 1000 * (len(pcm) - 1 - audible[-1]) / rate if len(audible) else 0.0
+        pauses.append(trailing + time_to_audible_ms(np.frombuffer(later, dtype=np.int16), rate, processor.threshold_dbfs))
+        print(f"{sentence[:40]:>40} | {before:>10.0f} | {after:>6.0f} | {before - after:>6.0f} | "
+              f"{len(wav) / 1000:>5.1f} | {len(audio) / 1000:>5.1f} | {cpu[-1]:>6.0f}")
+    print(f"Time to audible saved: {np.mean(saved):.0f} ms per sentence on average, "
+          f"post-processing {np.median(cpu):.0f} us per sentence (median)")
+    print(f"Pause between the sentences of an answer: {np.mean(pauses):.0f} ms "
+          f"(untrimmed: {2 * before:.0f} ms)")
+    print(processor.snapshot())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.wakeword import WakeWordDetector, WakeWordHead, FRAME_SAMPLES
+
+# Per-frame CPU cost of wake word detection as wake words are added:
+# shared front-end (WakeWordDetector) vs one openwakeword Model per wake word.
+# Requires the openwakeword feature models (scripts/setup_openwakeword.py).
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "../models/Motisma-v1.onnx")
+
+
+def make_audio(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(16000 * seconds)) * 1000).astype(np.int16)
+
+
+def bench_shared(n_models: int, audio: np.ndarray) -> float:
+    detector = WakeWordDetector()
+    heads = []
+    for i in range(n_models):
+        head = WakeWordHead(MODEL_PATH)
+        head.name = f"{head.name}-{i}"
+        heads.append(head)
+    detector.use_heads(heads)
+    start = time.process_time()
+    for offset in range(0, len(audio), FRAME_SAMPLES):
+        detector.predict(audio[offset:offset + FRAME_SAMPLES])
+    return (time.process_time() - start) / (len(audio) // FRAME_SAMPLES)
+
+
+def bench_naive(n_models: int, audio: np.ndarray) -> float:
+    from openwakeword.model import Model
+    models = [Model(wakeword_models=[MODEL_PATH], inference_framework="onnx") for _ in range(n_models)]
+    start = time.process_time()
+    for offset in range(0, len(audio), FRAME_SAMPLES):
+        frame = audio[offset:offset + FRAME_SAMPLES]
+        for model in models:
+            model.predict(frame)
+    return (time.process_time() - start) / (len(audio) // FRAME_SAMPLES)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--max-models", type=int, default=8)
+    args = parser.parse_args()
+
+    audio = make_audio(args.seconds)
+    print(f"{'wake words':>10} | {'shared ms/frame':>15} | {'naive ms/frame':>14}")
+    for n in [1, 2, 4, args.max_models]:
+        shared = bench_shared(n, audio)
+        naive = bench_naive(n, audio)
+        print(f"{n:>10} | {1000 * shared:>15.3f} | {1000 * naive:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
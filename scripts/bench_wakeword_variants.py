@@ -0,0 +1,96 @@
+import argparse
+import os
+import resource
+import sys
+import time
+import wave
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.wakeword import (WakeWordDetector, WakeWordHead, FRAME_SAMPLES, feature_model_paths,
+                                   feature_sessions, int8_path)
+
+# fp32 vs INT8 (scripts/quantize_wakeword.py): CPU per frame, resident memory of the
+# sessions and score drift against fp32. The ORT_* settings apply to every variant.
+# --heads-only scores feature windows with the wake word head alone (no feature models needed).
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "../models/Motisma-v1.onnx")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_audio(path, seconds):
+    if path:
+        with wave.open(path, "rb") as f:
+            return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(16000 * seconds)) * 1000).astype(np.int16)
+
+
+def run_full(int8: bool, audio: np.ndarray):
+    before = rss_mb()
+    detector = WakeWordDetector(gate=False)
+    detector.features.melspec_model, detector.features.embedding_model = feature_sessions(int8)
+    detector.use_heads([WakeWordHead(MODEL_PATH, int8=int8)])
+    memory = rss_mb() - before
+    scores = []
+    start = time.process_time()
+    for offset in range(0, len(audio) - FRAME_SAMPLES + 1, FRAME_SAMPLES):
+        scores.append(detector.predict(audio[offset:offset + FRAME_SAMPLES])[detector.heads[0].name])
+    cpu_ms = 1000 * (time.process_time() - start) / len(scores)
+    return cpu_ms, memory, np.array(scores)
+
+
+def run_heads_only(int8: bool, windows: np.ndarray):
+    before = rss_mb()
+    head = WakeWordHead(MODEL_PATH, int8=int8)
+    memory = rss_mb() - before
+    start = time.process_time()
+    scores = np.array([head.run(window[None]) for window in windows])
+    cpu_ms = 1000 * (time.process_time() - start) / len(windows)
+    return cpu_ms, memory, scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", help="16kHz mono PCM16 WAV (default: 30s of noise)")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--heads-only", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    variants = [False]
+    paths = [MODEL_PATH] + ([] if args.heads_only else list(feature_model_paths()))
+    if all(os.path.exists(int8_path(path)) for path in paths):
+        variants.append(True)
+    else:
+        print("INT8 variants missing (scripts/quantize_wakeword.py): benchmarking fp32 only")
+
+    if args.heads_only:
+        rng = np.random.default_rng(0)
+        data = rng.standard_normal((int(args.seconds * 12.5), 16, 96)).astype(np.float32)
+        run = lambda int8: run_heads_only(int8, data)
+    else:
+        audio = load_audio(args.audio, args.seconds)
+        run = lambda int8: run_full(int8, audio)
+
+    print(f"{'variant':>7} | {'CPU ms/frame':>12} | {'memory MB':>9} | {'max |score diff|':>16} | {'detections':>10}")
+    WakeWordHead(MODEL_PATH)  # Initialize ONNX Runtime first, so it is not counted in the first variant's memory
+    reference = None
+    for int8 in variants:
+        cpu_ms, memory, scores = run(int8)
+        if reference is None:
+            reference = scores
+        diff = float(np.abs(scores - reference).max())
+        detections = int(np.sum((scores >= args.threshold) & (np.roll(scores, 1) < args.threshold)))
+        print(f"{'int8' if int8 else 'fp32':>7} | {cpu_ms:>12.3f} | {memory:>9.1f} | {diff:>16.4f} | {detections:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import wave
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.config import get_settings
+from app.services.speaker_id import SpeakerIndex, get_speaker_embedder
+
+# Enrolls a speaker from 16kHz mono WAV clips into the speaker index.
+# The embedding is computed by the same embedder as SpeakerIdentifier live
+# (SPEAKER_EMBEDDING_MODEL, else the wake word features). Clips should start
+# with the wake word, as the live window does. Check the threshold with
+# scripts/eval_speaker_id.py once every speaker is enrolled.
+
+
+def read_clip(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != 16000 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16kHz mono audio")
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name", help="Speaker name, as announced to Gemini")
+    parser.add_argument("clips", nargs="+", help="16kHz mono WAV files")
+    parser.add_argument("--index", default=get_settings().SPEAKER_INDEX_PATH)
+    args = parser.parse_args()
+
+    embedder = get_speaker_embedder()
+    index = SpeakerIndex.load(args.index) if os.path.exists(args.index) else SpeakerIndex(embedder.dim)
+    if index.dim != embedder.dim:
+        sys.exit(f"{args.index} holds {index.dim}-dimension embeddings, {embedder.name} gives {embedder.dim}: "
+                 f"use another --index")
+    for clip in args.clips:
+        index.add(args.name, embedder.embed_audio(read_clip(clip)))
+        print(f"Enrolled {args.name} from {clip} ({embedder.name})")
+    index.save(args.index)
+    print(f"Index saved to {args.index} ({len(index)} embeddings)")
+
+
+if __name__ == "__main__":
+    main()
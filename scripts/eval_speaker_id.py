@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.config import get_settings
+from app.services.speaker_id import get_speaker_embedder
+from enroll_speaker import read_clip
+
+# Speaker separation of the configured embedder (SPEAKER_EMBEDDING_MODEL, else the
+# wake word features) and the threshold to use. Clips are 16kHz mono WAV files in
+# one directory per speaker (<dir>/<speaker>/*.wav), cut as the live window is:
+# the wake word then about a second of command. Every pair of clips is scored:
+# same speaker (genuine) against different speakers (impostor). Prints the score
+# distributions, the equal error rate and its threshold (SPEAKER_ID_THRESHOLD).
+
+
+def embeddings(directory: str):
+    names, vectors = [], []
+    embedder = get_speaker_embedder()
+    for speaker in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, speaker)
+        if not os.path.isdir(folder):
+            continue
+        for clip in sorted(os.listdir(folder)):
+            if clip.endswith(".wav"):
+                names.append(speaker)
+                vectors.append(embedder.embed_audio(read_clip(os.path.join(folder, clip))))
+    vectors = np.array(vectors, dtype=np.float32)
+    return np.array(names), vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def equal_error_rate(genuine: np.ndarray, impostor: np.ndarray):
+    """(EER, threshold) where false rejects and false accepts are equal"""
+    thresholds = np.unique(np.concatenate((genuine, impostor)))
+    false_reject = np.searchsorted(np.sort(genuine), thresholds) / len(genuine)
+    false_accept = 1.0 - np.searchsorted(np.sort(impostor), thresholds) / len(impostor)
+    best = int(np.argmin(np.abs(false_reject - false_accept)))
+    return (false_reject[best] + false_accept[best]) / 2, float(thresholds[best])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("clips", help="Directory with one sub-directory of WAV clips per speaker")
+    args = parser.parse_args()
+
+    names, vectors = embeddings(args.clips)
+    if len(set(names)) < 2:
+        sys.exit("At least two speakers are needed")
+    scores = vectors @ vectors.T
+    pairs = np.triu_indices(len(names), k=1)
+    same = names[pairs[0]] == names[pairs[1]]
+    genuine, impostor = scores[pairs][same], scores[pairs][~same]
+    if not len(genuine):
+        sys.exit("At least two clips of one speaker are needed")
+
+    print(f"Embedder: {get_speaker_embedder().name}, {len(names)} clips, {len(set(names))} speakers")
+    for label, values in (("genuine", genuine), ("impostor", impostor)):
+        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+        print(f"{label:>8} pairs: {len(values):>5} | p5 {p5:.3f} | median {p50:.3f} | p95 {p95:.3f}")
+    eer, threshold = equal_error_rate(genuine, impostor)
+    current = get_settings().SPEAKER_ID_THRESHOLD
+    print(f"EER {100 * eer:.1f}% at threshold {threshold:.3f} "
+          f"(SPEAKER_ID_THRESHOLD={current}: {100 * np.mean(genuine < current):.1f}% false rejects, "
+          f"{100 * np.mean(impostor >= current):.1f}% false accepts)")
+    if eer > 0.1:
+        print("The embedder does not separate these speakers: use a speaker verification model "
+              "(SPEAKER_EMBEDDING_MODEL) or leave speaker identification disabled")
+
+
+if __name__ == "__main__":
+    main()
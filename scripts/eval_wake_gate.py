@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import time
+import wave
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.wakeword import WakeWordDetector, FRAME_SAMPLES, gate_stats
+
+# Offline evaluation of the wake word gate: recall on clips containing the wake word,
+# false accepts on clips without it, with and without the gate. Clips are 16kHz mono
+# PCM16 WAV files; each one is padded with room noise so the gate has to open on it.
+# Requires the openwakeword feature models (scripts/setup_openwakeword.py).
+
+
+def read_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as f:
+        if f.getframerate() != 16000 or f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16kHz mono PCM16")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+
+def clips(directory):
+    if not directory:
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".wav")]
+
+
+def detects(detector: WakeWordDetector, audio: np.ndarray) -> bool:
+    """Streams the clip frame by frame, True if any wake word crossed its threshold"""
+    detector.reset()
+    hit = False
+    for offset in range(0, len(audio) - FRAME_SAMPLES + 1, FRAME_SAMPLES):
+        scores = detector.predict(audio[offset:offset + FRAME_SAMPLES])
+        hit = hit or any(score >= detector.thresholds[name] for name, score in scores.items())
+    return hit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positives", required=True, help="Directory of WAV clips containing the wake word")
+    parser.add_argument("--negatives", help="Directory of WAV clips without the wake word")
+    parser.add_argument("--pad", type=float, default=3.0, help="Seconds of room noise before and after each clip")
+    parser.add_argument("--noise", type=float, default=30.0, help="Room noise RMS (PCM16 units)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pad = int(16000 * args.pad)
+
+    def padded(path):
+        clip = read_wav(path)
+        noise = (rng.standard_normal(2 * pad + len(clip)) * args.noise).astype(np.int16)
+        noise[pad:pad + len(clip)] = np.clip(noise[pad:pad + len(clip)].astype(np.int32) + clip, -32768, 32767)
+        return noise
+
+    positives = [padded(path) for path in clips(args.positives)]
+    negatives = [padded(path) for path in clips(args.negatives)]
+    n_frames = sum(len(audio) for audio in positives + negatives) // FRAME_SAMPLES
+
+    print(f"{len(positives)} positive / {len(negatives)} negative clips, {n_frames} frames")
+    print(f"{'gate':>5} | {'recall':>7} | {'false accepts':>13} | {'CPU ms/frame':>12}")
+    results = {}
+    for gate in (False, True):
+        detector = WakeWordDetector(gate=gate)
+        start = time.process_time()
+        hits = [detects(detector, audio) for audio in positives]
+        false_accepts = sum(detects(detector, audio) for audio in negatives)
+        cpu_ms = 1000 * (time.process_time() - start) / max(n_frames, 1)
+        results[gate] = hits
+        recall = sum(hits) / len(hits) if hits else 0.0
+        print(f"{'on' if gate else 'off':>5} | {recall:>7.3f} | {false_accepts:>13} | {cpu_ms:>12.3f}")
+
+    stats = gate_stats()
+    print(f"\nGate: skip rate {stats['skip_rate']:.1%}, {stats['replayed_frames']} frames replayed, "
+          f"{stats['gate_us_per_frame']} us/frame")
+    lost = [path for path, off, on in zip(clips(args.positives), results[False], results[True]) if off and not on]
+    if lost:
+        print(f"Detections lost with the gate ({len(lost)}):")
+        for path in lost:
+            print(f"  {path}")
+    else:
+        print("No detection lost with the gate.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.services.wakeword import feature_model_paths, int8_path
+
+# Writes INT8 (dynamic quantization) variants next to the fp32 models: <model>.int8.onnx.
+# They are used when WAKEWORD_INT8=true. Requires the `onnx` package (pip install onnx)
+# and the openwakeword feature models (scripts/setup_openwakeword.py).
+# Compare them with scripts/bench_wakeword_variants.py before enabling them.
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "../models/Motisma-v1.onnx")
+
+
+def quantize(path: str, per_channel: bool):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    output = int8_path(path)
+    prepared = output + ".prep"
+    # Shape inference and graph cleanup first (recommended before quantization)
+    quant_pre_process(path, prepared, skip_symbolic_shape=True)
+    try:
+        quantize_dynamic(prepared, output, weight_type=QuantType.QInt8, per_channel=per_channel)
+    finally:
+        os.remove(prepared)
+    logger.info(f"{os.path.basename(path)}: {os.path.getsize(path) // 1024} KB -> "
+                f"{os.path.basename(output)}: {os.path.getsize(output) // 1024} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=[MODEL_PATH], help="Wake word models to quantize")
+    parser.add_argument("--skip-features", action="store_true", help="Leave the shared feature models in fp32")
+    parser.add_argument("--per-channel", action="store_true", help="Per-channel weight scales")
+    args = parser.parse_args()
+
+    paths = list(args.models) + ([] if args.skip_features else list(feature_model_paths()))
+    for path in paths:
+        if not os.path.exists(path):
+            logger.error(f"Model not found: {path}")
+            continue
+        quantize(path, args.per_channel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Replays a session recording (RECORD_SESSIONS=true) through audio_websocket with the
+# local Gemini/TTS stand-ins, records the replay, and compares wake scores and decisions.
+# The wake engine (models, thresholds, gate...) and the conversation engine are rebuilt
+# from the recording's meta, not from the current configuration.
+# Inbound messages are paced on their recorded timestamps (debounce and arbitration depend
+# on time); --fast feeds them back to back.
+
+REPLAY_DIR = tempfile.mkdtemp(prefix="replay-")
+os.environ["USE_LOCAL_STANDINS"] = "true"
+os.environ["RECORD_SESSIONS"] = "true"
+os.environ["RECORDINGS_DIR"] = REPLAY_DIR
+os.environ.setdefault("GOOGLE_API_KEY", "replay")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from fastapi import WebSocketDisconnect
+from app.core import protocol
+from app.core.config import get_settings
+from app.services import session_recorder
+from app.services.session_recorder import iter_records
+
+
+def recorded_meta(records) -> dict:
+    return next((json.loads(p) for k, _, p in records if k == session_recorder.META), {})
+
+
+def configure(meta: dict):
+    """Settings of the recorded engines, before the endpoint (and its module-level settings) is imported"""
+    if "wake" not in meta:
+        print("Recording without wake engine settings: replaying with the current configuration")
+    for name, value in meta.get("wake", {}).items():
+        os.environ[name] = value if isinstance(value, str) else json.dumps(value)
+    if meta.get("engine"):
+        os.environ["CONVERSATION_ENGINE"] = meta["engine"]
+        os.environ["SATELLITE_ENGINES"] = "{}"
+    get_settings.cache_clear()
+
+
+class ReplayWebSocket:
+    """Websocket look-alike feeding the recorded inbound messages to the endpoint"""
+    def __init__(self, records, satellite, fast: bool, tail_s: float):
+        self.inbound = [(kind, t, payload) for kind, t, payload in records
+                        if kind in (session_recorder.INBOUND_BYTES, session_recorder.INBOUND_TEXT)]
+        self.query_params = {"satellite": satellite} if satellite else {}
+        self.fast = fast
+        self.tail_s = tail_s
+        self.sent = 0
+        self.finished = asyncio.Event()
+        self._next = 0
+        self._start = None
+
+    async def accept(self):
+        self._start = time.monotonic()
+
+    async def receive(self):
+        if self._next == len(self.inbound):
+            await asyncio.sleep(self.tail_s)  # Let the last turn play out
+            self.finished.set()
+            raise WebSocketDisconnect(1000)
+        kind, t, payload = self.inbound[self._next]
+        self._next += 1
+        if not self.fast:
+            await asyncio.sleep(max(0.0, self._start + t - time.monotonic()))
+        else:
+            await asyncio.sleep(0)
+        if kind == session_recorder.INBOUND_TEXT:
+            return {"type": "websocket.receive", "text": payload.decode()}
+        return {"type": "websocket.receive", "bytes": payload}
+
+    async def send_bytes(self, data):
+        self.sent += 1
+
+    async def send_text(self, text):
+        self.sent += 1
+
+    async def close(self, code: int = 1000, reason: str = None):
+        pass
+
+
+def decisions(records):
+    """State transitions and outbound control messages (not the audio chunks), with timestamps"""
+    result = []
+    for kind, t, payload in records:
+        if kind == session_recorder.STATE:
+            event = json.loads(payload)
+            result.append((t, event.pop("event"), event))
+        elif kind == session_recorder.OUTBOUND:
+            message = json.loads(payload)
+            if message.get("type") not in ("audio", "pong", "hello"):
+                result.append((t, "-> " + message.pop("type"), message))
+    return result
+
+
+def first_audio_latencies(records):
+    """Time from the last loud inbound chunk before each turn to its first outbound audio"""
+    latencies, last_speech, seen_turns = [], None, set()
+    for kind, t, payload in records:
+        if kind == session_recorder.INBOUND_BYTES:
+            pcm = payload
+            if len(payload) >= protocol.HEADER_SIZE and payload[0] == protocol.PROTOCOL_VERSION:
+                try:
+                    pcm = protocol.decode_frame(payload).payload
+                except protocol.ProtocolError:
+                    pass
+            audio = np.frombuffer(pcm, dtype=np.int16)
+            if len(audio) and np.sqrt(np.mean(np.square(audio, dtype=np.float32))) > get_settings().VAD_RMS_THRESHOLD:
+                last_speech = t
+        elif kind == session_recorder.OUTBOUND:
+            message = json.loads(payload)
+            if message.get("type") == "audio" and message["turn_id"] not in seen_turns:
+                seen_turns.add(message["turn_id"])
+                if last_speech is not None:
+                    latencies.append((message["turn_id"], 1000 * (t - last_speech)))
+    return latencies
+
+
+def scores_of(records):
+    return [np.frombuffer(payload, dtype=np.float32) for kind, _, payload in records
+            if kind == session_recorder.SCORES]
+
+
+async def replay(records, meta, fast, tail_s):
+    from app.api.websocket_endpoint import audio_websocket
+    websocket = ReplayWebSocket(records, meta.get("satellite"), fast, tail_s)
+    task = asyncio.create_task(audio_websocket(websocket))
+    await websocket.finished.wait()
+    try:
+        # The Live receive loop only ends with the session
+        await asyncio.wait_for(task, timeout=2.0)
+    except asyncio.TimeoutError:
+        pass
+    replayed_dir = os.path.join(REPLAY_DIR, os.listdir(REPLAY_DIR)[0])
+    return list(iter_records(replayed_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording", help="Recording directory (recordings/<date>-<connection id>)")
+    parser.add_argument("--fast", action="store_true", help="Do not pace inbound messages")
+    parser.add_argument("--tail", type=float, default=3.0, help="Seconds to wait after the last message")
+    args = parser.parse_args()
+
+    original = list(iter_records(args.recording))
+    meta = recorded_meta(original)
+    configure(meta)
+    replayed = asyncio.run(replay(original, meta, args.fast, args.tail))
+    print(f"Recording: satellite={meta.get('satellite')} engine={meta.get('engine')} models={meta.get('models')}")
+
+    a, b = scores_of(original), scores_of(replayed)
+    n = min(len(a), len(b))
+    diff = max((float(np.abs(x - y).max()) for x, y in zip(a[:n], b[:n]) if len(x) == len(y)), default=0.0)
+    print(f"Wake scores: {len(a)} recorded, {len(b)} replayed, max abs difference {diff:.5f}")
+
+    print(f"\n{'recorded ms':>11} | {'replayed ms':>11} | decision")
+    rec, rep = decisions(original), decisions(replayed)
+    for i in range(max(len(rec), len(rep))):
+        left = rec[i] if i < len(rec) else None
+        right = rep[i] if i < len(rep) else None
+        name = (left or right)[1]
+        mismatch = "" if left and right and left[1] == right[1] else "  <-- differs"
+        print(f"{1000 * left[0] if left else float('nan'):>11.0f} | {1000 * right[0] if right else float('nan'):>11.0f} | "
+              f"{name} {json.dumps((left or right)[2])}{mismatch}")
+
+    print("\nFirst audio after end of speech (ms, per turn):")
+    print(f"  recorded: {[round(ms) for _, ms in first_audio_latencies(original)]}")
+    print(f"  replayed: {[round(ms) for _, ms in first_audio_latencies(replayed)]} (local stand-ins)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import tempfile
+import time
+import wave
+import numpy as np
+
+from audio_engine import AudioEngine, HeadlessBackend, RingBuffer, CHUNK, INPUT_RATE, OUTPUT_RATE
+
+# Checks of the satellite audio engine without sound hardware (HeadlessBackend):
+# capture order, playback, barge-in flush, and flushes racing the playback thread.
+
+
+def write_wav(path: str, samples: np.ndarray, rate: int):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.astype(np.int16).tobytes())
+
+
+def read_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as w:
+        return np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+
+
+async def check_capture(tmp: str):
+    """Chunks read by the uplink are the input file, in order, with nothing lost"""
+    samples = (np.arange(10 * CHUNK) % 30000).astype(np.int16)
+    write_wav(os.path.join(tmp, "in.wav"), samples, INPUT_RATE)
+    engine = AudioEngine(HeadlessBackend(input_file=os.path.join(tmp, "in.wav"), realtime=True))
+    engine.start()
+    chunks = [np.frombuffer(await engine.read_chunk(), dtype=np.int16) for _ in range(10)]
+    engine.stop()
+    assert np.array_equal(np.concatenate(chunks), samples), "captured audio differs from the input file"
+    assert engine.stats()["capture_overruns"] == 0
+
+
+async def check_playback(tmp: str):
+    """Played audio reaches the output device, after the jitter buffer prebuffer"""
+    output = os.path.join(tmp, "out.wav")
+    tone = (np.sin(np.arange(OUTPUT_RATE // 2) * 0.05 + 0.5) * 8000).astype(np.int16)
+    engine = AudioEngine(HeadlessBackend(output_file=output, realtime=True), jitter_ms=60)
+    engine.start()
+    engine.play(tone.tobytes())
+    await asyncio.sleep(0.8)
+    engine.stop()
+    played = read_wav(output)
+    start = int(np.flatnonzero(played)[0])
+    assert np.array_equal(played[start:start + len(tone)], tone), "played audio differs from the pushed audio"
+
+
+async def check_interrupt(tmp: str):
+    """A barge-in drops the queued playback within a callback period"""
+    output = os.path.join(tmp, "out.wav")
+    tone = (np.sin(np.arange(5 * OUTPUT_RATE) * 0.05) * 8000).astype(np.int16)
+    engine = AudioEngine(HeadlessBackend(output_file=output, realtime=True))
+    engine.start()
+    engine.play(tone.tobytes())
+    await asyncio.sleep(0.3)
+    engine.interrupt()
+    await asyncio.sleep(0.1)
+    buffered = engine.stats()["playback_buffered_ms"]
+    await asyncio.sleep(0.3)
+    engine.stop()
+    played_s = np.count_nonzero(read_wav(output)) / OUTPUT_RATE
+    assert buffered == 0, f"{buffered} ms still queued after the interrupt"
+    assert played_s < 0.6, f"{played_s:.2f} s played after a barge-in at 0.3 s"
+
+
+class RacingRing(RingBuffer):
+    """Runs a producer write + clear() while the consumer is applying a flush (between its two steps)"""
+    def __init__(self, capacity: int):
+        self.racing = False
+        super().__init__(capacity)
+
+    @property
+    def _read(self):
+        return self._read_position
+
+    @_read.setter
+    def _read(self, value):
+        self._read_position = value
+        if self.racing:
+            self.racing = False
+            self.write(np.ones(256, dtype=np.int16))  # More than one read
+            self.clear()
+
+
+def check_flush_race():
+    """A clear() issued while the consumer is applying the previous one is not lost"""
+    ring = RacingRing(4096)
+    out = np.zeros(64, dtype=np.int16)
+    ring.write(np.ones(64, dtype=np.int16))
+    ring.clear()
+    ring.racing = True
+    ring.read_into(out)  # Applies the first clear, the second one lands meanwhile
+    assert ring.read_into(out) == 0, "the second clear() was lost"
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for check in (check_capture, check_playback, check_interrupt):
+            start = time.monotonic()
+            await check(tmp)
+            print(f"OK {check.__name__} ({time.monotonic() - start:.1f} s)")
+    check_flush_race()
+    print("OK check_flush_race")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())